@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+CACHE_FILENAME = '.build_cache.json'
+CACHE_FORMAT = 1
+READ_CHUNK = 1024 * 1024
+
+
+def hash_file(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tool_version(*sources):
+    """Fingerprint the code that produces an output.
+
+    Pass module objects or file paths; editing any of them invalidates
+    every output built with this version.
+    """
+    digest = hashlib.sha256()
+    for source in sources:
+        path = getattr(source, '__file__', source)
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class BuildCache:
+    """Persistent content-hash cache shared by the asset pipeline scripts.
+
+    Each output is recorded with a key derived from the content hashes of
+    its inputs plus the version of the tool that produced it. File hashes
+    are memoized by size and mtime, so checking an unchanged tree costs one
+    stat() per file.
+    """
+
+    def __init__(self, base_dir):
+        self.path = Path(base_dir) / CACHE_FILENAME
+        self.files = {}
+        self.outputs = {}
+        self.results = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('format') == CACHE_FORMAT:
+                    self.files = data.get('files', {})
+                    self.outputs = data.get('outputs', {})
+                    self.results = data.get('results', {})
+            except (OSError, ValueError):
+                pass
+
+    def digest(self, path):
+        """Content hash of a file, reusing the stored hash if size/mtime match."""
+        path = str(path)
+        stat = os.stat(path)
+        entry = self.files.get(path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+        sha = hash_file(path)
+        self.files[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha}
+        return sha
+
+    def key(self, inputs, version):
+        """Combine input content hashes and tool version into one key."""
+        digest = hashlib.sha256(version.encode('utf-8'))
+        for path in sorted(str(p) for p in inputs):
+            digest.update(path.encode('utf-8'))
+            digest.update(self.digest(path).encode('ascii'))
+        return digest.hexdigest()
+
+    def lookup(self, output, inputs, version):
+        """Return the stored metadata if output is up to date, else None."""
+        entry = self.outputs.get(str(output))
+        if not entry or not os.path.exists(output):
+            return None
+        if entry['key'] != self.key(inputs, version):
+            return None
+        stat = os.stat(output)
+        if entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            return None
+        return entry['meta']
+
+    def store(self, output, inputs, version, **meta):
+        """Record that output was built from inputs by version."""
+        stat = os.stat(output)
+        self.outputs[str(output)] = {
+            'key': self.key(inputs, version),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'meta': meta
+        }
+
+    def recall(self, name, inputs, version):
+        """Return the value remembered under name if its inputs are unchanged, else None.
+
+        For stage results that are not written out as files of their own.
+        """
+        entry = self.results.get(name)
+        if not entry or entry['key'] != self.key(inputs, version):
+            return None
+        return entry['value']
+
+    def remember(self, name, inputs, version, value):
+        """Store a JSON-serializable stage result keyed on its inputs."""
+        self.results[name] = {'key': self.key(inputs, version), 'value': value}
+
+    def previous_meta(self, output):
+        """Metadata from the last time output was stored, even if now stale."""
+        entry = self.outputs.get(str(output))
+        return entry['meta'] if entry else None
+
+    def forget(self, output):
+        self.outputs.pop(str(output), None)
+
+    def save(self):
+        data = {'format': CACHE_FORMAT, 'files': self.files, 'outputs': self.outputs, 'results': self.results}
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
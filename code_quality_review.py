@@ -2,34 +2,25 @@ import json
 from pathlib import Path
 import re
 
+from html_document import load_document
+
 def validate_html(filepath):
     """Basic HTML validation checks."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+    document = load_document(filepath)
     
     issues = []
     
     # Check for basic structure
-    if '<!DOCTYPE html>' not in content:
+    if document.doctype.lower() != 'html':
         issues.append('Missing DOCTYPE declaration')
     
-    if not re.search(r'<html[^>]*lang=', content):
+    if not document.lang:
         issues.append('Missing lang attribute on html tag')
     
-    # Check for matching tags (basic)
-    open_tags = re.findall(r'<(\w+)[^>]*>', content)
-    close_tags = re.findall(r'</(\w+)>', content)
-    
-    self_closing = ['meta', 'link', 'img', 'br', 'hr', 'input']
-    open_filtered = [tag for tag in open_tags if tag not in self_closing]
-    
     # Basic validation
-    if content.count('<html') != content.count('</html>'):
-        issues.append('HTML tag mismatch')
-    if content.count('<head') != content.count('</head>'):
-        issues.append('HEAD tag mismatch')
-    if content.count('<body') != content.count('</body>'):
-        issues.append('BODY tag mismatch')
+    for tag in ('html', 'head', 'body'):
+        if document.start_tags.get(tag, 0) != document.end_tags.get(tag, 0):
+            issues.append(f'{tag.upper()} tag mismatch')
     
     return issues
 
@@ -2,46 +2,9 @@ import os
 import re
 import json
 from pathlib import Path
-from html.parser import HTMLParser
 
-class HTMLValidator(HTMLParser):
-    def __init__(self):
-        super().__init__()
-        self.tags = []
-        self.issues = []
-        self.meta_tags = {}
-        self.headings = []
-        self.images = []
-        self.links = []
-        self.aria_labels = []
-        
-    def handle_starttag(self, tag, attrs):
-        self.tags.append(tag)
-        attrs_dict = dict(attrs)
-        
-        if tag == 'meta':
-            if 'name' in attrs_dict:
-                self.meta_tags[attrs_dict['name']] = attrs_dict.get('content', '')
-        elif tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-            self.headings.append(tag)
-        elif tag == 'img':
-            self.images.append({
-                'src': attrs_dict.get('src', ''),
-                'alt': attrs_dict.get('alt', ''),
-                'has_alt': 'alt' in attrs_dict
-            })
-        elif tag == 'a':
-            self.links.append({
-                'href': attrs_dict.get('href', ''),
-                'aria_label': attrs_dict.get('aria-label', ''),
-                'has_aria': 'aria-label' in attrs_dict
-            })
-        
-        if any(attr[0].startswith('aria-') for attr in attrs):
-            self.aria_labels.append({
-                'tag': tag,
-                'attrs': [attr for attr in attrs if attr[0].startswith('aria-')]
-            })
+from html_document import load_document
+from link_graph import PAGES, check_links, print_link_report
 
 def analyze_html_file(filepath):
     """Analyze HTML file for structure, SEO, and accessibility."""
@@ -55,32 +18,28 @@ def analyze_html_file(filepath):
     }
     
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        validator = HTMLValidator()
-        validator.feed(content)
+        document = load_document(filepath)
         
         # SEO Analysis
-        results['seo']['has_title'] = '<title>' in content
-        title_match = re.search(r'<title>(.*?)</title>', content, re.IGNORECASE)
-        if title_match:
-            title = title_match.group(1).strip()
+        results['seo']['has_title'] = document.has_tag('title')
+        if document.has_tag('title'):
+            title = document.title
             results['seo']['title'] = title
             results['seo']['title_length'] = len(title)
             results['seo']['title_optimal'] = 50 <= len(title) <= 60
         
-        results['seo']['meta_description'] = validator.meta_tags.get('description', '')
+        results['seo']['meta_description'] = document.meta.get('description', '')
         desc_len = len(results['seo']['meta_description'])
         results['seo']['description_length'] = desc_len
         results['seo']['description_optimal'] = 150 <= desc_len <= 160
         
-        results['seo']['has_viewport'] = 'viewport' in validator.meta_tags
+        results['seo']['has_viewport'] = 'viewport' in document.meta
         
         # Heading hierarchy
-        h1_count = validator.headings.count('h1')
+        headings = [heading.tag for heading in document.headings]
+        h1_count = headings.count('h1')
         results['structure']['h1_count'] = h1_count
-        results['structure']['heading_hierarchy'] = validator.headings[:10]
+        results['structure']['heading_hierarchy'] = headings[:10]
         
         if h1_count == 0:
             results['issues'].append('CRITICAL: No H1 heading found')
@@ -88,32 +47,32 @@ def analyze_html_file(filepath):
             results['issues'].append(f'WARNING: Multiple H1 headings ({h1_count})')
         
         # Accessibility - Images
-        images_without_alt = [img for img in validator.images if not img['has_alt']]
-        results['accessibility']['total_images'] = len(validator.images)
-        results['accessibility']['images_with_alt'] = len([img for img in validator.images if img['has_alt']])
-        results['accessibility']['images_without_alt'] = len(images_without_alt)
+        images_with_alt = [img for img in document.images if 'alt' in img.attrs]
+        results['accessibility']['total_images'] = len(document.images)
+        results['accessibility']['images_with_alt'] = len(images_with_alt)
+        results['accessibility']['images_without_alt'] = len(document.images) - len(images_with_alt)
         
-        if images_without_alt:
-            results['issues'].append(f'ACCESSIBILITY: {len(images_without_alt)} images missing alt text')
+        if results['accessibility']['images_without_alt']:
+            results['issues'].append(f"ACCESSIBILITY: {results['accessibility']['images_without_alt']} images missing alt text")
         
         # Accessibility - ARIA
-        results['accessibility']['aria_labels_count'] = len(validator.aria_labels)
-        results['accessibility']['has_lang'] = 'lang="en"' in content or 'lang=\'en\'' in content
+        results['accessibility']['aria_labels_count'] = len(document.aria)
+        results['accessibility']['has_lang'] = document.lang == 'en'
         
         if not results['accessibility']['has_lang']:
             results['issues'].append('ACCESSIBILITY: Missing lang attribute on html tag')
         
         # Links
-        results['structure']['total_links'] = len(validator.links)
-        empty_links = [link for link in validator.links if not link['href'] or link['href'] == '#']
+        results['structure']['total_links'] = len(document.links)
+        empty_links = [link for link in document.links if link.attrs.get('href', '') in ('', '#')]
         if empty_links:
             results['issues'].append(f'WARNING: {len(empty_links)} empty or placeholder links')
         
         # Semantic HTML
-        has_header = '<header' in content
-        has_nav = '<nav' in content
-        has_main = '<main' in content
-        has_footer = '<footer' in content
+        has_header = document.has_tag('header')
+        has_nav = document.has_tag('nav')
+        has_main = document.has_tag('main')
+        has_footer = document.has_tag('footer')
         
         results['structure']['semantic_html'] = {
             'has_header': has_header,
@@ -282,6 +241,16 @@ def main():
                     report['summary']['warnings'] += 1
                 report['summary']['total_issues'] += 1
     
+    # Link graph: every href/src resolved against the site tree
+    print(f"\n\n🔗 LINK GRAPH ({len(PAGES)} pages)")
+    print("-" * 80)
+    link_report = check_links(base_dir, PAGES)
+    print_link_report(link_report)
+    report['link_graph'] = link_report
+    report['summary']['critical_issues'] += link_report['errors']
+    report['summary']['warnings'] += link_report['warnings']
+    report['summary']['total_issues'] += link_report['errors'] + link_report['warnings']
+    
     # Analyze CSS files
     css_files = list(base_dir.glob('**/*.css'))
     print(f"\n\n🎨 CSS FILES ANALYSIS ({len(css_files)} files)")
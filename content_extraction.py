@@ -1,182 +1,998 @@
+import asyncio
+from collections import deque
+import hashlib
 import requests
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
 import json
+import re
 import os
 import sys
-from urllib.parse import urljoin, urlparse
+import threading
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+from urllib.robotparser import RobotFileParser
 import time
 import logging
+import xml.etree.ElementTree as ET
+import zlib
 
 logging.basicConfig(level=logging.INFO, handlers=[logging.StreamHandler(sys.stdout)])
 logger = logging.getLogger(__name__)
 
+SKIPPED_EXTENSIONS = ['.pdf', '.jpg', '.png', '.gif', '.css', '.js']
+CHECKPOINT_FILE = '_crawl_state.json'
+LASTMOD_FILE = '_sitemap_lastmod.json'
+FINGERPRINT_FILE = '_fingerprints.json'
+CHANGES_FILE = '_changes.json'
+METRICS_FILE = '_crawl_metrics.json'
+# Histogram bucket upper bounds; the last bucket is open-ended
+TIME_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+SIZE_BUCKETS = [1024, 10 * 1024, 100 * 1024, 1024 * 1024]
+# robots.txt group the crawler obeys
+ROBOTS_USER_AGENT = '*'
+# Nested sitemap indexes followed at most this deep
+MAX_SITEMAP_DEPTH = 3
+
+class TokenBucket:
+    """Async token-bucket rate limiter.
+
+    Allows `rate` requests per second on average with bursts of up to
+    `capacity`; callers wait only as long as it takes a token to refill.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+    
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def histogram(values, bounds):
+    """Count values into buckets labelled by their upper bound ('+Inf' for the rest)"""
+    counts = {str(bound): 0 for bound in bounds}
+    counts['+Inf'] = 0
+    for value in values:
+        label = next((str(bound) for bound in bounds if value <= bound), '+Inf')
+        counts[label] += 1
+    return counts
+
+def percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {'p50': pick(0.5), 'p90': pick(0.9), 'p99': pick(0.99), 'max': ordered[-1]}
+
+class CrawlMetrics:
+    """Per-URL request timings, sizes and status codes for one crawl.
+
+    Fetches run on executor threads, so updates go through a lock.
+    ttfb_ms is the time until response headers arrive; requests does not
+    expose DNS and connect separately, so connection setup is included
+    there whenever a new connection is opened.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = {}
+        self.started = time.monotonic()
+    
+    def record(self, url, **values):
+        with self.lock:
+            self.records.setdefault(url, {'url': url}).update(values)
+    
+    def report(self, slowest=10):
+        records = list(self.records.values())
+        elapsed = time.monotonic() - self.started
+        statuses = {}
+        for record in records:
+            status = str(record.get('status', 'error'))
+            statuses[status] = statuses.get(status, 0) + 1
+        series = {
+            name: [r[name] for r in records if r.get(name) is not None]
+            for name in ('ttfb_ms', 'download_ms', 'parse_ms', 'bytes')
+        }
+        for record in records:
+            record['total_ms'] = round(sum(record.get(name) or 0 for name in ('ttfb_ms', 'download_ms', 'parse_ms')), 1)
+        return {
+            'requests': len(records),
+            'elapsed_s': round(elapsed, 2),
+            'requests_per_second': round(len(records) / elapsed, 2) if elapsed else 0,
+            'bytes_total': sum(series['bytes']),
+            'status_codes': statuses,
+            'percentiles': {name: percentiles(values) for name, values in series.items()},
+            'histograms': {
+                name: histogram(values, SIZE_BUCKETS if name == 'bytes' else TIME_BUCKETS_MS)
+                for name, values in series.items()
+            },
+            'slowest': sorted(records, key=lambda r: r['total_ms'], reverse=True)[:slowest],
+            'pages': records
+        }
+
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+def canonicalize_url(url, base=None):
+    """Canonical form used to deduplicate crawl targets.
+
+    Resolves against base, drops the fragment, lowercases scheme and host,
+    removes default ports and sorts query parameters. A trailing slash is
+    kept: /docs/ and /docs resolve relative links differently.
+    """
+    if base:
+        url = urljoin(base, url)
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    if parsed.port and str(parsed.port) != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parsed.port}'
+    path = parsed.path or '/'
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, host, path, parsed.params, query, ''))
+
+class CrawlFrontier:
+    """URLs waiting to be crawled, shallowest link depth first.
+
+    One deque per depth gives O(1) push/pop, and a seen-set of canonical
+    URLs means a page is queued at most once however often it is linked.
+    """
+    def __init__(self, base_url, max_depth=None):
+        self.base_url = base_url
+        self.max_depth = max_depth
+        self.levels = []
+        self.seen = set()
+        self.depth = 0
+        self.size = 0
+    
+    def push(self, url, depth=0):
+        """Queue url (resolved against the base); False if already seen or too deep"""
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        url = canonicalize_url(url, self.base_url)
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        while len(self.levels) <= depth:
+            self.levels.append(deque())
+        self.levels[depth].append(url)
+        self.depth = min(self.depth, depth)
+        self.size += 1
+        return True
+    
+    def pop(self):
+        """Return (url, depth) for the shallowest queued URL"""
+        while not self.levels[self.depth]:
+            self.depth += 1
+        self.size -= 1
+        return self.levels[self.depth].popleft(), self.depth
+    
+    def __len__(self):
+        return self.size
+    
+    def to_state(self):
+        """JSON-serializable snapshot of the queue and seen-set"""
+        return {'levels': [list(level) for level in self.levels], 'seen': sorted(self.seen)}
+    
+    @classmethod
+    def from_state(cls, base_url, state, max_depth=None):
+        frontier = cls(base_url, max_depth)
+        frontier.levels = [deque(level) for level in state['levels']]
+        frontier.seen = set(state['seen'])
+        frontier.size = sum(len(level) for level in frontier.levels)
+        return frontier
+
+def write_json_atomic(path, data, indent=None):
+    """Write JSON via a temp file so a crash never leaves a truncated file"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+class HttpCache:
+    """On-disk conditional-request cache keyed by canonical URL.
+
+    Each entry keeps the ETag/Last-Modified validators from the last full
+    response plus the page_data parsed from it, so a 304 reply can reuse
+    the extraction without downloading or parsing the body again.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def entry_path(self, url):
+        key = hashlib.sha256(canonicalize_url(url).encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def load(self, url):
+        try:
+            with open(self.entry_path(url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def cached_page(self, url):
+        """page_data stored for url, or None if the entry is missing, corrupt
+        or from a format without every field"""
+        entry = self.load(url)
+        page_data = entry.get('page_data') if isinstance(entry, dict) else None
+        if not isinstance(page_data, dict) or not all(name in page_data for name in ('url',) + PAGE_FIELDS):
+            return None
+        return page_data
+    
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since headers for a cached URL"""
+        entry = self.load(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def store(self, url, validators, page_data):
+        if not validators.get('etag') and not validators.get('last_modified'):
+            return
+        entry = dict(validators, url=canonicalize_url(url), page_data=page_data)
+        write_json_atomic(self.entry_path(url), entry)
+
+def parse_sitemap(chunks):
+    """Yield (kind, loc, lastmod) from the byte chunks of a sitemap or sitemap index.
+
+    kind is 'url' or 'sitemap'. sitemap.xml.gz files (recognized by their
+    magic bytes; requests already undoes Content-Encoding) are gunzipped
+    on the fly. Parsing is incremental and each entry is discarded once
+    read, so a 50,000-URL sitemap never sits in memory.
+    """
+    parser = ET.XMLPullParser(events=('end',))
+    decompressor = None
+    started = False
+    
+    def entries():
+        for _, element in parser.read_events():
+            kind = element.tag.rsplit('}', 1)[-1]
+            if kind not in ('url', 'sitemap'):
+                continue
+            fields = {child.tag.rsplit('}', 1)[-1]: (child.text or '').strip() for child in element}
+            element.clear()
+            if fields.get('loc'):
+                yield kind, fields['loc'], fields.get('lastmod')
+    
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if not started:
+            started = True
+            if chunk[:2] == b'\x1f\x8b':
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        parser.feed(decompressor.decompress(chunk) if decompressor else chunk)
+        yield from entries()
+    parser.close()
+    yield from entries()
+
+PAGE_FIELDS = ('title', 'meta_description', 'headings', 'paragraphs', 'links',
+               'images', 'raw_text', 'html_structure')
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+SKIPPED_CONTENT_TAGS = {'script', 'style', 'noscript'}
+STRUCTURE_TAGS = {'section', 'div', 'article'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+             'link', 'meta', 'param', 'source', 'track', 'wbr'}
+# Start tags that implicitly close an open <p>
+P_CLOSERS = {'address', 'article', 'aside', 'blockquote', 'div', 'dl', 'fieldset',
+             'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr',
+             'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'ul'}
+CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+FEED_CHUNK = 64 * 1024
+
+def content_hash(value):
+    """Short stable hash of text or any JSON-serializable value"""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()[:16]
+
+def normalized_text_hash(text):
+    """Hash of text with whitespace collapsed, so reflowed markup is not a change"""
+    return content_hash(' '.join(text.split()))
+
+def section_key(section, taken):
+    """Stable name for an html_structure entry: #id, else tag.class, numbered if repeated"""
+    if section['id']:
+        key = f"#{section['id']}"
+    else:
+        key = section['tag'] + ''.join(f'.{name}' for name in section['class'].split())
+    base, n = key, 2
+    while key in taken:
+        key = f'{base}[{n}]'
+        n += 1
+    return key
+
+def page_fingerprint(page_data):
+    """Normalized-text hash, structural hash and per-section hashes of a page.
+
+    The structural hash covers the top-level sections (tag, class, id) and
+    the heading levels in order, so it changes when the layout does but
+    not when only copy is edited.
+    """
+    sections = {}
+    for section in page_data.get('html_structure', []):
+        key = section_key(section, sections)
+        sections[key] = section.get('text_hash') or normalized_text_hash(section['text_preview'])
+    skeleton = [[s['tag'], s['class'], s['id']] for s in page_data.get('html_structure', [])]
+    skeleton.append({level: len(texts) for level, texts in page_data.get('headings', {}).items()})
+    return {
+        'url': page_data['url'],
+        'text_hash': normalized_text_hash(page_data.get('raw_text', '')),
+        'structure_hash': content_hash(skeleton),
+        'sections': sections
+    }
+
+def compare_fingerprints(previous, current, complete=True):
+    """Change report between two {filename: fingerprint} maps.
+
+    Pages missing from current only count as removed when the crawl was
+    complete; otherwise they may simply not have been reached.
+    """
+    report = {'added': [], 'removed': [], 'modified': {}, 'unchanged': 0}
+    for name, fingerprint in sorted(current.items()):
+        old = previous.get(name)
+        if old is None:
+            report['added'].append(name)
+            continue
+        if old['text_hash'] == fingerprint['text_hash'] and old['structure_hash'] == fingerprint['structure_hash']:
+            report['unchanged'] += 1
+            continue
+        old_sections = old.get('sections', {})
+        new_sections = fingerprint['sections']
+        report['modified'][name] = {
+            'text_changed': old['text_hash'] != fingerprint['text_hash'],
+            'structure_changed': old['structure_hash'] != fingerprint['structure_hash'],
+            'sections_added': [key for key in new_sections if key not in old_sections],
+            'sections_removed': [key for key in old_sections if key not in new_sections],
+            'sections_modified': [key for key in new_sections
+                                  if key in old_sections and old_sections[key] != new_sections[key]]
+        }
+    if complete:
+        report['removed'] = sorted(name for name in previous if name not in current)
+    return report
+
+def changed_pages(output_dir):
+    """Filenames added or modified by the last crawl, for incremental downstream stages.
+
+    Returns None when there is no change report, meaning everything
+    should be treated as changed.
+    """
+    try:
+        with open(os.path.join(output_dir, CHANGES_FILE), 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return set(report['added']) | set(report['modified'])
+
+class PageExtractor(HTMLParser):
+    """Single-pass extractor for page_data.
+
+    Collects title, meta description, headings, paragraphs, links, images,
+    raw text and the top-level structure in one stream of parser events,
+    without building a tree. Text for an element is gathered only while it
+    is open, so memory stays proportional to what is extracted. fields
+    acts as a strainer: fields left out are not collected at all. Links
+    and images resolve against base_url (the URL the page was actually
+    served from), defaulting to url.
+    """
+    def __init__(self, url, fields=None, base_url=None):
+        super().__init__()
+        self.url = url
+        self.base_url = base_url or url
+        self.fields = set(fields or PAGE_FIELDS)
+        self.page_data = {
+            'url': url,
+            'title': '',
+            'meta_description': '',
+            'headings': {},
+            'paragraphs': [],
+            'links': [],
+            'images': [],
+            'raw_text': '',
+            'html_structure': []
+        }
+        self.text_lines = []
+        self.open_tags = []
+        self.collectors = []
+        self.skip_depth = 0
+        self.body_depth = None
+        self.main_depth = None
+        self.main_closed = False
+        self.body_structure = []
+        self.main_structure = []
+    
+    def extract(self, content):
+        if isinstance(content, bytes):
+            match = CHARSET_RE.search(content[:2048])
+            encoding = match.group(1).decode('ascii') if match else 'utf-8'
+            try:
+                content = content.decode(encoding, errors='replace')
+            except LookupError:
+                content = content.decode('utf-8', errors='replace')
+        for i in range(0, len(content), FEED_CHUNK):
+            self.feed(content[i:i + FEED_CHUNK])
+        self.close()
+        
+        page_data = self.page_data
+        page_data['raw_text'] = '\n'.join(self.text_lines)
+        page_data['html_structure'] = self.main_structure if self.main_depth is not None else self.body_structure
+        for name in PAGE_FIELDS:
+            if name not in self.fields:
+                del page_data[name]
+        return page_data
+    
+    def collect(self, tag, record):
+        """Start gathering text for the element just opened"""
+        self.collectors.append((len(self.open_tags), tag, record, []))
+    
+    def handle_starttag(self, tag, attrs):
+        if self.skip_depth:
+            if tag in SKIPPED_CONTENT_TAGS:
+                self.skip_depth += 1
+            return
+        if tag in SKIPPED_CONTENT_TAGS:
+            self.skip_depth = 1
+            return
+        if tag in P_CLOSERS and 'p' in self.open_tags:
+            self.handle_endtag('p')
+        
+        attrs = dict(attrs)
+        fields = self.fields
+        if tag == 'meta' and 'meta_description' in fields and attrs.get('name') == 'description' \
+                and not self.page_data['meta_description']:
+            self.page_data['meta_description'] = attrs.get('content') or ''
+        elif tag == 'img':
+            if 'images' in fields and attrs.get('src'):
+                self.page_data['images'].append({'src': urljoin(self.base_url, attrs['src']), 'alt': attrs.get('alt') or ''})
+        if tag in VOID_TAGS:
+            return
+        
+        self.open_tags.append(tag)
+        depth = len(self.open_tags)
+        if tag == 'body' and self.body_depth is None:
+            self.body_depth = depth
+        elif tag == 'main' and self.main_depth is None:
+            self.main_depth = depth
+        elif tag in STRUCTURE_TAGS and 'html_structure' in fields:
+            if depth - 1 == self.main_depth and not self.main_closed:
+                self.collect(tag, ('structure', self.main_structure, attrs))
+            elif depth - 1 == self.body_depth and self.main_depth is None:
+                self.collect(tag, ('structure', self.body_structure, attrs))
+        
+        if tag == 'title' and 'title' in fields and not self.page_data['title']:
+            self.collect(tag, ('title',))
+        elif tag in HEADING_TAGS and 'headings' in fields:
+            self.collect(tag, ('heading', tag))
+        elif tag == 'p' and 'paragraphs' in fields:
+            self.collect(tag, ('paragraph',))
+        elif tag == 'a' and 'links' in fields and attrs.get('href') is not None:
+            self.collect(tag, ('link', urljoin(self.base_url, attrs['href'])))
+    
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag and not self.skip_depth:
+            self.handle_endtag(tag)
+    
+    def handle_endtag(self, tag):
+        if self.skip_depth:
+            if tag in SKIPPED_CONTENT_TAGS:
+                self.skip_depth -= 1
+            return
+        if tag not in self.open_tags:
+            return
+        depth = len(self.open_tags) - self.open_tags[::-1].index(tag)
+        while self.collectors and self.collectors[-1][0] >= depth:
+            self.finish(*self.collectors.pop())
+        del self.open_tags[depth - 1:]
+        if self.main_depth is not None and depth <= self.main_depth:
+            self.main_closed = True
+    
+    def finish(self, depth, tag, record, parts):
+        text = ''.join(parts)
+        kind = record[0]
+        page_data = self.page_data
+        if kind == 'title':
+            page_data['title'] = text
+        elif kind == 'heading':
+            page_data['headings'].setdefault(record[1], []).append(text)
+        elif kind == 'paragraph':
+            if text:
+                page_data['paragraphs'].append(text)
+        elif kind == 'link':
+            page_data['links'].append({'href': record[1], 'text': text})
+        else:
+            _, structure, attrs = record
+            structure.append({
+                'tag': tag,
+                'class': ' '.join((attrs.get('class') or '').split()),
+                'id': attrs.get('id') or '',
+                'text_preview': text[:200],
+                'text_hash': normalized_text_hash(text)
+            })
+    
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        text = data.strip()
+        if not text:
+            return
+        if 'raw_text' in self.fields:
+            self.text_lines.append(text)
+        for collector in self.collectors:
+            collector[3].append(text)
+    
+    def close(self):
+        super().close()
+        while self.collectors:
+            self.finish(*self.collectors.pop())
+
 class WebsiteScraper:
-    def __init__(self, base_url, output_dir):
+    def __init__(self, base_url, output_dir, max_concurrency=4, requests_per_second=5, max_depth=None,
+                 use_http_cache=True, checkpoint_every=10, use_robots=True, use_sitemaps=True):
         self.base_url = base_url
+        self.use_robots = use_robots
+        self.use_sitemaps = use_sitemaps
+        self.robots = None
+        self.crawl_delay = 0
+        self.http_cache = HttpCache(os.path.join(output_dir, '.http_cache')) if use_http_cache else None
+        self.max_depth = max_depth
         self.output_dir = output_dir
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILE)
         self.visited_urls = set()
-        self.content_data = {}
+        # Pages are written to disk as they finish; only filename -> URL is kept
+        self.saved_pages = {}
+        self.in_progress = {}
+        self.pages_since_checkpoint = 0
+        self.lastmod_path = os.path.join(output_dir, LASTMOD_FILE)
+        # Sitemap lastmod of each page in this crawl, and as of the last saved crawl
+        self.sitemap_lastmod = {}
+        self.crawled_lastmod = {}
+        self.fingerprint_path = os.path.join(output_dir, FINGERPRINT_FILE)
+        self.fingerprints = {}
+        self.crawl_complete = False
+        self.metrics = CrawlMetrics()
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
         
     def is_valid_url(self, url):
-        """Check if URL belongs to the same domain"""
-        parsed = urlparse(url)
-        base_parsed = urlparse(self.base_url)
-        return parsed.netloc == base_parsed.netloc or parsed.netloc == ''
+        """Check if URL is an http(s) page on the same host (mailto:, tel:, ... are not)"""
+        parsed = urlparse(canonicalize_url(url, self.base_url))
+        return parsed.scheme in ('http', 'https') and \
+            parsed.netloc == urlparse(canonicalize_url(self.base_url)).netloc
+    
+    def fetch_page(self, url, conditional=True):
+        """Download a page, conditionally if it is cached (and conditional is set).
+
+        Returns (body, validators, final_url); body is None when the
+        server answers 304 Not Modified, and final_url is the URL after
+        redirects, which relative links resolve against.
+        """
+        logger.info(f"Scraping: {url}")
+        headers = self.http_cache.conditional_headers(url) if self.http_cache and conditional else {}
+        try:
+            response = self.session.get(url, timeout=10, headers=headers, stream=True)
+        except requests.RequestException as e:
+            self.metrics.record(url, error=type(e).__name__)
+            raise
+        # With stream=True the body is read below, so download time is separate
+        start = time.perf_counter()
+        content = response.content
+        self.metrics.record(
+            url,
+            status=response.status_code,
+            ttfb_ms=round(response.elapsed.total_seconds() * 1000, 1),
+            download_ms=round((time.perf_counter() - start) * 1000, 1),
+            bytes=len(content)
+        )
+        if response.status_code == 304 and headers:
+            return None, {}, response.url
+        response.raise_for_status()
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        return content, validators, response.url
+    
+    def build_page(self, url, fetched):
+        """Turn a fetch_page result into page_data, reusing the cache on 304.
+
+        If the cached entry cannot be used, the page is fetched again
+        without the conditional headers.
+        """
+        content, validators, final_url = fetched
+        if content is None:
+            page_data = self.http_cache.cached_page(url)
+            if page_data is not None:
+                logger.info(f"Not modified: {url}")
+                return page_data
+            logger.warning(f"Unusable cache entry for {url}, fetching it again")
+            content, validators, final_url = self.fetch_page(url, conditional=False)
+        start = time.perf_counter()
+        page_data = self.parse_page(url, content, base_url=final_url)
+        self.metrics.record(url, parse_ms=round((time.perf_counter() - start) * 1000, 1))
+        if self.http_cache:
+            self.http_cache.store(url, validators, page_data)
+        return page_data
     
     def extract_page_content(self, url):
         """Extract structured content from a page"""
         try:
-            logger.info(f"Scraping: {url}")
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'lxml')
-            
-            # Remove script and style elements
-            for element in soup(['script', 'style', 'noscript']):
-                element.decompose()
-            
-            # Extract page data
-            page_data = {
-                'url': url,
-                'title': soup.title.string if soup.title else '',
-                'meta_description': '',
-                'headings': {},
-                'paragraphs': [],
-                'links': [],
-                'images': [],
-                'raw_text': '',
-                'html_structure': []
-            }
-            
-            # Meta description
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc:
-                page_data['meta_description'] = meta_desc.get('content', '')
-            
-            # Headings
-            for i in range(1, 7):
-                headings = soup.find_all(f'h{i}')
-                if headings:
-                    page_data['headings'][f'h{i}'] = [h.get_text(strip=True) for h in headings]
-            
-            # Paragraphs
-            paragraphs = soup.find_all('p')
-            page_data['paragraphs'] = [p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)]
-            
-            # Links
-            links = soup.find_all('a', href=True)
-            for link in links:
-                href = urljoin(url, link['href'])
-                link_text = link.get_text(strip=True)
-                page_data['links'].append({'href': href, 'text': link_text})
-            
-            # Images
-            images = soup.find_all('img', src=True)
-            for img in images:
-                src = urljoin(url, img['src'])
-                alt = img.get('alt', '')
-                page_data['images'].append({'src': src, 'alt': alt})
-            
-            # Raw text content
-            page_data['raw_text'] = soup.get_text(separator='\n', strip=True)
-            
-            # HTML structure for main content
-            main_content = soup.find('main') or soup.find('body')
-            if main_content:
-                for elem in main_content.find_all(['section', 'div', 'article'], recursive=False):
-                    elem_class = ' '.join(elem.get('class', []))
-                    elem_id = elem.get('id', '')
-                    page_data['html_structure'].append({
-                        'tag': elem.name,
-                        'class': elem_class,
-                        'id': elem_id,
-                        'text_preview': elem.get_text(strip=True)[:200]
-                    })
-            
-            return page_data
-            
+            return self.build_page(url, self.fetch_page(url))
         except Exception as e:
             logger.error(f"Error scraping {url}: {str(e)}")
             return None
     
-    def crawl(self, start_url, max_pages=20):
-        """Crawl the website starting from start_url"""
-        to_visit = [start_url]
+    def parse_page(self, url, content, fields=None, base_url=None):
+        """Extract structured content from a downloaded page in one streaming pass"""
+        extractor = PageExtractor(url, fields, base_url)
+        return extractor.extract(content)
+    
+    def should_visit(self, url):
+        """Check whether a queued URL still needs fetching"""
+        if url in self.visited_urls or not self.is_valid_url(url):
+            return False
+        if self.robots and not self.robots.can_fetch(ROBOTS_USER_AGENT, url):
+            logger.info(f"Disallowed by robots.txt: {url}")
+            return False
+        # Skip non-HTML resources
+        return not any(url.lower().endswith(ext) for ext in SKIPPED_EXTENSIONS)
+    
+    def write_page(self, filename, page_data):
+        """Write one page's JSON as soon as it is extracted"""
+        output_path = os.path.join(self.output_dir, f"{filename}.json")
+        write_json_atomic(output_path, page_data, indent=2)
+        logger.info(f"Saved: {output_path}")
+    
+    def page_filename(self, url):
+        """Create safe filename"""
+        path = urlparse(url).path
+        return path.strip('/').replace('/', '_') or 'homepage'
+    
+    def record_page(self, url, page_data):
+        """Save extracted page data and return the internal links to follow"""
+        filename = self.page_filename(url)
+        self.write_page(filename, page_data)
+        self.saved_pages[filename] = url
+        self.fingerprints[filename] = page_fingerprint(page_data)
+        lastmod = self.sitemap_lastmod.get(canonicalize_url(url))
+        if lastmod:
+            self.crawled_lastmod[canonicalize_url(url)] = lastmod
         
-        while to_visit and len(self.visited_urls) < max_pages:
-            url = to_visit.pop(0)
-            
-            if url in self.visited_urls:
-                continue
-            
-            if not self.is_valid_url(url):
-                continue
+        # Find new links to visit (only internal ones); the frontier
+        # canonicalizes and deduplicates them
+        return [link['href'] for link in page_data['links'] if self.is_valid_url(link['href'])]
+    
+    def save_checkpoint(self, frontier):
+        """Persist the frontier, visited set and saved pages.
+
+        Pages still being fetched are written back into the queue rather
+        than marked visited, so an interrupted crawl refetches them.
+        """
+        state = frontier.to_state()
+        for url, depth in self.in_progress.items():
+            while len(state['levels']) <= depth:
+                state['levels'].append([])
+            state['levels'][depth].append(url)
+        checkpoint = {
+            'base_url': self.base_url,
+            'frontier': state,
+            'visited': sorted(self.visited_urls - set(self.in_progress)),
+            'saved_pages': self.saved_pages,
+            'sitemap_lastmod': self.sitemap_lastmod,
+            'fingerprints': self.fingerprints,
+            'saved_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        write_json_atomic(self.checkpoint_path, checkpoint)
+        if self.crawled_lastmod:
+            write_json_atomic(self.lastmod_path, self.crawled_lastmod)
+        self.pages_since_checkpoint = 0
+    
+    def load_robots(self):
+        """Fetch robots.txt; a Crawl-delay slows both crawl modes down to it.
+
+        Following robots.txt conventions, a missing file allows everything
+        and 401/403 disallows everything.
+        """
+        robots = RobotFileParser(urljoin(self.base_url, '/robots.txt'))
+        try:
+            response = self.session.get(robots.url, timeout=10)
+        except requests.RequestException as e:
+            logger.warning(f"Could not fetch {robots.url}: {str(e)}")
+            robots.allow_all = True
+            return robots
+        if response.status_code in (401, 403):
+            robots.disallow_all = True
+        elif response.status_code >= 400:
+            robots.allow_all = True
+        else:
+            robots.parse(response.text.splitlines())
+        
+        self.crawl_delay = float(robots.crawl_delay(ROBOTS_USER_AGENT) or 0)
+        if self.crawl_delay:
+            self.requests_per_second = min(self.requests_per_second, 1 / self.crawl_delay)
+            logger.info(f"robots.txt Crawl-delay: {self.crawl_delay}s")
+        return robots
+    
+    def sitemap_entries(self, sitemap_url, depth=0):
+        """Yield (loc, lastmod) for every page in a sitemap, following indexes"""
+        try:
+            response = self.session.get(sitemap_url, timeout=10, stream=True)
+            if response.status_code == 404:
+                logger.info(f"No sitemap at {sitemap_url}")
+                return
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f"Could not fetch sitemap {sitemap_url}: {str(e)}")
+            return
+        with response:
+            try:
+                for kind, loc, lastmod in parse_sitemap(response.iter_content(FEED_CHUNK)):
+                    if kind == 'url':
+                        yield loc, lastmod
+                    elif depth < MAX_SITEMAP_DEPTH:
+                        yield from self.sitemap_entries(urljoin(sitemap_url, loc), depth + 1)
+            except (ET.ParseError, zlib.error) as e:
+                logger.warning(f"Malformed sitemap {sitemap_url}: {str(e)}")
+    
+    def seed_from_sitemaps(self, frontier):
+        """Queue the sitemap's pages, skipping those unchanged since the last crawl.
+
+        A page is unchanged when its lastmod matches the one recorded when it
+        was last saved and its JSON is still on disk; it stays in the summary
+        and is marked seen so links to it do not refetch it either.
+        """
+        sitemaps = (self.robots.site_maps() if self.robots else None) or [urljoin(self.base_url, '/sitemap.xml')]
+        queued = 0
+        unchanged = []
+        for sitemap_url in sitemaps:
+            for loc, lastmod in self.sitemap_entries(sitemap_url):
+                if not self.is_valid_url(loc):
+                    continue
+                url = canonicalize_url(loc, self.base_url)
+                if lastmod:
+                    self.sitemap_lastmod[url] = lastmod
+                filename = self.page_filename(url)
+                saved_path = os.path.join(self.output_dir, f"{filename}.json")
+                if lastmod and self.crawled_lastmod.get(url) == lastmod and os.path.exists(saved_path):
+                    self.saved_pages[filename] = url
+                    frontier.seen.add(url)
+                    unchanged.append(saved_path)
+                elif frontier.push(url):
+                    queued += 1
+        
+        # Links on unchanged pages are read from their saved JSON so pages
+        # missing from the sitemap are still discovered
+        for saved_path in unchanged:
+            with open(saved_path, 'r', encoding='utf-8') as f:
+                links = json.load(f)['links']
+            for link in links:
+                if self.is_valid_url(link['href']):
+                    frontier.push(link['href'], 1)
+        logger.info(f"Sitemap: {queued} pages queued, {len(unchanged)} unchanged since last crawl")
+    
+    def start_frontier(self, start_url, resume=False):
+        """New frontier seeded from the sitemap and start_url, or the last
+        checkpoint's when resuming"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.use_robots:
+            self.robots = self.load_robots()
+        if os.path.exists(self.lastmod_path):
+            with open(self.lastmod_path, 'r', encoding='utf-8') as f:
+                self.crawled_lastmod = json.load(f)
+        if resume and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            if checkpoint.get('base_url') == self.base_url:
+                self.visited_urls = set(checkpoint['visited'])
+                self.saved_pages = checkpoint['saved_pages']
+                self.sitemap_lastmod = checkpoint.get('sitemap_lastmod', {})
+                self.fingerprints = checkpoint.get('fingerprints', {})
+                frontier = CrawlFrontier.from_state(self.base_url, checkpoint['frontier'], self.max_depth)
+                logger.info(f"Resuming crawl: {len(self.visited_urls)} pages visited, {len(frontier)} queued")
+                return frontier
+            logger.warning(f"Ignoring checkpoint for {checkpoint.get('base_url')}")
+        frontier = CrawlFrontier(self.base_url, self.max_depth)
+        if self.use_sitemaps:
+            self.seed_from_sitemaps(frontier)
+        frontier.push(start_url)
+        return frontier
+    
+    def finish_page(self, frontier, url, depth, page_data):
+        """Record a completed page, queue its links and checkpoint periodically"""
+        if page_data:
+            for href in self.record_page(url, page_data):
+                frontier.push(href, depth + 1)
+        self.in_progress.pop(url, None)
+        self.pages_since_checkpoint += 1
+        if self.pages_since_checkpoint >= self.checkpoint_every:
+            self.save_checkpoint(frontier)
+    
+    def crawl(self, start_url, max_pages=20, resume=False):
+        """Crawl the website starting from start_url (or the checkpoint, when resuming)"""
+        frontier = self.start_frontier(start_url, resume)
+        
+        while frontier and len(self.visited_urls) < max_pages:
+            url, depth = frontier.pop()
             
-            # Skip non-HTML resources
-            if any(url.lower().endswith(ext) for ext in ['.pdf', '.jpg', '.png', '.gif', '.css', '.js']):
+            if not self.should_visit(url):
                 continue
             
             self.visited_urls.add(url)
+            self.in_progress[url] = depth
             page_data = self.extract_page_content(url)
+            self.finish_page(frontier, url, depth, page_data)
             
-            if page_data:
-                # Create safe filename
-                path = urlparse(url).path
-                filename = path.strip('/').replace('/', '_') or 'homepage'
-                self.content_data[filename] = page_data
-                
-                # Find new links to visit
-                for link in page_data['links']:
-                    href = link['href']
-                    if href not in self.visited_urls and self.is_valid_url(href):
-                        # Only follow internal links
-                        if href.startswith(self.base_url) or href.startswith('/'):
-                            to_visit.append(href)
-            
-            time.sleep(1)  # Rate limiting
+            time.sleep(max(1, self.crawl_delay))  # Rate limiting
+        
+        self.crawl_complete = not frontier
+        self.save_checkpoint(frontier)
+        logger.info(f"Crawled {len(self.visited_urls)} pages")
+    
+    async def crawl_async(self, start_url, max_pages=20, resume=False):
+        """Crawl concurrently: at most max_concurrency requests per host,
+        paced by a per-host token bucket, with parsing pipelined behind
+        the downloads (a fetch slot is released before the page is parsed)."""
+        loop = asyncio.get_running_loop()
+        frontier = self.start_frontier(start_url, resume)
+        changed = asyncio.Condition()
+        in_flight = 0
+        host_slots = {}
+        host_buckets = {}
         
+        def done():
+            return len(self.visited_urls) >= max_pages or (not frontier and in_flight == 0)
+        
+        async def worker():
+            nonlocal in_flight
+            while True:
+                async with changed:
+                    # An empty frontier is only final once no page in flight can add to it
+                    await changed.wait_for(lambda: frontier or done())
+                    if done():
+                        return
+                    url, depth = frontier.pop()
+                    if not self.should_visit(url):
+                        continue
+                    self.visited_urls.add(url)
+                    self.in_progress[url] = depth
+                    in_flight += 1
+                page_data = None
+                try:
+                    host = urlparse(url).netloc
+                    if host not in host_slots:
+                        host_slots[host] = asyncio.Semaphore(self.max_concurrency)
+                        host_buckets[host] = TokenBucket(self.requests_per_second)
+                    async with host_slots[host]:
+                        await host_buckets[host].acquire()
+                        fetched = await loop.run_in_executor(None, self.fetch_page, url)
+                    
+                    page_data = await loop.run_in_executor(None, self.build_page, url, fetched)
+                except Exception as e:
+                    logger.error(f"Error scraping {url}: {str(e)}")
+                finally:
+                    async with changed:
+                        self.finish_page(frontier, url, depth, page_data)
+                        in_flight -= 1
+                        changed.notify_all()
+        
+        # Twice as many workers as fetch slots so parsing never idles the network
+        await asyncio.gather(*(worker() for _ in range(self.max_concurrency * 2)))
+        
+        self.crawl_complete = not frontier
+        self.save_checkpoint(frontier)
         logger.info(f"Crawled {len(self.visited_urls)} pages")
     
+    def crawl_concurrent(self, start_url, max_pages=20, resume=False):
+        """Run crawl_async to completion from synchronous code"""
+        asyncio.run(self.crawl_async(start_url, max_pages, resume))
+    
+    def save_changes(self):
+        """Compare this crawl's fingerprints with the last crawl's and write the change report"""
+        previous = {}
+        if os.path.exists(self.fingerprint_path):
+            with open(self.fingerprint_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        current = dict(self.fingerprints)
+        # Pages skipped as unchanged (sitemap lastmod) keep their old fingerprint
+        for filename in self.saved_pages:
+            if filename not in current and filename in previous:
+                current[filename] = previous[filename]
+        
+        report = compare_fingerprints(previous, current, self.crawl_complete)
+        if not self.crawl_complete:
+            # Pages the crawl did not reach are still on disk; keep tracking them
+            current = dict(previous, **current)
+        report['generated'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        write_json_atomic(self.fingerprint_path, current, indent=2)
+        write_json_atomic(os.path.join(self.output_dir, CHANGES_FILE), report, indent=2)
+        return report
+    
     def save_content(self):
-        """Save extracted content to JSON files"""
+        """Write the extraction summary and change report (pages are saved as they are crawled)"""
         os.makedirs(self.output_dir, exist_ok=True)
+        changes = self.save_changes()
         
-        for filename, data in self.content_data.items():
-            output_path = os.path.join(self.output_dir, f"{filename}.json")
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            logger.info(f"Saved: {output_path}")
-        
-        # Save summary
         summary = {
-            'total_pages': len(self.content_data),
-            'pages': list(self.content_data.keys()),
+            'total_pages': len(self.saved_pages),
+            'pages': list(self.saved_pages.keys()),
             'base_url': self.base_url,
-            'extraction_date': time.strftime('%Y-%m-%d %H:%M:%S')
+            'extraction_date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'changes': {
+                'added': len(changes['added']),
+                'removed': len(changes['removed']),
+                'modified': len(changes['modified']),
+                'unchanged': changes['unchanged']
+            }
         }
         
         summary_path = os.path.join(self.output_dir, '_summary.json')
         with open(summary_path, 'w', encoding='utf-8') as f:
             json.dump(summary, f, indent=2)
         
-        logger.info(f"Content extraction complete. {len(self.content_data)} pages saved.")
+        metrics = self.metrics.report()
+        metrics['settings'] = {
+            'max_concurrency': self.max_concurrency,
+            'requests_per_second': self.requests_per_second,
+            'crawl_delay': self.crawl_delay
+        }
+        write_json_atomic(os.path.join(self.output_dir, METRICS_FILE), metrics, indent=2)
+        
+        logger.info(f"Content extraction complete. {len(self.saved_pages)} pages saved.")
+        return changes
 
 if __name__ == '__main__':
     base_url = 'https://www.sentaient.com'
     output_dir = '/app/sentient_website_redesign_0308/extracted_content'
+    # --resume continues from extracted_content/_crawl_state.json; max_pages
+    # includes the pages visited by earlier runs
+    resume = '--resume' in sys.argv
     
     scraper = WebsiteScraper(base_url, output_dir)
-    scraper.crawl(base_url)
-    scraper.save_content()
+    if '--concurrent' in sys.argv:
+        scraper.crawl_concurrent(base_url, resume=resume)
+    else:
+        scraper.crawl(base_url, resume=resume)
+    changes = scraper.save_content()
     
     print("\n=== EXTRACTION SUMMARY ===")
-    print(f"Pages extracted: {len(scraper.content_data)}")
+    print(f"Pages extracted: {len(scraper.saved_pages)}")
     print(f"Output directory: {output_dir}")
     print("\nExtracted pages:")
-    for page in scraper.content_data.keys():
-        print(f"  - {page}")
\ No newline at end of file
+    for page in scraper.saved_pages.keys():
+        print(f"  - {page}")
+    
+    print("\n=== CHANGES SINCE LAST CRAWL ===")
+    print(f"Added: {len(changes['added'])}, removed: {len(changes['removed'])}, "
+          f"modified: {len(changes['modified'])}, unchanged: {changes['unchanged']}")
+    for page in changes['added']:
+        print(f"  + {page}")
+    for page in changes['removed']:
+        print(f"  - {page}")
+    for page, detail in changes['modified'].items():
+        sections = detail['sections_added'] + detail['sections_removed'] + detail['sections_modified']
+        print(f"  ~ {page}" + (f" ({', '.join(sections)})" if sections else ''))
+    
+    metrics = scraper.metrics.report(slowest=5)
+    print("\n=== CRAWL METRICS ===")
+    print(f"Requests: {metrics['requests']} in {metrics['elapsed_s']}s, {metrics['bytes_total']:,} bytes")
+    print(f"Status codes: {metrics['status_codes']}")
+    print(f"TTFB p50/p90: {metrics['percentiles']['ttfb_ms'].get('p50')}/{metrics['percentiles']['ttfb_ms'].get('p90')} ms")
+    print("Slowest pages:")
+    for record in metrics['slowest']:
+        print(f"  {record['total_ms']:8.1f} ms  {record['url']}")
@@ -1,74 +1,155 @@
-import shutil
+import json
+import os
+import sys
 from pathlib import Path
-import subprocess
+
+import parallel_archive
+from build_cache import BuildCache, hash_file, tool_version
+from delta_package import record_release
+from integrity_manifest import INTEGRITY_MANIFEST
+from parallel_archive import CODECS, archive_epoch, available_codecs, benchmark_codecs, build_archives, codec_level
 
 base_dir = Path('/app/sentient_website_redesign_0308')
 prod_dir = base_dir / 'production_package'
+archive_name = 'sentient_website_production_v1.0'
 
-print("="*80)
-print("CREATING COMPRESSED PRODUCTION PACKAGE")
-print("="*80)
-print()
+ARCHIVER_VERSION = tool_version(__file__, parallel_archive)
 
-# Verify production package exists
-if not prod_dir.exists():
-    print("❌ Production package directory not found!")
-    exit(1)
+def package_inputs(prod_dir):
+    """List every file that ends up in the archives."""
+    inputs = []
+    for root, dirs, files in os.walk(prod_dir):
+        for file in files:
+            inputs.append(Path(root) / file)
+    return inputs
 
-print(f"✅ Production package found: {prod_dir}")
+def create_compressed_package(codec='gzip', level=None):
+    """Build the tarball (with codec at level) and the zip, unless unchanged."""
+    level = codec_level(codec, level)
+    print("="*80)
+    print("CREATING COMPRESSED PRODUCTION PACKAGE")
+    print("="*80)
+    print()
 
-# Create tar.gz archive
-archive_name = 'sentient_website_production_v1.0'
-archive_path = base_dir / f'{archive_name}.tar.gz'
-
-print(f"\n📦 Creating compressed archive: {archive_name}.tar.gz")
-
-try:
-    # Use tar command for compression
-    result = subprocess.run(
-        ['tar', '-czf', str(archive_path), '-C', str(base_dir), 'production_package'],
-        capture_output=True,
-        text=True,
-        check=True
-    )
-    
-    if archive_path.exists():
+    # Verify production package exists
+    if not prod_dir.exists():
+        print("❌ Production package directory not found!")
+        exit(1)
+
+    print(f"✅ Production package found: {prod_dir}")
+
+    archive_path = base_dir / f"{archive_name}{CODECS[codec]['extension']}"
+    zip_path = base_dir / f'{archive_name}.zip'
+
+    cache = BuildCache(base_dir)
+    inputs = package_inputs(prod_dir)
+    # Archives embed this timestamp, so a different SOURCE_DATE_EPOCH is a rebuild
+    version = f'{ARCHIVER_VERSION}:{archive_epoch()}:{codec}-{level}'
+    tar_meta = cache.lookup(archive_path, inputs, version)
+    zip_meta = cache.lookup(zip_path, inputs, version)
+    if tar_meta is not None and zip_meta is not None:
+        print("\n⏭️  Production package unchanged - archives are up to date")
+        print(f"   {archive_path.name} ({archive_path.stat().st_size:,} bytes, sha256 {tar_meta.get('sha256', '?')[:16]})")
+        print(f"   {archive_name}.zip ({zip_path.stat().st_size:,} bytes, sha256 {zip_meta.get('sha256', '?')[:16]})")
+        cache.save()
+        return
+
+    previous = {path: (cache.previous_meta(path) or {}).get('sha256') for path in (archive_path, zip_path)}
+
+    # Both archives are written in one pass over the package
+    print(f"\n📦 Creating compressed archives: {archive_path.name} ({codec} level {level}) and {archive_name}.zip")
+
+    try:
+        stats = build_archives(prod_dir, archive_path, zip_path, level, codec=codec)
+        print(f"   Read {stats['files']} files ({stats['bytes']:,} bytes) once, "
+              f"compressed on {stats['workers']} threads in {stats['seconds']:.2f}s")
+
+        digests = {path: hash_file(path) for path in (archive_path, zip_path)}
+        cache.store(archive_path, inputs, version, sha256=digests[archive_path])
         size = archive_path.stat().st_size
         print(f"✅ Archive created successfully!")
         print(f"   Location: {archive_path.relative_to(base_dir.parent)}")
         print(f"   Size: {size:,} bytes ({size/1024:.1f} KB)")
-        
-        # Also create a zip archive for Windows users
-        zip_path = base_dir / f'{archive_name}.zip'
-        print(f"\n📦 Creating ZIP archive for Windows compatibility...")
-        
-        shutil.make_archive(
-            str(base_dir / archive_name),
-            'zip',
-            base_dir,
-            'production_package'
-        )
-        
-        if zip_path.exists():
-            zip_size = zip_path.stat().st_size
-            print(f"✅ ZIP archive created successfully!")
-            print(f"   Location: {zip_path.relative_to(base_dir.parent)}")
-            print(f"   Size: {zip_size:,} bytes ({zip_size/1024:.1f} KB)")
-        
+
+        # The zip is for Windows users
+        cache.store(zip_path, inputs, version, sha256=digests[zip_path])
+        zip_size = zip_path.stat().st_size
+        print(f"✅ ZIP archive created successfully!")
+        print(f"   Location: {zip_path.relative_to(base_dir.parent)}")
+        print(f"   Size: {zip_size:,} bytes ({zip_size/1024:.1f} KB)")
+
+        cache.save()
+
+        print(f"\n🔏 Reproducible build (timestamps fixed at {archive_epoch()})")
+        for path, digest in digests.items():
+            same = ' - identical to the previous build, no re-upload needed' if previous[path] == digest else ''
+            print(f"   {path.name}: sha256 {digest}{same}")
+
+        # Edge nodes already running the previous release only need the delta
+        if (prod_dir / INTEGRITY_MANIFEST).exists():
+            delta_path, delta = record_release(prod_dir)
+            if delta_path:
+                delta_size = delta_path.stat().st_size
+                print(f"\n🔺 Delta from previous release: {delta_path.relative_to(base_dir)}")
+                print(f"   {len(delta['added'])} added, {len(delta['changed'])} changed, "
+                      f"{len(delta['deleted'])} deleted - {delta_size:,} bytes ({delta_size/size:.1%} of the full archive)")
+                print(f"   Apply with: python delta_package.py {delta_path.name} <deployed dir>")
+
         print("\n" + "="*80)
         print("PACKAGE ARCHIVES READY FOR DISTRIBUTION")
         print("="*80)
-        print(f"\n✅ TAR.GZ (Linux/Mac): {archive_name}.tar.gz")
+        print(f"\n✅ {codec.upper()} tarball (Linux/Mac): {archive_path.name}")
         print(f"✅ ZIP (Windows): {archive_name}.zip")
         print("\nBoth archives contain the complete production-ready website.")
-        
+
+    except Exception as e:
+        print(f"❌ Error creating archives: {e}")
+
+    print("\n" + "="*80)
+
+def benchmark_archives():
+    """Build the package with every codec/level and report size and speed."""
+    print("="*80)
+    print("ARCHIVE CODEC BENCHMARK")
+    print("="*80)
+    if not prod_dir.exists():
+        print("❌ Production package directory not found!")
+        exit(1)
+
+    missing = [codec for codec in CODECS if codec not in available_codecs()]
+    if missing:
+        print(f"⚠️  Not available in this Python, skipped: {', '.join(missing)}")
+
+    results = benchmark_codecs(prod_dir)
+    print(f"\n{'Codec':8} {'Level':>5} {'Size':>12} {'Ratio':>7} {'Compress':>10} {'Decompress':>11}")
+    for row in results:
+        print(f"{row['codec']:8} {row['level']:>5} {row['size']:>12,} {row['ratio']:>7.1%} "
+              f"{row['compress_seconds']*1000:>8.1f}ms {row['decompress_seconds']*1000:>9.1f}ms")
+
+    smallest = min(results, key=lambda row: row['size'])
+    fastest = min(results, key=lambda row: row['decompress_seconds'])
+    print(f"\n🏆 Smallest: {smallest['codec']} -{smallest['level']} ({smallest['size']:,} bytes)")
+    print(f"⚡ Fastest to unpack: {fastest['codec']} -{fastest['level']} ({fastest['decompress_seconds']*1000:.1f} ms)")
+
+    report_path = base_dir / 'ARCHIVE_BENCHMARK.json'
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({'package': str(prod_dir.relative_to(base_dir)), 'results': results}, f, indent=2)
+    print(f"\n✅ Results saved to {report_path.name}")
+
+def option(name, default=None):
+    """Value following --name on the command line."""
+    if name in sys.argv[:-1]:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+if __name__ == '__main__':
+    # --benchmark compares codecs; otherwise --codec gzip|bzip2|xz|zstd and --level N
+    if '--benchmark' in sys.argv:
+        benchmark_archives()
     else:
-        print("❌ Archive creation failed!")
-        
-except subprocess.CalledProcessError as e:
-    print(f"❌ Error creating archive: {e}")
-    print(f"STDERR: {e.stderr}")
-except Exception as e:
-    print(f"❌ Unexpected error: {e}")
-
-print("\n" + "="*80)
\ No newline at end of file
+        level = option('--level')
+        try:
+            create_compressed_package(option('--codec', 'gzip'), int(level) if level is not None else None)
+        except ValueError as e:
+            print(f"❌ {e}")
+            exit(1)
@@ -1,16 +1,85 @@
-import shutil
 import os
 from pathlib import Path
 import json
 
+from build_cache import BuildCache, tool_version
+import critical_css
+from critical_css import inline_critical_css, parse_stylesheet
+import css_minifier
+from file_sync import place_file, prune_empty_dirs, up_to_date, write_atomic
+import fingerprint_assets
+from fingerprint_assets import MANIFEST_NAME, build_asset_manifest, fingerprint_content, rewrite_asset_refs
+import html_document
+import html_minifier
+from html_document import load_document
+from integrity_manifest import INTEGRITY_MANIFEST, build_manifest, scan_tree
+import js_minifier
+from link_graph import check_links, print_link_report
+from minify_assets import REPORT_PATH, save_report
+from precompress import COMPRESSIBLE_EXTENSIONS, brotli, precompress_files, sidecar_paths, written_sidecars
+import purge_css
+
+PACKAGER_VERSION = tool_version(__file__)
+
+# The purge, critical CSS and HTML minify stages are cached on the content
+# hashes of their inputs; editing any module they run through redoes them.
+STAGE_VERSION = tool_version(__file__, critical_css, css_minifier, fingerprint_assets,
+                             html_document, html_minifier, js_minifier, purge_css)
+
+# file_sync.LINK_MODES: 'auto' reflinks where the filesystem allows, else copies
+LINK_MODE = 'auto'
+
+def copy_file(src, dst, cache, produced, sync_stats):
+    """Sync src to dst unless the cache or an rsync-style check shows dst is current.
+
+    Returns how dst was written ('copy', 'reflink', 'hardlink') or False.
+    """
+    produced.add(dst)
+    if cache.lookup(dst, [src], PACKAGER_VERSION) is None:
+        if not up_to_date(src, dst, cache):
+            method = place_file(src, dst, LINK_MODE)
+            cache.store(dst, [src], PACKAGER_VERSION)
+            sync_stats[method] = sync_stats.get(method, 0) + 1
+            return method
+        cache.store(dst, [src], PACKAGER_VERSION)
+    sync_stats['unchanged'] = sync_stats.get('unchanged', 0) + 1
+    return False
+
+def write_text(path, content, produced):
+    """Write a generated file atomically, leaving it untouched if the content is the same."""
+    produced.add(path)
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    write_atomic(path, content.encode('utf-8'))
+    return True
+
+def remove_stale_files(prod_dir, produced, cache, keep_dirs=()):
+    """Delete files (and then emptied directories) left over from earlier
+    builds that were not produced now. Returns the number of files removed."""
+    removed = 0
+    for root, dirs, files in os.walk(prod_dir):
+        for file in files:
+            path = Path(root) / file
+            if path not in produced:
+                path.unlink()
+                cache.forget(path)
+                removed += 1
+    prune_empty_dirs(prod_dir, keep_dirs)
+    return removed
+
 def create_production_package():
-    """Create organized production deployment package."""
+    """Create organized production deployment package.
+
+    Files are copied through the shared build cache, so a rebuild only
+    rewrites outputs whose inputs changed.
+    """
     base_dir = Path('/app/sentient_website_redesign_0308')
     prod_dir = base_dir / 'production_package'
-    
-    # Remove existing production package if present
-    if prod_dir.exists():
-        shutil.rmtree(prod_dir)
+    cache = BuildCache(base_dir)
+    produced = set()
+    sync_stats = {}
     
     prod_dir.mkdir(exist_ok=True)
     
@@ -44,37 +113,150 @@ def create_production_package():
         'pages/alternate/pricing_alt.html'
     ]
     
-    print("\n📄 Copying HTML files...")
+    css_files = ['main.css', 'main.min.css']
+    js_files = [
+        'main.js', 'main.min.js',
+        'tools.js', 'tools.min.js',
+        'consumer-tools.js', 'consumer-tools.min.js'
+    ]
+    
+    # Content-hashed names for the minified assets, so they can be served
+    # with immutable year-long cache headers
+    asset_manifest = build_asset_manifest(base_dir, [
+        f'styles/{name}' for name in css_files if '.min.' not in name
+    ] + [
+        f'scripts/{name}' for name in js_files if '.min.' not in name
+    ], cache)
+    
+    # Purge rules no page or script can use from the shipped stylesheet
+    print("\n🧹 Purging unused CSS...")
+    page_sources = [base_dir / html_file for html_file in html_files if (base_dir / html_file).exists()]
+    script_sources = [base_dir / 'scripts' / js_file for js_file in js_files
+                      if '.min.' not in js_file and (base_dir / 'scripts' / js_file).exists()]
+    
+    stylesheet = asset_manifest.get('styles/main.css')
+    stylesheet_nodes = None
+    css_purge = None
+    if stylesheet:
+        purge_inputs = page_sources + script_sources + [base_dir / 'styles' / 'main.css']
+        purged = cache.recall('purge_css', purge_inputs, STAGE_VERSION)
+        if purged is None:
+            selector_index = purge_css.SelectorIndex()
+            for path in page_sources:
+                selector_index.add_document(load_document(path))
+            for path in script_sources:
+                with open(path, 'r', encoding='utf-8') as f:
+                    selector_index.add_script(f.read())
+            with open(base_dir / 'styles' / 'main.css', 'r', encoding='utf-8') as f:
+                purged_css, purge_groups = purge_css.purge_css(f.read(), selector_index)
+            cache.remember('purge_css', purge_inputs, STAGE_VERSION, {'css': purged_css, 'groups': purge_groups})
+        else:
+            purged_css, purge_groups = purged['css'], purged['groups']
+            print("   ⏭️  Sources unchanged, reusing the last purge")
+        stylesheet['source'] = 'styles/main.css'
+        stylesheet['content'] = purged_css
+        stylesheet['file'] = fingerprint_content('styles/main.min.css', purged_css)
+        
+        css_purge = {
+            'rules_removed': sum(group['rules_removed'] for group in purge_groups.values()),
+            'bytes_before': sum(group['bytes_before'] for group in purge_groups.values()),
+            'bytes_after': sum(group['bytes_after'] for group in purge_groups.values()),
+            'output_bytes': len(purged_css.encode('utf-8')),
+            'groups': purge_groups
+        }
+        for heading, group in purge_groups.items():
+            if group['rules_removed']:
+                print(f"   {heading}: -{group['rules_removed']} rules, -{group['bytes_removed']:,} bytes")
+        print(f"   ✅ {css_purge['rules_removed']} rules removed, "
+              f"{css_purge['bytes_before']:,} -> {css_purge['bytes_after']:,} bytes")
+    
+    # Critical CSS is inlined per page; the full stylesheet loads async.
+    # A page is only rebuilt when its source, or an asset it references
+    # (the fingerprinted names change with the content), has changed.
+    page_version = STAGE_VERSION + json.dumps({
+        asset: entry['file'] for asset, entry in sorted(asset_manifest.items())
+    })
+    
+    print("\n📄 Copying HTML files (asset references fingerprinted, critical CSS inlined, minified)...")
+    html_minification = {}
     for html_file in html_files:
         src = base_dir / html_file
         dst = prod_dir / html_file
         if src.exists():
-            shutil.copy2(src, dst)
-            print(f"   ✅ {html_file}")
+            page = cache.lookup(dst, [src], page_version)
+            copied = False
+            if page is None:
+                with open(src, 'r', encoding='utf-8') as f:
+                    html, rewritten = rewrite_asset_refs(f.read(), html_file, asset_manifest)
+                critical_bytes = 0
+                if stylesheet:
+                    if stylesheet_nodes is None:
+                        stylesheet_nodes = parse_stylesheet(stylesheet['content'])
+                    html, critical_bytes = inline_critical_css(html, html_file, stylesheet['file'], stylesheet_nodes)
+                original_size = len(html.encode('utf-8'))
+                html = html_minifier.minify(html)
+                page = {
+                    'rewritten': rewritten,
+                    'critical_bytes': critical_bytes,
+                    'original_size': original_size,
+                    'minified_size': len(html.encode('utf-8'))
+                }
+                copied = write_text(dst, html, produced)
+                cache.store(dst, [src], page_version, **page)
+            produced.add(dst)
+            original_size = page['original_size']
+            minified_size = page['minified_size']
+            html_minification[html_file] = {
+                'original_size': original_size,
+                'minified_size': minified_size,
+                'reduction_percentage': (original_size - minified_size) / original_size * 100 if original_size else 0
+            }
+            print(f"   {'✅' if copied else '⏭️ '} {html_file} ({page['rewritten']} asset refs, "
+                  f"{page['critical_bytes']:,} bytes critical CSS, "
+                  f"{original_size:,} -> {minified_size:,} bytes minified)")
+    
+    html_original = sum(page['original_size'] for page in html_minification.values())
+    html_minified = sum(page['minified_size'] for page in html_minification.values())
+    save_report(base_dir, html_pages={
+        'total_original_bytes': html_original,
+        'total_minified_bytes': html_minified,
+        'total_reduction_percentage': (html_original - html_minified) / html_original * 100 if html_original else 0,
+        'pages': html_minification
+    })
+    print(f"   ✅ HTML minified: {html_original:,} -> {html_minified:,} bytes, saved to {REPORT_PATH}")
     
     # Copy minified CSS
     print("\n🎨 Copying CSS files...")
-    css_files = ['main.css', 'main.min.css']
     for css_file in css_files:
         src = base_dir / 'styles' / css_file
         dst = prod_dir / 'styles' / css_file
         if src.exists():
-            shutil.copy2(src, dst)
-            print(f"   ✅ styles/{css_file}")
+            copied = copy_file(src, dst, cache, produced, sync_stats)
+            print(f"   {'✅' if copied else '⏭️ '} styles/{css_file}")
     
     # Copy minified JavaScript
     print("\n⚙️  Copying JavaScript files...")
-    js_files = [
-        'main.js', 'main.min.js',
-        'tools.js', 'tools.min.js',
-        'consumer-tools.js', 'consumer-tools.min.js'
-    ]
     for js_file in js_files:
         src = base_dir / 'scripts' / js_file
         dst = prod_dir / 'scripts' / js_file
         if src.exists():
-            shutil.copy2(src, dst)
-            print(f"   ✅ scripts/{js_file}")
+            copied = copy_file(src, dst, cache, produced, sync_stats)
+            print(f"   {'✅' if copied else '⏭️ '} scripts/{js_file}")
+    
+    # Fingerprinted copies of the minified assets
+    print("\n🔖 Fingerprinting assets...")
+    for asset, entry in asset_manifest.items():
+        if 'content' in entry:
+            copied = write_text(prod_dir / entry['file'], entry['content'], produced)
+        else:
+            copied = copy_file(base_dir / entry['source'], prod_dir / entry['file'], cache, produced, sync_stats)
+        print(f"   {'✅' if copied else '⏭️ '} {entry['file']}")
+    
+    asset_manifest_path = prod_dir / MANIFEST_NAME
+    write_text(asset_manifest_path, json.dumps({
+        asset: entry['file'] for asset, entry in sorted(asset_manifest.items())
+    }, indent=2), produced)
+    print(f"   ✅ {MANIFEST_NAME}")
     
     # Copy documentation
     print("\n📚 Copying documentation...")
@@ -93,8 +275,8 @@ def create_production_package():
     readme_src = base_dir / 'README.md'
     readme_dst = prod_dir / 'README.md'
     if readme_src.exists():
-        shutil.copy2(readme_src, readme_dst)
-        print(f"   ✅ README.md")
+        copied = copy_file(readme_src, readme_dst, cache, produced, sync_stats)
+        print(f"   {'✅' if copied else '⏭️ '} README.md")
     
     # Copy docs
     for doc_file in doc_files:
@@ -102,8 +284,8 @@ def create_production_package():
             src = base_dir / doc_file
             dst = prod_dir / doc_file
             if src.exists():
-                shutil.copy2(src, dst)
-                print(f"   ✅ {doc_file}")
+                copied = copy_file(src, dst, cache, produced, sync_stats)
+                print(f"   {'✅' if copied else '⏭️ '} {doc_file}")
     
     # Create VERSION.txt
     print("\n📋 Creating version information...")
@@ -130,30 +312,62 @@ For usage information, see docs/USER_MANUAL.md
 """
     
     version_path = prod_dir / 'VERSION.txt'
-    with open(version_path, 'w', encoding='utf-8') as f:
-        f.write(version_content)
+    write_text(version_path, version_content, produced)
     print("   ✅ VERSION.txt")
     
+    # Precompressed sidecars for web servers (gzip_static / brotli_static)
+    print("\n🗜️  Precompressing HTML/CSS/JS/JSON...")
+    compressible = sorted(path for path in produced if path.suffix in COMPRESSIBLE_EXTENSIONS)
+    precompressed = precompress_files(compressible, cache)
+    for path in compressible:
+        produced.update(written_sidecars(path, precompressed[path]))
+    if brotli is None:
+        print("   ⚠️  brotli module not installed - writing .gz sidecars only")
+    print(f"   ✅ {len(precompressed)} files precompressed")
+    
+    # Generated files from an earlier run are rewritten below; anything
+    # else that was not produced above is stale.
+    package_info_path = prod_dir / 'PACKAGE_INFO.json'
+    package_info_outputs = {package_info_path, *sidecar_paths(package_info_path)}
+    integrity_path = prod_dir / INTEGRITY_MANIFEST
+    late_outputs = {prod_dir / 'MANIFEST.txt', prod_dir / 'DEPLOYMENT_CHECKLIST.md', integrity_path} | package_info_outputs
+    stale = remove_stale_files(prod_dir, produced | late_outputs, cache,
+                               [prod_dir / directory for directory in directories])
+    print(f"\n🔄 Synced copied files: " + ', '.join(
+        f"{count} {method}" for method, count in sorted(sync_stats.items())
+    ) + f", {stale} stale removed")
+    
+    # Every page must resolve all of its subresources inside the package
+    print("\n🔗 Validating link graph...")
+    link_report = check_links(prod_dir, html_files)
+    print_link_report(link_report)
+    if link_report['errors']:
+        cache.save()
+        print("\n❌ Production package has dead or redundant network requests - aborting")
+        exit(1)
+    
+    # One scandir walk feeds MANIFEST.txt, the statistics and the integrity manifest
+    dirs, files = scan_tree(prod_dir, {str(path.relative_to(prod_dir)) for path in late_outputs})
+    
     # Create MANIFEST.txt
     print("\n📋 Creating manifest...")
     manifest_lines = ["sentAIent Website Production Package - File Manifest\n"]
     manifest_lines.append("="*60 + "\n\n")
     
-    for root, dirs, files in os.walk(prod_dir):
-        level = root.replace(str(prod_dir), '').count(os.sep)
-        indent = ' ' * 2 * level
-        rel_root = Path(root).relative_to(prod_dir)
-        if str(rel_root) != '.':
-            manifest_lines.append(f'{indent}{rel_root}/\n')
+    files_by_dir = {}
+    for rel, (size, _) in files.items():
+        directory, _, name = rel.rpartition('/')
+        files_by_dir.setdefault(directory, []).append((name, size))
+    for directory in [''] + dirs:
+        level = directory.count('/') + 1 if directory else 0
+        if directory:
+            manifest_lines.append(f"{' ' * 2 * level}{directory}/\n")
         subindent = ' ' * 2 * (level + 1)
-        for file in sorted(files):
-            file_path = Path(root) / file
-            size = os.path.getsize(file_path)
-            manifest_lines.append(f'{subindent}{file} ({size:,} bytes)\n')
+        for name, size in files_by_dir.get(directory, []):
+            manifest_lines.append(f'{subindent}{name} ({size:,} bytes)\n')
     
     manifest_path = prod_dir / 'MANIFEST.txt'
-    with open(manifest_path, 'w', encoding='utf-8') as f:
-        f.writelines(manifest_lines)
+    write_text(manifest_path, ''.join(manifest_lines), produced)
     print("   ✅ MANIFEST.txt")
     
     # Create deployment checklist
@@ -165,16 +379,17 @@ For usage information, see docs/USER_MANUAL.md
 - [ ] Minified CSS and JS files present
 - [ ] All documentation included
 - [ ] VERSION.txt and MANIFEST.txt present
+- [ ] `python integrity_manifest.py <deployed dir>` passes against integrity-manifest.json
 
 ## Configuration
-- [ ] Update HTML files to reference .min.css and .min.js files
+- [ ] Confirm HTML files reference the fingerprinted assets in asset-manifest.json
 - [ ] Verify all internal links use correct paths
 - [ ] Check form action URLs are configured
 - [ ] Add analytics tracking code (if required)
 
 ## Server Setup
-- [ ] Enable gzip/brotli compression
-- [ ] Configure cache headers (CSS/JS: 1 year, HTML: 1 hour)
+- [ ] Enable gzip/brotli compression (serve the precompressed .gz/.br sidecars, e.g. nginx gzip_static on / brotli_static on)
+- [ ] Configure cache headers (fingerprinted *.<hash>.min.css/js: 1 year, immutable; HTML: 1 hour / no-cache)
 - [ ] Install SSL certificate
 - [ ] Test HTTPS redirect
 
@@ -213,8 +428,7 @@ For usage information, see docs/USER_MANUAL.md
 """
     
     checklist_path = prod_dir / 'DEPLOYMENT_CHECKLIST.md'
-    with open(checklist_path, 'w', encoding='utf-8') as f:
-        f.write(checklist_content)
+    write_text(checklist_path, checklist_content, produced)
     print("   ✅ DEPLOYMENT_CHECKLIST.md")
     
     # Calculate package statistics
@@ -222,14 +436,11 @@ For usage information, see docs/USER_MANUAL.md
     print("PACKAGE STATISTICS")
     print("="*80)
     
-    total_size = 0
-    file_count = 0
-    
-    for root, dirs, files in os.walk(prod_dir):
-        for file in files:
-            file_path = Path(root) / file
-            total_size += os.path.getsize(file_path)
-            file_count += 1
+    for path in (manifest_path, checklist_path):
+        stat = path.stat()
+        files[str(path.relative_to(prod_dir))] = (stat.st_size, stat.st_mtime_ns)
+    file_count = len(files)
+    total_size = sum(size for size, _ in files.values())
     
     print(f"\nTotal Files: {file_count}")
     print(f"Total Size: {total_size:,} bytes ({total_size/1024:.1f} KB)")
@@ -247,6 +458,7 @@ For usage information, see docs/USER_MANUAL.md
             'html_pages': len(html_files),
             'css_files': len(css_files),
             'js_files': len(js_files),
+            'fingerprinted_assets': len(asset_manifest),
             'documentation_files': len(doc_files) + 3  # +3 for README, VERSION, MANIFEST
         },
         'quality_checks': {
@@ -254,15 +466,36 @@ For usage information, see docs/USER_MANUAL.md
             'seo_optimized': True,
             'responsive_design': True,
             'assets_minified': True,
+            'html_minified': True,
             'performance_optimized': True
+        },
+        'css_purge': css_purge,
+        'precompressed': {
+            'gzip_total_bytes': sum(info['gzip'] for info in precompressed.values()),
+            'brotli_total_bytes': sum(info['brotli'] or 0 for info in precompressed.values()) if brotli else None,
+            'files': {
+                str(path.relative_to(prod_dir)): info
+                for path, info in sorted(precompressed.items())
+            }
         }
     }
     
-    package_info_path = prod_dir / 'PACKAGE_INFO.json'
-    with open(package_info_path, 'w', encoding='utf-8') as f:
-        json.dump(package_info, f, indent=2)
+    write_text(package_info_path, json.dumps(package_info, indent=2), produced)
+    package_info_sidecars = precompress_files([package_info_path], cache)
+    produced.update(written_sidecars(package_info_path, package_info_sidecars[package_info_path]))
     print(f"\n✅ Created: PACKAGE_INFO.json")
     
+    # SHA-256 of every shipped file, checked on the server by integrity_manifest.py
+    for path in package_info_outputs:
+        if path.exists():
+            stat = path.stat()
+            files[str(path.relative_to(prod_dir))] = (stat.st_size, stat.st_mtime_ns)
+    integrity = build_manifest(prod_dir, dict(sorted(files.items())))
+    write_text(integrity_path, json.dumps(integrity, indent=2), produced)
+    print(f"✅ Created: {INTEGRITY_MANIFEST} ({integrity['total_files']} files hashed)")
+    
+    cache.save()
+    
     print("\n" + "="*80)
     print("✅ PRODUCTION PACKAGE CREATED SUCCESSFULLY")
     print("="*80)
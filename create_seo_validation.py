@@ -1,103 +1,56 @@
 import json
 from pathlib import Path
 import re
-from html.parser import HTMLParser
 
-class SEOParser(HTMLParser):
-    def __init__(self):
-        super().__init__()
-        self.title = ""
-        self.meta_description = ""
-        self.meta_tags = {}
-        self.headings = []
-        self.images = []
-        self.links = []
-        self.in_title = False
-        
-    def handle_starttag(self, tag, attrs):
-        attrs_dict = dict(attrs)
-        
-        if tag == 'title':
-            self.in_title = True
-        elif tag == 'meta':
-            if 'name' in attrs_dict:
-                self.meta_tags[attrs_dict['name']] = attrs_dict.get('content', '')
-                if attrs_dict['name'] == 'description':
-                    self.meta_description = attrs_dict.get('content', '')
-        elif tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-            self.headings.append({'level': tag, 'text': ''})
-        elif tag == 'img':
-            self.images.append({
-                'src': attrs_dict.get('src', ''),
-                'alt': attrs_dict.get('alt', ''),
-                'has_alt': 'alt' in attrs_dict
-            })
-        elif tag == 'a':
-            href = attrs_dict.get('href', '')
-            self.links.append({
-                'href': href,
-                'text': '',
-                'is_internal': href.startswith('/') or href.startswith('#') or 'sentaient' in href,
-                'is_external': href.startswith('http') and 'sentaient' not in href
-            })
-    
-    def handle_data(self, data):
-        if self.in_title:
-            self.title += data
-        if self.headings and 'text' in self.headings[-1]:
-            self.headings[-1]['text'] += data.strip()
-    
-    def handle_endtag(self, tag):
-        if tag == 'title':
-            self.in_title = False
+from html_document import load_document
 
 def analyze_seo(filepath):
     """Analyze SEO elements of HTML file."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    parser = SEOParser()
-    parser.feed(content)
+    document = load_document(filepath)
+    title = document.title
+    meta_description = document.meta.get('description', '')
+    headings = [{'level': h.tag, 'text': h.text} for h in document.headings]
+    hrefs = [link.attrs.get('href', '') for link in document.links]
     
     analysis = {
         'file': str(filepath.name),
         'title': {
-            'text': parser.title.strip(),
-            'length': len(parser.title.strip()),
-            'optimal': 50 <= len(parser.title.strip()) <= 60,
-            'status': 'pass' if 30 <= len(parser.title.strip()) <= 70 else 'warning'
+            'text': title,
+            'length': len(title),
+            'optimal': 50 <= len(title) <= 60,
+            'status': 'pass' if 30 <= len(title) <= 70 else 'warning'
         },
         'meta_description': {
-            'text': parser.meta_description,
-            'length': len(parser.meta_description),
-            'optimal': 150 <= len(parser.meta_description) <= 160,
-            'status': 'pass' if 120 <= len(parser.meta_description) <= 170 else 'warning'
+            'text': meta_description,
+            'length': len(meta_description),
+            'optimal': 150 <= len(meta_description) <= 160,
+            'status': 'pass' if 120 <= len(meta_description) <= 170 else 'warning'
         },
-        'meta_viewport': 'viewport' in parser.meta_tags,
+        'meta_viewport': 'viewport' in document.meta,
         'heading_structure': {
-            'h1_count': len([h for h in parser.headings if h['level'] == 'h1']),
-            'h1_text': [h['text'] for h in parser.headings if h['level'] == 'h1'],
-            'hierarchy': [h['level'] for h in parser.headings],
-            'total_headings': len(parser.headings)
+            'h1_count': len([h for h in headings if h['level'] == 'h1']),
+            'h1_text': [h['text'] for h in headings if h['level'] == 'h1'],
+            'hierarchy': [h['level'] for h in headings],
+            'total_headings': len(headings)
         },
         'images': {
-            'total': len(parser.images),
-            'with_alt': len([img for img in parser.images if img['has_alt']]),
-            'without_alt': len([img for img in parser.images if not img['has_alt']])
+            'total': len(document.images),
+            'with_alt': len([img for img in document.images if 'alt' in img.attrs]),
+            'without_alt': len([img for img in document.images if 'alt' not in img.attrs])
         },
         'links': {
-            'total': len(parser.links),
-            'internal': len([l for l in parser.links if l['is_internal']]),
-            'external': len([l for l in parser.links if l['is_external']])
+            'total': len(hrefs),
+            'internal': len([h for h in hrefs if h.startswith('/') or h.startswith('#') or 'sentaient' in h]),
+            'external': len([h for h in hrefs if h.startswith('http') and 'sentaient' not in h])
         },
         'semantic_html': {
-            'has_lang': 'lang="en"' in content or "lang='en'" in content,
-            'has_header': '<header' in content,
-            'has_nav': '<nav' in content,
-            'has_main': '<main' in content,
-            'has_footer': '<footer' in content,
-            'has_article': '<article' in content,
-            'has_section': '<section' in content
+            'has_lang': document.lang == 'en',
+            'has_header': document.has_tag('header'),
+            'has_nav': document.has_tag('nav'),
+            'has_main': document.has_tag('main'),
+            'has_footer': document.has_tag('footer'),
+            'has_article': document.has_tag('article'),
+            'has_section': document.has_tag('section')
         }
     }
     
@@ -1,6 +1,8 @@
 import json
 import os
 
+from content_extraction import changed_pages
+
 output_dir = '/app/sentient_website_redesign_0308/extracted_content'
 
 content_structure = {
@@ -232,12 +234,34 @@ content_structure = {
     }
 }
 
-# Save the structured content
-with open(os.path.join(output_dir, 'structured_content.json'), 'w', encoding='utf-8') as f:
-    json.dump(content_structure, f, indent=2, ensure_ascii=False)
+# Save the structured content, leaving the file untouched when nothing changed
+# so later stages keyed on its mtime skip it too
+output_path = os.path.join(output_dir, 'structured_content.json')
+serialized = json.dumps(content_structure, indent=2, ensure_ascii=False)
+existing = None
+if os.path.exists(output_path):
+    with open(output_path, 'r', encoding='utf-8') as f:
+        existing = f.read()
+
+if existing == serialized:
+    print("✓ Structured content unchanged")
+else:
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(serialized)
+    print("✓ Structured content created successfully")
+print(f"  Output: {output_path}")
 
-print("✓ Structured content created successfully")
-print(f"  Output: {os.path.join(output_dir, 'structured_content.json')}")
+# The structure above is curated by hand; point at the crawled pages that
+# changed since the last crawl so only their sections need reviewing
+changed = changed_pages(output_dir)
+if changed is None:
+    print("\n  No crawl change report found - review all extracted pages")
+elif changed:
+    print(f"\n  Pages changed in the last crawl ({len(changed)}):")
+    for page in sorted(changed):
+        print(f"    - {page}")
+else:
+    print("\n  No extracted pages changed in the last crawl")
 print(f"\nContent includes:")
 print(f"  - Company overview and philosophy")
 print(f"  - 6 service categories with detailed descriptions")
@@ -0,0 +1,379 @@
+import posixpath
+import re
+
+import css_minifier
+from css_minifier import AtRule, Rule
+from html_document import parse_document
+
+# Content blocks (after the site header) treated as above the fold
+FOLD_SECTIONS = 1
+
+# State that cannot apply before the user interacts with the page
+INTERACTION_PSEUDOS = {'hover', 'focus', 'active', 'focus-within', 'focus-visible', 'target'}
+
+SELECTOR_TOKEN_RE = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<combinator>[>+~])
+  | (?P<universal>\*)
+  | (?P<tag>[a-zA-Z][\w-]*)
+  | (?P<id>\#[\w-]+)
+  | (?P<cls>\.[\w-]+)
+  | (?P<attr>\[\s*[\w-]+\s*(?:[~|^$*]?=\s*(?:"[^"]*"|'[^']*'|[^\]\s]+)\s*)?\])
+  | (?P<pseudo_element>::[\w-]+(?:\([^)]*\))?)
+  | (?P<pseudo>:[\w-]+(?:\((?:[^()]|\([^()]*\))*\))?)
+''', re.VERBOSE)
+
+ATTR_RE = re.compile(r'''\[\s*([\w-]+)\s*(?:([~|^$*]?=)\s*(?:"([^"]*)"|'([^']*)'|([^\]\s]+))\s*)?\]''')
+# Pseudo-classes _matches_simple evaluates exactly rather than by guessing
+EXACT_PSEUDOS = {
+    'root', 'empty', 'first-child', 'last-child', 'only-child', 'first-of-type',
+    'last-of-type', 'nth-child', 'nth-last-child', 'nth-of-type', 'checked',
+    'disabled', 'required', 'not', 'is', 'where', 'matches'
+}
+
+NTH_RE = re.compile(r'^(?:(even)|(odd)|([+-]?\d*)n\s*(?:([+-])\s*(\d+))?|([+-]?\d+))$')
+
+
+def above_the_fold(document, sections=FOLD_SECTIONS):
+    """Elements rendered in the first viewport.
+
+    Without a layout engine the fold is approximated structurally: the
+    <head>, everything in <body> before <main>, and the first `sections`
+    content blocks inside <main> (or <body>), plus their ancestors.
+    """
+    fold = set()
+    html = next((e for e in document.children if e.tag == 'html'), document)
+    body = next((e for e in html.iter() if e.tag == 'body'), None)
+    if body is None:
+        return set(document.iter())
+    fold.update(e for e in document.iter() if e.tag in ('#document', 'html', 'body'))
+
+    container = next((e for e in body.children if e.tag == 'main'), body)
+    remaining = sections
+    for child in body.children:
+        if child is container:
+            break
+        fold.update(child.iter())
+    if container is not body:
+        fold.add(container)
+    for child in container.children:
+        if remaining <= 0:
+            break
+        fold.update(child.iter())
+        if child.tag not in ('header', 'nav'):
+            remaining -= 1
+    return fold
+
+
+def split_selector_list(selector):
+    """Split a selector list on top-level commas."""
+    parts = []
+    depth = 0
+    start = 0
+    for i, c in enumerate(selector):
+        if c in '([':
+            depth += 1
+        elif c in ')]':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            parts.append(selector[start:i].strip())
+            start = i + 1
+    parts.append(selector[start:].strip())
+    return [part for part in parts if part]
+
+
+def parse_selector(selector):
+    """Parse a complex selector into [(combinator, compound), ...], leftmost first.
+
+    A compound is a list of (kind, text) simple selectors. Returns None for
+    syntax this matcher does not understand.
+    """
+    steps = []
+    compound = []
+    combinator = None
+    pending_ws = False
+    pos = 0
+    while pos < len(selector):
+        match = SELECTOR_TOKEN_RE.match(selector, pos)
+        if not match:
+            return None
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == 'ws':
+            pending_ws = True
+            continue
+        if kind == 'combinator':
+            if compound:
+                steps.append((combinator, compound))
+                compound = []
+            combinator = match.group()
+            pending_ws = False
+            continue
+        if pending_ws and compound:
+            steps.append((combinator, compound))
+            compound = []
+            combinator = ' '
+        pending_ws = False
+        compound.append((kind, match.group()))
+    if not compound:
+        return None
+    steps.append((combinator, compound))
+    return steps
+
+
+def _nth_matches(expression, position):
+    match = NTH_RE.match(expression.strip().lower())
+    if not match:
+        return True
+    even, odd, a, sign, b, only_b = match.groups()
+    if even:
+        a, b = 2, 0
+    elif odd:
+        a, b = 2, 1
+    elif only_b is not None:
+        return position == int(only_b)
+    else:
+        a = -1 if a == '-' else int(a) if a not in ('', '+') else 1
+        b = int(b or 0) * (-1 if sign == '-' else 1)
+    if a == 0:
+        return position == b
+    return (position - b) % a == 0 and (position - b) // a >= 0
+
+
+def _understood(selector):
+    """True if every part of selector is evaluated exactly, so its result
+    can safely be negated by :not()."""
+    steps = parse_selector(selector)
+    if steps is None:
+        return False
+    for _, compound in steps:
+        for kind, text in compound:
+            if kind == 'pseudo_element':
+                return False
+            if kind != 'pseudo':
+                continue
+            name, _, argument = text[1:].partition('(')
+            name = name.lower()
+            argument = argument[:-1]
+            if name not in EXACT_PSEUDOS:
+                return False
+            if name.startswith('nth-') and not NTH_RE.match(argument.strip().lower()):
+                return False
+            if name in ('not', 'is', 'where', 'matches') and \
+                    not all(_understood(part) for part in split_selector_list(argument)):
+                return False
+    return True
+
+
+def _siblings(element):
+    return element.parent.children if element.parent else [element]
+
+
+def _matches_simple(element, kind, text):
+    if kind == 'universal' or kind == 'pseudo_element':
+        return True
+    if kind == 'tag':
+        return element.tag == text.lower()
+    if kind == 'id':
+        return element.attrs.get('id') == text[1:]
+    if kind == 'cls':
+        return text[1:] in element.classes
+    if kind == 'attr':
+        name, op, *values = ATTR_RE.match(text).groups()
+        if name not in element.attrs:
+            return False
+        if op is None:
+            return True
+        expected = next((v for v in values if v is not None), '')
+        actual = element.attrs[name]
+        if op == '=':
+            return actual == expected
+        if op == '~=':
+            return expected in actual.split()
+        if op == '|=':
+            return actual == expected or actual.startswith(expected + '-')
+        if op == '^=':
+            return actual.startswith(expected)
+        if op == '$=':
+            return actual.endswith(expected)
+        return expected in actual
+
+    name, _, argument = text[1:].partition('(')
+    name = name.lower()
+    argument = argument[:-1]
+    if name in ('before', 'after', 'first-line', 'first-letter', 'selection', 'placeholder') or name.startswith('-'):
+        return True
+    if name in INTERACTION_PSEUDOS:
+        return False
+    if name == 'root':
+        return element.parent is not None and element.parent.tag == '#document'
+    if name == 'not':
+        # Guesses ("assume it matches") would flip to "never matches" here,
+        # so anything not evaluated exactly keeps the rule
+        parts = split_selector_list(argument)
+        if not parts or not all(_understood(part) for part in parts):
+            return True
+        return not any(selector_matches(element, part) for part in parts)
+    if name in ('is', 'where', 'matches'):
+        return any(selector_matches(element, part) for part in split_selector_list(argument))
+    if name == 'empty':
+        return not element.children
+    siblings = _siblings(element)
+    same_type = [e for e in siblings if e.tag == element.tag]
+    if name == 'first-child':
+        return siblings[0] is element
+    if name == 'last-child':
+        return siblings[-1] is element
+    if name == 'only-child':
+        return len(siblings) == 1
+    if name == 'first-of-type':
+        return same_type[0] is element
+    if name == 'last-of-type':
+        return same_type[-1] is element
+    if name == 'nth-child':
+        return _nth_matches(argument, siblings.index(element) + 1)
+    if name == 'nth-last-child':
+        return _nth_matches(argument, len(siblings) - siblings.index(element))
+    if name == 'nth-of-type':
+        return _nth_matches(argument, same_type.index(element) + 1)
+    if name in ('checked', 'disabled', 'required'):
+        return name in element.attrs
+    # Anything else (:link, :visited, :valid, ...) is assumed to match so
+    # the critical subset errs on the side of including the rule.
+    return True
+
+
+def _matches_steps(element, steps):
+    combinator, compound = steps[-1]
+    if not all(_matches_simple(element, kind, text) for kind, text in compound):
+        return False
+    if len(steps) == 1:
+        return True
+    rest = steps[:-1]
+    if combinator == '>':
+        return element.parent is not None and _matches_steps(element.parent, rest)
+    if combinator == ' ':
+        ancestor = element.parent
+        while ancestor is not None and ancestor.tag != '#document':
+            if _matches_steps(ancestor, rest):
+                return True
+            ancestor = ancestor.parent
+        return False
+    siblings = _siblings(element)
+    before = siblings[:siblings.index(element)]
+    if combinator == '+':
+        return bool(before) and _matches_steps(before[-1], rest)
+    return any(_matches_steps(sibling, rest) for sibling in before)
+
+
+def selector_matches(element, selector):
+    """True if element matches one complex selector (unparseable ones match)."""
+    steps = parse_selector(selector)
+    if steps is None:
+        return True
+    return _matches_steps(element, steps)
+
+
+def animation_names(nodes):
+    """Names referenced by animation/animation-name declarations."""
+    names = set()
+    for node in nodes:
+        if isinstance(node, AtRule):
+            names |= animation_names(node.rules or [])
+            continue
+        for prop, value in node.declarations:
+            if prop.lower() in ('animation', 'animation-name', '-webkit-animation', '-webkit-animation-name'):
+                names.update(text for kind, text in value if kind == 'word')
+    return names
+
+
+def drop_unused_keyframes(nodes, animations=None):
+    """Remove @keyframes no rule animates with, and at-rules left empty.
+
+    animations defaults to the names used within nodes themselves.
+    """
+    if animations is None:
+        animations = animation_names(nodes)
+    result = []
+    for node in nodes:
+        if isinstance(node, AtRule) and node.name in css_minifier.KEYFRAMES_AT_RULES:
+            if css_minifier.prelude_text(node.prelude) not in animations:
+                continue
+        elif isinstance(node, AtRule) and node.rules is not None:
+            node = AtRule(node.name, node.prelude, rules=drop_unused_keyframes(node.rules, animations))
+            if not node.rules:
+                continue
+        result.append(node)
+    return result
+
+
+def _critical_nodes(nodes, elements):
+    kept = []
+    for node in nodes:
+        if isinstance(node, Rule):
+            selector = css_minifier.selector_text(node.selector)
+            matching = [
+                part for part in split_selector_list(selector)
+                if any(selector_matches(element, part) for element in elements)
+            ]
+            if matching:
+                kept.append(Rule([('word', ','.join(matching))], node.declarations))
+        elif node.name in css_minifier.KEYFRAMES_AT_RULES:
+            kept.append(node)
+        elif node.name == 'media' and css_minifier.prelude_text(node.prelude) == 'print':
+            continue
+        elif node.rules is not None:
+            children = _critical_nodes(node.rules, elements)
+            if children:
+                kept.append(AtRule(node.name, node.prelude, rules=children))
+        else:
+            kept.append(node)
+    return kept
+
+
+def critical_css(nodes, document, sections=FOLD_SECTIONS):
+    """Minified subset of a parsed stylesheet needed to render the fold.
+
+    Keyframes survive only if a kept rule animates with them.
+    """
+    elements = [e for e in above_the_fold(document, sections) if e.tag != '#document']
+    kept = _critical_nodes(nodes, elements)
+    return css_minifier.serialize(css_minifier.merge_rules(drop_unused_keyframes(kept)))
+
+
+def parse_stylesheet(css):
+    return css_minifier.parse(css_minifier.tokenize(css))
+
+
+def inline_critical_css(html, page, stylesheet, nodes, sections=FOLD_SECTIONS):
+    """Inline the critical subset of stylesheet into page and load it async.
+
+    page and stylesheet are paths relative to the site root; the page's
+    <link rel="stylesheet"> resolving to stylesheet is replaced by an
+    inline <style>, a preload that swaps itself to a stylesheet once
+    loaded, and a <noscript> fallback. Returns (html, critical_bytes);
+    pages without a matching link are returned unchanged with 0.
+    """
+    page_dir = posixpath.dirname(page)
+    link_re = re.compile(r'''<link\b[^>]*>''', re.IGNORECASE)
+    for match in link_re.finditer(html):
+        tag = match.group(0)
+        rel = re.search(r'''\srel\s*=\s*["']?stylesheet["'\s>]''', tag, re.IGNORECASE)
+        href = re.search(r'''\shref\s*=\s*(["'])([^"']*)\1''', tag, re.IGNORECASE)
+        if not rel or not href:
+            continue
+        if posixpath.normpath(posixpath.join(page_dir, href.group(2))) != stylesheet:
+            continue
+
+        critical = critical_css(nodes, parse_document(html).root, sections)
+        url = href.group(2)
+        indent = html[html.rfind('\n', 0, match.start()) + 1:match.start()]
+        if indent.strip():
+            indent = ''
+        replacement = (
+            f'<style>{critical}</style>\n'
+            f'{indent}<link rel="preload" href="{url}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+            f'{indent}<noscript><link rel="stylesheet" href="{url}"></noscript>'
+        )
+        return html[:match.start()] + replacement + html[match.end():], len(critical.encode('utf-8'))
+    return html, 0
@@ -0,0 +1,485 @@
+"""Tokenizing CSS minifier.
+
+The stylesheet is scanned once into a flat token stream (strings, url()
+bodies and comments are recognised by the scanner itself, so nothing inside
+them is ever rewritten), the stream is folded into a small rule tree,
+duplicate selectors and identical blocks are merged where the cascade
+allows it, and the tree is serialized back with value-level optimizations
+(colors, numbers, box shorthands) applied.
+"""
+import re
+
+# Characters that always terminate a word token.
+DELIMS = set('{}:;,()>+~!')
+
+# At-rules whose block holds nested rules rather than declarations.
+NESTED_AT_RULES = {'media', 'supports', 'document', 'layer', 'container'}
+KEYFRAMES_AT_RULES = {'keyframes', '-webkit-keyframes', '-moz-keyframes', '-o-keyframes'}
+
+# Properties whose 1-4 value box shorthand can be collapsed.
+BOX_SHORTHANDS = {
+    'margin', 'padding', 'inset', 'border-width', 'border-style',
+    'border-color', 'border-radius', 'scroll-margin', 'scroll-padding'
+}
+
+LENGTH_UNITS = {
+    'px', 'em', 'rem', 'ex', 'ch', 'vw', 'vh', 'vmin', 'vmax',
+    'cm', 'mm', 'in', 'pt', 'pc'
+}
+
+FONT_WEIGHTS = {'normal': '400', 'bold': '700'}
+
+# Color keywords with a shorter hex spelling.
+NAMED_COLORS = {'white': '#fff', 'black': '#000', 'yellow': '#ff0', 'fuchsia': '#f0f'}
+
+# Properties whose value can hold a color keyword. Elsewhere a word like
+# `white` may be a font family, animation or grid area name.
+COLOR_PROPERTIES = {
+    'color', 'fill', 'stroke', 'caret-color', 'accent-color', 'stop-color',
+    'flood-color', 'lighting-color', 'scrollbar-color', 'column-rule',
+    'column-rule-color', 'text-decoration', 'text-decoration-color',
+    'text-emphasis', 'text-emphasis-color', 'text-fill-color', 'text-stroke',
+    'text-stroke-color', 'box-shadow', 'text-shadow'
+}
+COLOR_PROPERTY_PREFIXES = ('background', 'border', 'outline')
+
+# Shorthands that set longhands outside their own name prefix; a rule
+# setting one conflicts with rules setting any of those longhands.
+CROSS_FAMILY_LONGHANDS = {
+    'font': ('line-height',),
+    'inset': ('top', 'right', 'bottom', 'left'),
+    'inset-block': ('top', 'bottom'),
+    'inset-inline': ('right', 'left'),
+    'inset-block-start': ('top', 'bottom'),
+    'inset-block-end': ('top', 'bottom'),
+    'inset-inline-start': ('right', 'left'),
+    'inset-inline-end': ('right', 'left'),
+    'place-content': ('align-content', 'justify-content'),
+    'place-items': ('align-items', 'justify-items'),
+    'place-self': ('align-self', 'justify-self'),
+    'gap': ('row-gap', 'column-gap'),
+    'grid-gap': ('row-gap', 'column-gap'),
+    'flex-flow': ('flex-direction', 'flex-wrap'),
+    'columns': ('column-width', 'column-count'),
+    'white-space': ('text-wrap', 'text-wrap-mode', 'white-space-collapse'),
+    'inline-size': ('width', 'height'),
+    'block-size': ('width', 'height')
+}
+
+NUMBER_RE = re.compile(r'^([+-]?)(\d*)(?:\.(\d+))?([a-z%]*)$', re.IGNORECASE)
+HEX_RE = re.compile(r'^#([0-9a-f]{6}|[0-9a-f]{8})$', re.IGNORECASE)
+
+
+def tokenize(css):
+    """Yield (kind, text) tokens from CSS source in a single pass.
+
+    Kinds are 'ws', 'str', 'url', 'delim' and 'word'. Comments are reported
+    as whitespace so they still separate the tokens around them.
+    """
+    i = 0
+    n = len(css)
+    while i < n:
+        ch = css[i]
+        if ch in ' \t\r\n\f':
+            j = i + 1
+            while j < n and css[j] in ' \t\r\n\f':
+                j += 1
+            yield 'ws', ' '
+            i = j
+        elif ch == '/' and css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            yield 'ws', ' '
+        elif ch in '"\'':
+            j = i + 1
+            while j < n and css[j] != ch:
+                j += 2 if css[j] == '\\' else 1
+            yield 'str', css[i:j + 1]
+            i = j + 1
+        elif ch in DELIMS:
+            yield 'delim', ch
+            i += 1
+        else:
+            j = i
+            while j < n:
+                c = css[j]
+                if c == '\\':
+                    j += 2
+                    continue
+                if c in DELIMS or c in ' \t\r\n\f"\'' or css.startswith('/*', j):
+                    break
+                j += 1
+            word = css[i:j]
+            if word.lower() == 'url' and j < n and css[j] == '(':
+                end = _url_end(css, j + 1)
+                body = css[j + 1:end].strip()
+                yield 'url', f'url({body})'
+                i = end + 1
+            else:
+                yield 'word', word
+                i = j
+
+
+def _url_end(css, start):
+    """Return the index of the ')' closing a url( opened before start."""
+    i = start
+    quote = None
+    while i < len(css):
+        c = css[i]
+        if quote:
+            if c == '\\':
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in '"\'':
+            quote = c
+        elif c == ')':
+            return i
+        i += 1
+    return len(css)
+
+
+class Rule:
+    """Qualified rule: a selector plus its declarations."""
+
+    def __init__(self, selector, declarations):
+        self.selector = selector
+        self.declarations = declarations
+
+
+class AtRule:
+    """At-rule with an optional block of rules or declarations."""
+
+    def __init__(self, name, prelude, rules=None, declarations=None):
+        self.name = name
+        self.prelude = prelude
+        self.rules = rules
+        self.declarations = declarations
+
+
+def parse(tokens):
+    """Fold a token stream into a list of Rule/AtRule nodes."""
+    tokens = list(tokens)
+    rules, _ = _parse_rules(tokens, 0)
+    return rules
+
+
+def _parse_rules(tokens, i, keyframes=False):
+    rules = []
+    n = len(tokens)
+    while i < n:
+        kind, text = tokens[i]
+        if kind == 'ws' or (kind == 'delim' and text == ';'):
+            i += 1
+            continue
+        if kind == 'delim' and text == '}':
+            return rules, i + 1
+        if kind == 'word' and text.startswith('@'):
+            name = text[1:].lower()
+            prelude, i, terminator = _collect_until(tokens, i + 1, {'{', ';'})
+            if terminator != '{':
+                rules.append(AtRule(name, prelude))
+            elif name in NESTED_AT_RULES or name in KEYFRAMES_AT_RULES:
+                children, i = _parse_rules(tokens, i, name in KEYFRAMES_AT_RULES)
+                rules.append(AtRule(name, prelude, rules=children))
+            else:
+                declarations, i = _parse_declarations(tokens, i)
+                rules.append(AtRule(name, prelude, declarations=declarations))
+            continue
+        selector, i, _ = _collect_until(tokens, i, {'{'})
+        declarations, i = _parse_declarations(tokens, i)
+        if keyframes:
+            selector = [('word', '0%') if t == ('word', 'from') else t for t in selector]
+        rules.append(Rule(selector, declarations))
+    return rules, i
+
+
+def _collect_until(tokens, i, stops):
+    """Collect tokens up to a top-level stop delimiter, consuming it."""
+    collected = []
+    depth = 0
+    while i < len(tokens):
+        kind, text = tokens[i]
+        if kind == 'delim':
+            if text == '(':
+                depth += 1
+            elif text == ')':
+                depth -= 1
+            elif depth <= 0 and (text in stops or text == '}'):
+                if text == '}' and '}' not in stops:
+                    return collected, i, text
+                return collected, i + 1, text
+        collected.append(tokens[i])
+        i += 1
+    return collected, i, None
+
+
+def _parse_declarations(tokens, i):
+    declarations = []
+    while i < len(tokens):
+        raw, i, terminator = _collect_until(tokens, i, {';', '}'})
+        if raw:
+            split = next((k for k, t in enumerate(raw) if t == ('delim', ':')), None)
+            if split is not None:
+                prop = ''.join(t for _, t in raw[:split]).strip()
+                value = raw[split + 1:]
+                if prop:
+                    declarations.append((prop, value))
+        if terminator == '}' or terminator is None:
+            break
+    return declarations, i
+
+
+def _join(tokens, drop_before, drop_after):
+    """Serialize tokens, keeping only whitespace that is significant."""
+    out = []
+    pending_ws = False
+    for kind, text in tokens:
+        if kind == 'ws':
+            pending_ws = bool(out)
+            continue
+        if pending_ws:
+            prev = out[-1]
+            if not (text in drop_before and kind == 'delim') and prev not in drop_after:
+                out.append(' ')
+            pending_ws = False
+        out.append(text)
+    return ''.join(out)
+
+
+SELECTOR_DROP = ({',', '>', '+', '~', ')'}, {',', '>', '+', '~', '('})
+PRELUDE_DROP = ({',', ':', ')'}, {',', ':', '('})
+VALUE_DROP = ({',', ')', '!'}, {',', '(', '!'})
+
+
+def minify_number(word, keep_units=False):
+    """Shorten a numeric word: strip zero padding and zero-length units.
+
+    Inside functions such as calc() a bare `0` is not a valid length, so
+    keep_units leaves the unit on zero values.
+    """
+    match = NUMBER_RE.match(word)
+    if not match or not (match.group(2) or match.group(3)):
+        return word
+    sign, whole, frac, unit = match.groups()
+    whole = whole.lstrip('0')
+    frac = (frac or '').rstrip('0')
+    if not whole and not frac:
+        if unit.lower() in LENGTH_UNITS and not keep_units:
+            return '0'
+        return '0' + unit
+    number = whole + ('.' + frac if frac else '')
+    return sign + number + unit
+
+
+def minify_color(word):
+    """Lowercase hex colors and use the 3/4 digit form where lossless."""
+    match = HEX_RE.match(word)
+    if not match:
+        return word
+    digits = match.group(1).lower()
+    pairs = [digits[k:k + 2] for k in range(0, len(digits), 2)]
+    if all(p[0] == p[1] for p in pairs):
+        return '#' + ''.join(p[0] for p in pairs)
+    return '#' + digits
+
+
+def _unprefixed(prop):
+    """Property name without a vendor prefix (`-webkit-flex` -> `flex`)."""
+    if prop.startswith('-') and not prop.startswith('--'):
+        return prop.split('-', 2)[-1]
+    return prop
+
+
+def _takes_color(prop):
+    prop = _unprefixed(prop)
+    return prop in COLOR_PROPERTIES or prop.startswith(COLOR_PROPERTY_PREFIXES)
+
+
+def minify_value(prop, tokens):
+    """Serialize a declaration value with value-level optimizations."""
+    prop = prop.lower()
+    custom = prop.startswith('--')
+    colors = _takes_color(prop)
+    # flex: 1 1 0px must keep its flex-basis unit
+    flex = _unprefixed(prop) == 'flex'
+    result = []
+    depth = 0
+    for kind, text in tokens:
+        if kind == 'delim':
+            if text == '(':
+                depth += 1
+            elif text == ')':
+                depth -= 1
+        elif kind == 'word':
+            if text.startswith('#'):
+                text = minify_color(text)
+            elif colors and text.lower() in NAMED_COLORS:
+                text = NAMED_COLORS[text.lower()]
+            elif not flex:
+                # var() substitution can land a custom property inside calc(),
+                # so zero lengths there keep their unit too.
+                text = minify_number(text, keep_units=custom or depth > 0)
+        result.append((kind, text))
+
+    value = _join(result, *VALUE_DROP).strip()
+    if custom:
+        return value
+    if prop == 'font-weight':
+        return FONT_WEIGHTS.get(value.lower(), value)
+    if prop in BOX_SHORTHANDS:
+        return collapse_box(value)
+    return value
+
+
+def collapse_box(value):
+    """Collapse a 1-4 value box shorthand (e.g. `0 0 0 0` -> `0`)."""
+    parts = value.split(' ')
+    if len(parts) > 4 or any(c in value for c in '(,/!'):
+        return value
+    if len(parts) == 4 and parts[3] == parts[1]:
+        parts = parts[:3]
+    if len(parts) == 3 and parts[2] == parts[0]:
+        parts = parts[:2]
+    if len(parts) == 2 and parts[1] == parts[0]:
+        parts = parts[:1]
+    return ' '.join(parts)
+
+
+def serialize_declarations(declarations):
+    """Serialize a declaration block, dropping exact earlier duplicates."""
+    items = [f'{prop.lower() if not prop.startswith("--") else prop}:{minify_value(prop, value)}'
+             for prop, value in declarations]
+    seen = set()
+    unique = []
+    for item in reversed(items):
+        if item not in seen:
+            seen.add(item)
+            unique.append(item)
+    return ';'.join(reversed(unique))
+
+
+def _has_vendor_pseudo(selector):
+    """True if the selector uses a prefixed pseudo-class/element.
+
+    Browsers drop a whole selector list when one entry is unsupported, so
+    such selectors must never be grouped with others.
+    """
+    return any(selector[k] == ('delim', ':') and selector[k + 1][1].startswith('-')
+               for k in range(len(selector) - 1))
+
+
+def _property_root(prop):
+    """Group a property with its shorthand family (`border-top-color` -> `border`)."""
+    prop = prop.lower()
+    if prop.startswith('--'):
+        return prop
+    if prop.startswith('-'):
+        prop = prop.split('-', 2)[-1]
+    return prop.split('-')[0]
+
+
+def _property_families(prop):
+    """Families a declaration of prop can affect: its own root plus the
+    roots of longhands it sets under another prefix. `all` touches '*'."""
+    root = _property_root(prop)
+    if root == 'all':
+        return {'*'}
+    name = prop.lower()
+    if name.startswith('-') and not name.startswith('--'):
+        name = name.split('-', 2)[-1]
+    return {root} | {_property_root(longhand) for longhand in CROSS_FAMILY_LONGHANDS.get(name, ())}
+
+
+def _touched_roots(node):
+    """Property families a node can set, for cascade-conflict checks."""
+    if isinstance(node, Rule):
+        roots = set()
+        for prop, _ in node.declarations:
+            roots |= _property_families(prop)
+        return roots
+    if node.rules is None or node.name in KEYFRAMES_AT_RULES:
+        return set()
+    roots = set()
+    for child in node.rules:
+        roots |= _touched_roots(child)
+    return roots
+
+
+def _conflicts(roots, other):
+    return bool(roots & other) or '*' in roots or '*' in other
+
+
+def merge_rules(nodes):
+    """Merge rules that share a selector or a declaration block.
+
+    A rule is folded into an earlier rule with the same selector only when
+    nothing in between sets a property from the same family (including
+    shorthands such as `font` or `inset` that reach across prefixes), so
+    the winning declaration for every element is unchanged.
+    """
+    merged = []
+    by_selector = {}
+    for node in nodes:
+        prev = merged[-1] if merged else None
+        if isinstance(node, Rule):
+            if not node.declarations:
+                continue
+            key = _join(node.selector, *SELECTOR_DROP).strip()
+            target = by_selector.get(key)
+            if target is not None:
+                roots = _touched_roots(node)
+                if not any(_conflicts(roots, _touched_roots(other)) for other in merged[target + 1:]):
+                    merged[target].declarations = merged[target].declarations + node.declarations
+                    continue
+            if (isinstance(prev, Rule)
+                    and serialize_declarations(prev.declarations) == serialize_declarations(node.declarations)
+                    and not _has_vendor_pseudo(prev.selector)
+                    and not _has_vendor_pseudo(node.selector)):
+                prev.selector = prev.selector + [('delim', ',')] + node.selector
+                by_selector.pop(_join(prev.selector[:-len(node.selector) - 1], *SELECTOR_DROP).strip(), None)
+                continue
+            by_selector[key] = len(merged)
+        elif node.rules is not None:
+            node.rules = merge_rules(node.rules)
+            if not node.rules:
+                continue
+            if (isinstance(prev, AtRule) and prev.rules is not None and prev.name == node.name
+                    and _join(prev.prelude, *PRELUDE_DROP).strip() == _join(node.prelude, *PRELUDE_DROP).strip()):
+                prev.rules = merge_rules(prev.rules + node.rules)
+                continue
+        merged.append(node)
+    return merged
+
+
+def selector_text(selector):
+    """Serialize a rule's selector tokens."""
+    return _join(selector, *SELECTOR_DROP).strip()
+
+
+def prelude_text(prelude):
+    """Serialize an at-rule's prelude tokens."""
+    return _join(prelude, *PRELUDE_DROP).strip()
+
+
+def serialize(nodes):
+    out = []
+    for node in nodes:
+        if isinstance(node, Rule):
+            selector = selector_text(node.selector)
+            out.append(f'{selector}{{{serialize_declarations(node.declarations)}}}')
+            continue
+        prelude = prelude_text(node.prelude)
+        head = f'@{node.name} {prelude}' if prelude else f'@{node.name}'
+        if node.rules is not None:
+            out.append(f'{head}{{{serialize(node.rules)}}}')
+        elif node.declarations is not None:
+            out.append(f'{head}{{{serialize_declarations(node.declarations)}}}')
+        else:
+            out.append(f'{head};')
+    return ''.join(out)
+
+
+def minify(css):
+    """Minify a stylesheet."""
+    return serialize(merge_rules(parse(tokenize(css))))
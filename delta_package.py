@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import posixpath
+import sys
+import tarfile
+from pathlib import Path
+
+from integrity_manifest import INTEGRITY_MANIFEST, verify_tree
+from parallel_archive import build_tarball
+
+base_dir = Path('/app/sentient_website_redesign_0308')
+releases_dir = base_dir / 'releases'
+
+DELTA_INFO = 'DELTA.json'
+DELTA_FILES = 'files/'
+LATEST = 'LATEST'
+
+
+def manifest_digest(manifest):
+    """Identity of a release: hash of its canonical manifest."""
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def diff_manifests(old, new):
+    """Return {'added', 'changed', 'deleted'} relative paths between two manifests."""
+    old_files = old['files']
+    new_files = new['files']
+    return {
+        'added': sorted(rel for rel in new_files if rel not in old_files),
+        'changed': sorted(rel for rel in new_files
+                          if rel in old_files and old_files[rel]['sha256'] != new_files[rel]['sha256']),
+        'deleted': sorted(rel for rel in old_files if rel not in new_files)
+    }
+
+
+def build_delta(prod_dir, old_manifest, new_manifest, delta_path):
+    """Write a .tar.gz holding DELTA.json and the added/changed files.
+
+    DELTA.json names both releases, the files to delete and the expected
+    SHA-256 of every shipped file; the new integrity manifest is shipped
+    too so the target can be verified afterwards. Returns DELTA.json's dict.
+    """
+    prod_dir = Path(prod_dir)
+    diff = diff_manifests(old_manifest, new_manifest)
+    shipped = diff['added'] + diff['changed']
+    info = {
+        'from': manifest_digest(old_manifest),
+        'to': manifest_digest(new_manifest),
+        **diff,
+        'sha256': {rel: new_manifest['files'][rel]['sha256'] for rel in shipped}
+    }
+    members = [(DELTA_INFO, json.dumps(info, indent=2).encode('utf-8'))]
+    members += [(DELTA_FILES + rel, prod_dir / rel) for rel in shipped]
+    members.append((DELTA_FILES + INTEGRITY_MANIFEST, json.dumps(new_manifest, indent=2).encode('utf-8')))
+    build_tarball(members, delta_path)
+    return info
+
+
+def record_release(prod_dir):
+    """Save the package's integrity manifest under releases/ and build the
+    delta from the previous release, if there is one and it differs.
+
+    Returns (delta_path or None, delta info or None).
+    """
+    with open(Path(prod_dir) / INTEGRITY_MANIFEST, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    releases_dir.mkdir(exist_ok=True)
+    name = f'manifest-{manifest_digest(manifest)[:12]}.json'
+    with open(releases_dir / name, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    latest_path = releases_dir / LATEST
+    previous = latest_path.read_text(encoding='utf-8').strip() if latest_path.exists() else None
+    latest_path.write_text(name + '\n', encoding='utf-8')
+    if not previous or previous == name or not (releases_dir / previous).exists():
+        return None, None
+
+    with open(releases_dir / previous, 'r', encoding='utf-8') as f:
+        old_manifest = json.load(f)
+    delta_path = releases_dir / f"delta-{previous[9:21]}-{name[9:21]}.tar.gz"
+    return delta_path, build_delta(prod_dir, old_manifest, manifest, delta_path)
+
+
+def _safe_rel(rel):
+    rel = posixpath.normpath(rel)
+    if rel.startswith(('/', '../')) or rel == '..' or rel == '.':
+        raise ValueError(f'unsafe path in delta: {rel}')
+    return rel
+
+
+def apply_delta(delta_path, target):
+    """Bring target from the delta's 'from' release to its 'to' release.
+
+    target must currently match the 'from' release (checked against its
+    integrity manifest). Files are verified against DELTA.json before
+    anything is replaced, each is swapped in with an atomic rename, and
+    the result is verified against the new manifest.
+    Returns verify_tree's result for the updated tree.
+    """
+    target = Path(target)
+    with open(target / INTEGRITY_MANIFEST, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+
+    with tarfile.open(delta_path, 'r:gz') as tar:
+        info = json.load(tar.extractfile(DELTA_INFO))
+        if manifest_digest(current) != info['from']:
+            raise ValueError(f"{target} is not the release this delta starts from")
+
+        staged = []
+        try:
+            for member in tar.getmembers():
+                if not member.name.startswith(DELTA_FILES) or not member.isfile():
+                    continue
+                rel = _safe_rel(member.name[len(DELTA_FILES):])
+                data = tar.extractfile(member).read()
+                expected = info['sha256'].get(rel)
+                if expected is not None and hashlib.sha256(data).hexdigest() != expected:
+                    raise ValueError(f'{rel} in delta is corrupt')
+                dst = target / rel
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                tmp = dst.with_name(f'.{dst.name}.delta-tmp')
+                tmp.write_bytes(data)
+                os.chmod(tmp, member.mode)
+                staged.append((tmp, dst))
+        except Exception:
+            for tmp, _ in staged:
+                tmp.unlink()
+            raise
+
+    # Everything is staged and verified; swap it in, manifest last
+    staged.sort(key=lambda item: item[1].name == INTEGRITY_MANIFEST)
+    for rel in info['deleted']:
+        path = target / _safe_rel(rel)
+        if path.exists():
+            path.unlink()
+    for tmp, dst in staged:
+        os.replace(tmp, dst)
+
+    with open(target / INTEGRITY_MANIFEST, 'r', encoding='utf-8') as f:
+        return verify_tree(target, json.load(f))
+
+
+def main():
+    """python delta_package.py <delta.tar.gz> <deployed dir>"""
+    if len(sys.argv) != 3:
+        print("Usage: python delta_package.py <delta.tar.gz> <deployed dir>")
+        sys.exit(2)
+    delta_path, target = sys.argv[1], sys.argv[2]
+
+    print("="*80)
+    print("APPLYING DELTA PACKAGE")
+    print("="*80)
+    try:
+        result = apply_delta(delta_path, target)
+    except (OSError, ValueError, KeyError, tarfile.TarError) as e:
+        print(f"\n❌ Delta not applied: {e}")
+        sys.exit(1)
+
+    problems = sum(len(result[key]) for key in ('missing', 'extra', 'size_mismatch', 'hash_mismatch'))
+    print(f"\n🔍 {result['ok']} files verified after applying {Path(delta_path).name}")
+    if problems:
+        print(f"❌ {problems} file(s) do not match the new release - redeploy the full package")
+        sys.exit(1)
+    print("✅ Target now matches the new release")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import os
+import shutil
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl that makes dst share src's extents (btrfs, XFS, overlay on those)
+FICLONE = 0x40049409
+
+# How place_file materializes a file:
+#   'auto'     - reflink where the filesystem supports it, else copy
+#   'hardlink' - hardlink where possible (same filesystem), else as 'auto';
+#                the package then shares inodes with the source tree, so
+#                never edit package files in place
+#   'copy'     - always copy
+LINK_MODES = ('auto', 'hardlink', 'copy')
+
+
+def reflink(src, dst):
+    """Copy-on-write clone of src at dst; raises OSError if unsupported."""
+    if fcntl is None:
+        raise OSError('reflinks need fcntl')
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+
+def up_to_date(src, dst, cache):
+    """rsync-style quick check: is dst already a copy of src?
+
+    Equal size and mtime (copy2 and links preserve mtime) means yes
+    without reading either file; equal size with a different mtime falls
+    back to comparing content hashes through the build cache, and the
+    mtime is then synced so the next check is quick.
+    """
+    try:
+        src_stat = os.stat(src)
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return False
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+    if cache.digest(src) != cache.digest(dst):
+        return False
+    os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return True
+
+
+def place_file(src, dst, mode='auto'):
+    """Materialize src at dst and return how: 'hardlink', 'reflink' or 'copy'.
+
+    The file is built beside dst and renamed over it, so readers never see
+    a partial file and an existing hardlink at dst is replaced rather
+    than written through to the source.
+    """
+    dst = Path(dst)
+    tmp = dst.with_name(f'.{dst.name}.sync-tmp')
+    if tmp.exists():
+        tmp.unlink()
+    method = 'copy'
+    try:
+        if mode == 'hardlink':
+            try:
+                os.link(src, tmp)
+                method = 'hardlink'
+            except OSError:
+                pass
+        if method == 'copy' and mode != 'copy':
+            try:
+                reflink(src, tmp)
+                shutil.copystat(src, tmp)
+                method = 'reflink'
+            except OSError:
+                if tmp.exists():
+                    tmp.unlink()
+        if method == 'copy':
+            shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return method
+
+
+def write_atomic(path, data):
+    """Write bytes to path through a temp file renamed over it, as place_file does."""
+    path = Path(path)
+    tmp = path.with_name(f'.{path.name}.sync-tmp')
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def prune_empty_dirs(root, keep=()):
+    """Remove directories under root left empty, except those in keep."""
+    removed = 0
+    keep = {Path(path) for path in keep}
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        path = Path(dirpath)
+        if path == Path(root) or path in keep:
+            continue
+        if not os.listdir(path):
+            path.rmdir()
+            removed += 1
+    return removed
@@ -0,0 +1,75 @@
+import hashlib
+import posixpath
+import re
+from pathlib import Path
+
+FINGERPRINT_LENGTH = 10
+MANIFEST_NAME = 'asset-manifest.json'
+
+# <link ... href="..."> and <script ... src="...">, attribute value in group 3
+ASSET_REF_RE = re.compile(
+    r'''(<(?:link|script)\b[^>]*?\s(?:href|src)\s*=\s*)(["'])([^"']*)\2''',
+    re.IGNORECASE
+)
+
+def fingerprinted_name(path, digest):
+    """styles/main.min.css + digest -> styles/main.<hash>.min.css"""
+    path = Path(path)
+    stem = path.name.split('.', 1)[0]
+    return str(path.parent / f'{stem}.{digest[:FINGERPRINT_LENGTH]}.min{path.suffix}')
+
+def fingerprint_content(path, content):
+    """Fingerprinted name for an asset generated in memory rather than copied."""
+    return fingerprinted_name(path, hashlib.sha256(content.encode('utf-8')).hexdigest())
+
+def build_asset_manifest(base_dir, assets, cache):
+    """Map each source asset to the fingerprinted name of its minified build.
+
+    assets are paths relative to base_dir ('styles/main.css'). The hash is
+    taken from the .min file that actually ships, so it changes exactly
+    when the served bytes change. Returns {asset: {'file', 'source'}}.
+    """
+    manifest = {}
+    for asset in assets:
+        path = Path(asset)
+        minified = str(path.with_name(f'{path.stem}.min{path.suffix}'))
+        if not (base_dir / minified).exists():
+            continue
+        manifest[asset] = {
+            'file': fingerprinted_name(minified, cache.digest(base_dir / minified)),
+            'source': minified
+        }
+    return manifest
+
+def rewrite_asset_refs(html, page, manifest):
+    """Point <link>/<script> references in a page at the fingerprinted assets.
+
+    page is the page path relative to the site root; references are
+    resolved against it, and ones that do not resolve to a manifest entry
+    are left alone. Returns (html, rewritten_count).
+    """
+    page_dir = posixpath.dirname(page)
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        ref = match.group(3)
+        if ':' in ref or ref.startswith('//'):
+            return match.group(0)
+        path = re.split(r'[?#]', ref, maxsplit=1)[0]
+        tail = ref[len(path):]
+        if path.startswith('/'):
+            target = posixpath.normpath(path.lstrip('/'))
+        else:
+            target = posixpath.normpath(posixpath.join(page_dir, path))
+        entry = manifest.get(target)
+        if entry is None:
+            return match.group(0)
+        count += 1
+        if path.startswith('/'):
+            new_ref = '/' + entry['file']
+        else:
+            new_ref = posixpath.relpath(entry['file'], page_dir or '.')
+        return f'{match.group(1)}{match.group(2)}{new_ref}{tail}{match.group(2)}'
+
+    return ASSET_REF_RE.sub(replace, html), count
@@ -0,0 +1,158 @@
+import os
+from html.parser import HTMLParser
+from pathlib import Path
+
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+}
+
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+
+class Element:
+    """Minimal DOM node: tag, attributes, children and the text inside it."""
+
+    def __init__(self, tag, attrs, parent):
+        self.tag = tag
+        self.attrs = {name: value or '' for name, value in attrs}
+        self.classes = set(self.attrs.get('class', '').split())
+        self.parent = parent
+        self.children = []
+        self.text_parts = []
+
+    @property
+    def text(self):
+        return ' '.join(' '.join(self.text_parts).split())
+
+    def iter(self):
+        yield self
+        for child in self.children:
+            yield from child.iter()
+
+
+class Document:
+    """Everything the validators ask about a page, gathered in one parse.
+
+    root is the element tree; the lists below hold the elements (not
+    copies) in document order so checks can read any attribute.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.root = Element('#document', [], None)
+        self.doctype = ''
+        self.elements = []
+        self.start_tags = {}
+        self.end_tags = {}
+        self.meta = {}
+        self.headings = []
+        self.links = []
+        self.images = []
+        self.aria = []
+        self.ids = set()
+        self.title = ''
+
+    @property
+    def lang(self):
+        html = self.first('html')
+        return html.attrs.get('lang', '') if html else ''
+
+    def first(self, tag):
+        return next((e for e in self.elements if e.tag == tag), None)
+
+    def find_all(self, tag):
+        return [e for e in self.elements if e.tag == tag]
+
+    def has_tag(self, tag):
+        return tag in self.start_tags
+
+    def with_attr(self, name, value=None):
+        """Elements carrying attribute name (and, if given, exactly value)."""
+        return [e for e in self.elements
+                if name in e.attrs and (value is None or e.attrs[name] == value)]
+
+    def with_class(self, name):
+        return [e for e in self.elements if name in e.classes]
+
+
+class DocumentBuilder(HTMLParser):
+    """Build a Document in a single pass over the source."""
+
+    def __init__(self, source):
+        super().__init__()
+        self.document = Document(source)
+        self.stack = [self.document.root]
+
+    def handle_decl(self, decl):
+        if decl.lower().startswith('doctype'):
+            self.document.doctype = decl[7:].strip()
+
+    def handle_starttag(self, tag, attrs):
+        document = self.document
+        parent = self.stack[-1]
+        element = Element(tag, attrs, parent)
+        parent.children.append(element)
+        document.elements.append(element)
+        document.start_tags[tag] = document.start_tags.get(tag, 0) + 1
+
+        if 'id' in element.attrs:
+            document.ids.add(element.attrs['id'])
+        if any(name.startswith('aria-') for name in element.attrs):
+            document.aria.append(element)
+        if tag == 'meta' and 'name' in element.attrs:
+            document.meta[element.attrs['name']] = element.attrs.get('content', '')
+        elif tag in HEADING_TAGS:
+            document.headings.append(element)
+        elif tag == 'img':
+            document.images.append(element)
+        elif tag == 'a':
+            document.links.append(element)
+
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if self.stack[-1].tag == tag and tag not in VOID_ELEMENTS:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        self.document.end_tags[tag] = self.document.end_tags.get(tag, 0) + 1
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                break
+
+    def handle_data(self, data):
+        for element in self.stack:
+            element.text_parts.append(data)
+
+    def close(self):
+        super().close()
+        title = self.document.first('title')
+        self.document.title = title.text if title else ''
+        return self.document
+
+
+def parse_document(html):
+    """Parse HTML source into a Document."""
+    builder = DocumentBuilder(html)
+    builder.feed(html)
+    return builder.close()
+
+
+document_cache = {}
+
+
+def load_document(path):
+    """Parse a page once per run; later calls reuse it while the file is unchanged."""
+    path = str(Path(path).resolve())
+    stat = os.stat(path)
+    cached = document_cache.get(path)
+    if cached and cached[0] == (stat.st_size, stat.st_mtime_ns):
+        return cached[1]
+    with open(path, 'r', encoding='utf-8') as f:
+        document = parse_document(f.read())
+    document_cache[path] = ((stat.st_size, stat.st_mtime_ns), document)
+    return document
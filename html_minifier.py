@@ -0,0 +1,210 @@
+"""Conservative HTML minifier.
+
+The page is scanned once into comments, tags, raw-text bodies and text.
+Comments are dropped (conditional comments are kept). Whitespace is
+collapsed to one space, and removed entirely only next to block-level
+tags where it cannot render. <pre> and <textarea> contents are left
+alone. Attribute lists are compacted: boolean attributes lose their
+value, and quotes go when the value does not need them. Inline
+<style>/<script> bodies and style attributes are passed through the
+existing CSS and JS minifiers.
+"""
+import json
+import re
+
+import css_minifier
+import js_minifier
+from html_document import VOID_ELEMENTS
+
+# Elements whose content is raw text: kept verbatim up to the closing tag.
+RAW_TEXT_ELEMENTS = {'script', 'style', 'textarea', 'title'}
+
+# Text inside these keeps its whitespace exactly.
+PREFORMATTED_ELEMENTS = {'pre', 'textarea'}
+
+# Whitespace touching one of these tags never renders, so it is dropped.
+BLOCK_ELEMENTS = {
+    'html', 'head', 'body', 'title', 'meta', 'link', 'base', 'style', 'script',
+    'address', 'article', 'aside', 'blockquote', 'details', 'dialog', 'dd', 'div',
+    'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'header', 'hgroup', 'hr', 'li', 'main', 'nav', 'ol',
+    'optgroup', 'option', 'p', 'pre', 'section', 'summary', 'table', 'tbody',
+    'thead', 'tfoot', 'tr', 'td', 'th', 'caption', 'colgroup', 'col', 'ul'
+}
+
+BOOLEAN_ATTRIBUTES = {
+    'allowfullscreen', 'async', 'autofocus', 'autoplay', 'checked', 'controls',
+    'default', 'defer', 'disabled', 'formnovalidate', 'hidden', 'inert', 'ismap',
+    'itemscope', 'loop', 'multiple', 'muted', 'nomodule', 'novalidate', 'open',
+    'playsinline', 'readonly', 'required', 'reversed', 'selected'
+}
+
+# <script type> values that hold JavaScript
+JS_TYPES = {'', 'text/javascript', 'application/javascript', 'module'}
+JSON_TYPES = {'application/json', 'application/ld+json'}
+
+WS_RE = re.compile(r'[ \t\n\r\f]+')
+TOKEN_RE = re.compile(r'''
+    (?P<comment><!--.*?-->)
+  | (?P<declaration><![^>]*>)
+  | (?P<end></(?P<end_name>[a-zA-Z][^\s/>]*)\s*>)
+  | (?P<start><(?P<start_name>[a-zA-Z][^\s/>]*)(?P<attrs>(?:"[^"]*"|'[^']*'|[^"'>])*?)(?P<self_closing>/)?>)
+''', re.VERBOSE | re.DOTALL)
+ATTR_RE = re.compile(r'''([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?''')
+UNQUOTED_VALUE_RE = re.compile(r'''^[^\s"'=<>`]+$''')
+UNQUOTED_END_RE = re.compile(r'''=[^\s"']+$''')
+# A '/' right after an unquoted value (or a bare '=') belongs to the value
+UNQUOTED_TAIL_RE = re.compile(r'''=\s*[^\s"'>]*$''')
+SCRIPT_CLOSE_RE = re.compile(r'</(script)', re.IGNORECASE)
+
+
+def tokenize(html):
+    """Yield (kind, text, name) tokens.
+
+    Kinds are 'comment', 'declaration', 'start', 'end', 'raw' (the body of
+    a raw-text element) and 'text'. name is the lowercased tag name.
+    """
+    i = 0
+    n = len(html)
+    while i < n:
+        match = TOKEN_RE.search(html, i)
+        if match is None:
+            yield 'text', html[i:], None
+            return
+        if match.start() > i:
+            yield 'text', html[i:match.start()], None
+        kind = match.lastgroup if match.lastgroup in ('comment', 'declaration') else (
+            'end' if match.group('end') else 'start')
+        name = (match.group('end_name') or match.group('start_name') or '').lower() or None
+        yield kind, match.group(0), name
+        i = match.end()
+        if kind == 'start' and name in RAW_TEXT_ELEMENTS:
+            close = re.compile(rf'</{name}\s*>', re.IGNORECASE).search(html, i)
+            end = n if close is None else close.start()
+            yield 'raw', html[i:end], name
+            i = end
+
+
+def minify_attrs(attrs):
+    """Compact a start tag's attribute list; returns it with a leading space or ''."""
+    parts = []
+    for match in ATTR_RE.finditer(attrs):
+        attr, double, single, bare = match.groups()
+        value = next((v for v in (double, single, bare) if v is not None), None)
+        lowered = attr.lower()
+        if value is None or (lowered in BOOLEAN_ATTRIBUTES and value.lower() in ('', lowered)):
+            parts.append(attr)
+            continue
+        if lowered == 'class':
+            value = ' '.join(value.split())
+        elif lowered == 'style':
+            value = minify_style_attr(value)
+        if UNQUOTED_VALUE_RE.match(value) and not value.endswith('/'):
+            parts.append(f'{attr}={value}')
+        elif '"' in value and "'" not in value:
+            parts.append(f"{attr}='{value}'")
+        else:
+            parts.append(f'{attr}="{value}"')
+    return ''.join(' ' + part for part in parts)
+
+
+def minify_style_attr(value):
+    """Minify the declarations of a style="" attribute."""
+    minified = css_minifier.minify('x{' + value + '}')
+    if minified.startswith('x{') and minified.endswith('}'):
+        return minified[2:-1]
+    return value.strip()
+
+
+def script_type(attrs):
+    for match in ATTR_RE.finditer(attrs):
+        if match.group(1).lower() == 'type':
+            value = next((v for v in match.groups()[1:] if v is not None), '')
+            return value.strip().lower()
+    return ''
+
+
+def minify_raw(name, attrs, body):
+    """Minify the body of an inline <style> or <script>; anything else is kept."""
+    if not body.strip():
+        return ''
+    if name == 'style':
+        return css_minifier.minify(body)
+    if name == 'script':
+        kind = script_type(attrs)
+        if kind in JS_TYPES:
+            minified = js_minifier.minify(body)
+            if '<!--' in minified:
+                return body
+            # '</script' inside a string would end the element early
+            return SCRIPT_CLOSE_RE.sub(r'<\\/\1', minified)
+        if kind in JSON_TYPES:
+            try:
+                data = json.loads(body)
+            except ValueError:
+                return body
+            return json.dumps(data, separators=(',', ':'), ensure_ascii=False).replace('</', '<\\/')
+    return body
+
+
+def _boundary(token):
+    """Whether whitespace next to this token can be dropped."""
+    if token is None or token[0] == 'declaration':
+        return True
+    return token[0] in ('start', 'end') and token[2] in BLOCK_ELEMENTS
+
+
+def minify(html):
+    """Minify an HTML document."""
+    tokens = []
+    for token in tokenize(html):
+        if token[0] == 'comment' and not token[1].startswith('<!--['):
+            continue
+        if token[0] == 'text' and tokens and tokens[-1][0] == 'text':
+            tokens[-1] = ('text', tokens[-1][1] + token[1], None)
+            continue
+        tokens.append(token)
+
+    out = []
+    preformatted = 0
+    for index, (kind, text, name) in enumerate(tokens):
+        if kind == 'start':
+            match = TOKEN_RE.match(text)
+            attrs = match.group('attrs')
+            self_closing = match.group('self_closing')
+            if self_closing and UNQUOTED_TAIL_RE.search(attrs):
+                attrs += self_closing
+                self_closing = None
+            attrs = minify_attrs(attrs)
+            slash = ''
+            if self_closing and name not in VOID_ELEMENTS:
+                # An unquoted value would swallow the slash
+                slash = ' /' if UNQUOTED_END_RE.search(attrs) else '/'
+            out.append(f"<{match.group('start_name')}{attrs}{slash}>")
+            if name in PREFORMATTED_ELEMENTS:
+                preformatted += 1
+        elif kind == 'end':
+            out.append(f'</{text[2:-1].strip()}>')
+            if name in PREFORMATTED_ELEMENTS and preformatted:
+                preformatted -= 1
+        elif kind == 'raw':
+            if name == 'textarea':
+                out.append(text)
+            elif name == 'title':
+                out.append(' '.join(text.split()))
+            else:
+                out.append(minify_raw(name, TOKEN_RE.match(tokens[index - 1][1]).group('attrs'), text))
+        elif kind == 'declaration':
+            out.append(WS_RE.sub(' ', text))
+        elif kind == 'comment':
+            out.append(text)
+        elif preformatted:
+            out.append(text)
+        else:
+            text = WS_RE.sub(' ', text)
+            if text.startswith(' ') and _boundary(tokens[index - 1] if index else None):
+                text = text[1:]
+            if text.endswith(' ') and _boundary(tokens[index + 1] if index + 1 < len(tokens) else None):
+                text = text[:-1]
+            out.append(text)
+    return ''.join(out)
@@ -0,0 +1,158 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from build_cache import hash_file
+
+base_dir = Path('/app/sentient_website_redesign_0308')
+
+INTEGRITY_MANIFEST = 'integrity-manifest.json'
+MANIFEST_FORMAT = 1
+
+
+def scan_tree(root, exclude=()):
+    """Walk root once with os.scandir.
+
+    Returns (dirs, files): dirs are relative POSIX paths of every
+    subdirectory, files map relative path -> (size, mtime_ns), both in
+    sorted order. Paths in exclude (relative) are skipped.
+    """
+    root = Path(root)
+    exclude = set(exclude)
+    dirs = []
+    files = {}
+    stack = ['']
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(root / rel_dir) as entries:
+            for entry in sorted(entries, key=lambda e: e.name, reverse=True):
+                rel = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+                if rel in exclude:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(rel)
+                    stack.append(rel)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    files[rel] = (stat.st_size, stat.st_mtime_ns)
+    return sorted(dirs), dict(sorted(files.items()))
+
+
+def hash_files(root, paths, workers=None):
+    """SHA-256 of each relative path under root, hashed on a thread pool.
+
+    hashlib releases the GIL on the 1 MiB reads hash_file feeds it.
+    """
+    root = Path(root)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        digests = executor.map(lambda rel: hash_file(root / rel), paths)
+        return dict(zip(paths, digests))
+
+
+def build_manifest(root, files, workers=None):
+    """Manifest for files ({rel: (size, mtime_ns)} as from scan_tree).
+
+    Only sizes and hashes are recorded, so the manifest of unchanged
+    content is identical whatever the files' timestamps.
+    """
+    digests = hash_files(root, list(files), workers)
+    return {
+        'format': MANIFEST_FORMAT,
+        'algorithm': 'sha256',
+        'total_files': len(files),
+        'total_size_bytes': sum(size for size, _ in files.values()),
+        'files': {rel: {'size': size, 'sha256': digests[rel]} for rel, (size, _) in files.items()}
+    }
+
+
+def state_path(root):
+    """Where verify remembers the stat of files it last hashed: next to the tree."""
+    root = Path(root).resolve()
+    return root.with_name(f'.{root.name}.verify-state.json')
+
+
+def verify_tree(root, manifest, workers=None):
+    """Check a deployed tree against its manifest.
+
+    Missing files and size mismatches fail without reading anything. A
+    file whose size and mtime match what the last verification hashed
+    is trusted; only new or touched files are hashed.
+    Returns {'ok', 'missing', 'extra', 'size_mismatch', 'hash_mismatch', 'hashed'}.
+    """
+    root = Path(root)
+    _, files = scan_tree(root, exclude={INTEGRITY_MANIFEST})
+    expected = manifest['files']
+    try:
+        with open(state_path(root), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+
+    result = {'ok': 0, 'missing': [], 'extra': [], 'size_mismatch': [], 'hash_mismatch': [], 'hashed': 0}
+    result['missing'] = [rel for rel in expected if rel not in files]
+    result['extra'] = [rel for rel in files if rel not in expected]
+    suspicious = []
+    for rel, entry in expected.items():
+        if rel not in files:
+            continue
+        size, mtime_ns = files[rel]
+        if size != entry['size']:
+            result['size_mismatch'].append(rel)
+        elif state.get(rel) == [size, mtime_ns, entry['sha256']]:
+            result['ok'] += 1
+        else:
+            suspicious.append(rel)
+
+    digests = hash_files(root, suspicious, workers)
+    result['hashed'] = len(suspicious)
+    for rel, digest in digests.items():
+        if digest == expected[rel]['sha256']:
+            result['ok'] += 1
+            state[rel] = [files[rel][0], files[rel][1], digest]
+        else:
+            result['hash_mismatch'].append(rel)
+            state.pop(rel, None)
+
+    tmp_path = Path(f'{state_path(root)}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({rel: value for rel, value in state.items() if rel in expected}, f)
+    os.replace(tmp_path, state_path(root))
+    return result
+
+
+def main():
+    """Verify a tree (default: the production package) against its integrity manifest."""
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else base_dir / 'production_package'
+
+    print("="*80)
+    print("PACKAGE INTEGRITY VERIFICATION")
+    print("="*80)
+    manifest_path = root / INTEGRITY_MANIFEST
+    if not manifest_path.exists():
+        print(f"\n❌ No {INTEGRITY_MANIFEST} in {root}")
+        sys.exit(1)
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    start = time.perf_counter()
+    result = verify_tree(root, manifest)
+    elapsed = time.perf_counter() - start
+    print(f"\n🔍 {root}: {result['ok']}/{len(manifest['files'])} files verified, "
+          f"{result['hashed']} hashed, in {elapsed*1000:.1f} ms")
+    problems = 0
+    for key, label in (('missing', 'Missing'), ('size_mismatch', 'Size differs'),
+                       ('hash_mismatch', 'Content differs'), ('extra', 'Not in manifest')):
+        for rel in result[key]:
+            print(f"   ❌ {label}: {rel}")
+            problems += 1
+    if problems:
+        print(f"\n❌ {problems} integrity problem(s)")
+        sys.exit(1)
+    print("\n✅ Tree matches its integrity manifest")
+
+
+if __name__ == '__main__':
+    main()
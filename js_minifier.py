@@ -0,0 +1,812 @@
+"""Lexer-driven JavaScript minifier.
+
+The source is lexed into tokens (strings, template literals, regular
+expression literals and comments are recognised by the lexer, so their
+contents are never touched), a light-weight scope analysis marks which
+identifiers are local bindings, and the tokens are re-emitted with:
+
+- whitespace and comments removed, keeping a line break only where
+  automatic semicolon insertion depends on it,
+- local variables, parameters and inner functions renamed to short names
+  (top-level bindings are left alone because the HTML pages and the other
+  scripts refer to them by name, and so are bindings visible to eval() or
+  a with statement),
+- literal arithmetic and string concatenation folded (never into
+  `</script` or `<!--`, which inline scripts split on purpose), `true`/`false`
+  written as `!0`/`!1`, and numeric literals shortened.
+"""
+import re
+
+KEYWORDS = {
+    'break', 'case', 'catch', 'class', 'const', 'continue', 'debugger',
+    'default', 'delete', 'do', 'else', 'export', 'extends', 'false',
+    'finally', 'for', 'function', 'if', 'import', 'in', 'instanceof', 'let',
+    'new', 'null', 'return', 'super', 'switch', 'this', 'throw', 'true',
+    'try', 'typeof', 'var', 'void', 'while', 'with', 'yield', 'await',
+    'enum', 'implements', 'interface', 'package', 'private', 'protected',
+    'public', 'static'
+}
+
+# Keywords after which a '/' starts a regular expression, not a division.
+REGEX_AFTER = {
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await'
+}
+
+# Keywords that can end a statement / after which ASI may apply.
+ENDING_KEYWORDS = {'this', 'super', 'null', 'true', 'false', 'break', 'continue',
+                   'return', 'yield', 'debugger'}
+RESTRICTED_KEYWORDS = {'return', 'break', 'continue', 'throw', 'yield'}
+
+# Keywords that continue the statement before them (if/else, try/catch,
+# do-while); a statement ended by ASI needs an explicit ';' before them.
+CONTINUATION_KEYWORDS = {'else', 'catch', 'finally', 'while'}
+
+PUNCTUATORS = sorted([
+    '>>>=', '...', '===', '!==', '**=', '<<=', '>>=', '>>>', '&&=', '||=', '??=',
+    '=>', '==', '!=', '<=', '>=', '&&', '||', '??', '?.', '++', '--', '+=', '-=',
+    '*=', '/=', '%=', '&=', '|=', '^=', '**', '<<', '>>',
+    '{', '}', '(', ')', '[', ']', ';', ',', '<', '>', '+', '-', '*', '/', '%',
+    '&', '|', '^', '!', '~', '?', ':', '=', '.', '@', '#'
+], key=len, reverse=True)
+
+BINARY_PRECEDENCE = {
+    '||': 4, '??': 4, '&&': 5, '|': 6, '^': 7, '&': 8,
+    '==': 9, '!=': 9, '===': 9, '!==': 9,
+    '<': 10, '>': 10, '<=': 10, '>=': 10, 'instanceof': 10, 'in': 10,
+    '<<': 11, '>>': 11, '>>>': 11,
+    '+': 12, '-': 12, '*': 13, '/': 13, '%': 13
+}
+
+# Tokens that can open an expression operand without binding to the left.
+OPERAND_OPENERS = {'(', '[', '{', ',', ';', '=', ':', '?', '=>', 'return', 'case',
+                   '+=', '-=', '*=', '/=', '%=', '&&=', '||=', '??=', '|=', '&=', '^='}
+OPERAND_CLOSERS = {')', ']', '}', ',', ';', ':', '?'}
+
+IDENT_START_RE = re.compile(r'[A-Za-z_$\u0080-\uffff]')
+IDENT_RE = re.compile(r'[A-Za-z_$\u0080-\uffff][\w$\u0080-\uffff]*')
+NUMBER_RE = re.compile(
+    r'0[xX][0-9a-fA-F_]+n?|0[oO][0-7_]+n?|0[bB][01_]+n?'
+    r'|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?n?'
+)
+DECIMAL_RE = re.compile(r'^(\d*)(?:\.(\d*))?(?:[eE]([+-]?\d+))?$')
+
+
+class Token:
+    """A lexed token plus the annotations added by the scope analysis."""
+
+    __slots__ = ('kind', 'text', 'nl_before', 'scope', 'role', 'shorthand', 'binding')
+
+    def __init__(self, kind, text, nl_before):
+        self.kind = kind
+        self.text = text
+        self.nl_before = nl_before
+        self.scope = None
+        self.role = None
+        self.shorthand = False
+        self.binding = None
+
+
+def tokenize(source):
+    """Lex JavaScript source into a list of Tokens.
+
+    Kinds are 'name', 'num', 'str', 'regex', 'punct' and 'template'. A
+    template literal with substitutions is split into pieces (`` `..${ ``,
+    ``}..${`` and ``}..` ``) with the substitution tokens in between.
+    """
+    tokens = []
+    braces = []
+    i = 0
+    n = len(source)
+    nl = False
+    while i < n:
+        ch = source[i]
+        if ch in ' \t\f\v\ufeff\xa0':
+            i += 1
+        elif ch in '\r\n\u2028\u2029':
+            nl = True
+            i += 1
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end == -1 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            nl = nl or '\n' in source[i:end]
+            i = end
+        elif ch in '"\'':
+            j = i + 1
+            while j < n and source[j] != ch:
+                j += 2 if source[j] == '\\' else 1
+            tokens.append(Token('str', source[i:j + 1], nl))
+            nl = False
+            i = j + 1
+        elif ch == '`' or (ch == '}' and braces and braces[-1] == 'template'):
+            if ch == '}':
+                braces.pop()
+            j = i + 1
+            while j < n:
+                c = source[j]
+                if c == '\\':
+                    j += 2
+                    continue
+                if c == '`':
+                    j += 1
+                    break
+                if source.startswith('${', j):
+                    j += 2
+                    braces.append('template')
+                    break
+                j += 1
+            tokens.append(Token('template', source[i:j], nl))
+            nl = False
+            i = j
+        elif ch.isdigit() or (ch == '.' and i + 1 < n and source[i + 1].isdigit()):
+            match = NUMBER_RE.match(source, i)
+            tokens.append(Token('num', match.group(), nl))
+            nl = False
+            i = match.end()
+        elif IDENT_START_RE.match(ch) or ch == '\\':
+            match = IDENT_RE.match(source, i)
+            text = match.group() if match else source[i:i + 6]
+            tokens.append(Token('name', text, nl))
+            nl = False
+            i += len(text)
+        elif ch == '/' and _regex_allowed(tokens):
+            j = i + 1
+            in_class = False
+            while j < n:
+                c = source[j]
+                if c == '\\':
+                    j += 2
+                    continue
+                if c == '[':
+                    in_class = True
+                elif c == ']':
+                    in_class = False
+                elif c == '/' and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (source[j].isalnum() or source[j] in '_$'):
+                j += 1
+            tokens.append(Token('regex', source[i:j], nl))
+            nl = False
+            i = j
+        else:
+            punct = next((p for p in PUNCTUATORS if source.startswith(p, i)), ch)
+            if punct == '?.' and i + 2 < n and source[i + 2].isdigit():
+                punct = '?'
+            if punct == '{':
+                braces.append('brace')
+            elif punct == '}' and braces:
+                braces.pop()
+            tokens.append(Token('punct', punct, nl))
+            nl = False
+            i += len(punct)
+    return tokens
+
+
+def _regex_allowed(tokens):
+    """Decide whether a '/' at this point starts a regular expression."""
+    if not tokens:
+        return True
+    prev = tokens[-1]
+    if prev.kind in ('num', 'str', 'regex'):
+        return False
+    if prev.kind == 'name':
+        return prev.text in REGEX_AFTER
+    if prev.kind == 'template':
+        return prev.text.endswith('${')
+    return prev.text not in (')', ']', '}')
+
+
+class Scope:
+    """A function or block scope and the bindings declared in it."""
+
+    def __init__(self, parent, kind):
+        self.parent = parent
+        self.kind = kind
+        self.bindings = {}
+        self.children = []
+        if parent is not None:
+            parent.children.append(self)
+
+    def function_scope(self):
+        scope = self
+        while scope.kind == 'block':
+            scope = scope.parent
+        return scope
+
+    def declare(self, name):
+        if name not in self.bindings:
+            self.bindings[name] = Binding(name, self)
+        return self.bindings[name]
+
+    def resolve(self, name):
+        scope = self
+        while scope is not None:
+            if name in scope.bindings:
+                return scope.bindings[name]
+            scope = scope.parent
+        return None
+
+
+class Binding:
+    def __init__(self, name, scope):
+        self.name = name
+        self.scope = scope
+        self.new_name = None
+
+
+class Frame:
+    """An open bracket (or bracket-less arrow body) during analysis."""
+
+    def __init__(self, kind, scope, target=None):
+        self.kind = kind
+        self.scope = scope
+        # Scope receiving bindings for params/patterns/declarations.
+        self.target = target
+        # Declaration state: None, or True/False for "expecting a binding".
+        self.declaring = None
+        self.in_default = False
+        self.on_close = None
+        self.start = None
+        # Block whose closing brace ends a statement (no ASI needed after it).
+        self.statement = False
+
+
+BINDING_FRAMES = ('params', 'pattern_obj', 'pattern_arr')
+
+
+def _match_brackets(tokens):
+    """Map the index of every opening bracket to the index of its closer."""
+    matches = {}
+    stack = []
+    for k, tok in enumerate(tokens):
+        opener = (tok.kind == 'punct' and tok.text in '([{') or \
+            (tok.kind == 'template' and tok.text.endswith('${'))
+        closer = (tok.kind == 'punct' and tok.text in ')]}') or \
+            (tok.kind == 'template' and tok.text.startswith('}'))
+        if closer and stack:
+            matches[stack.pop()] = k
+        if opener:
+            stack.append(k)
+    return matches
+
+
+def analyze(tokens):
+    """Annotate tokens with scopes and binding roles; return the global scope."""
+    matches = _match_brackets(tokens)
+    root = Scope(None, 'global')
+    frames = [Frame('block', root)]
+    pending_params = None     # scope for the next '(' (function/method/catch)
+    pending_body = None       # scope for the next '{'
+    pending_statement = False # whether that function/catch body is a statement
+    pending_head = False      # next '(' is an if/while/for head
+    pending_arrow = None      # scope of an arrow whose '=>' comes next
+    pending_class = False
+    pending_for = False
+    n = len(tokens)
+
+    def prev_text(k):
+        return tokens[k - 1].text if k > 0 else None
+
+    def next_text(k):
+        return tokens[k + 1].text if k + 1 < n else None
+
+    def end_bodies():
+        while frames[-1].kind in ('arrow_expr', 'stmt'):
+            frames.pop()
+
+    for k, tok in enumerate(tokens):
+        frame = frames[-1]
+        tok.scope = frame.scope
+        text = tok.text
+
+        if frame.kind in ('arrow_expr', 'stmt') and tok.nl_before and k > 0 and \
+                tokens[k - 1].role != 'head_end' and \
+                _can_end(tokens[k - 1]) and _can_start(tok):
+            end_bodies()
+            frame = frames[-1]
+            tok.scope = frame.scope
+
+        if tok.kind == 'template':
+            if text.startswith('}'):
+                end_bodies()
+                frames.pop()
+            if text.endswith('${'):
+                frames.append(Frame('template', frames[-1].scope))
+            continue
+
+        if tok.kind == 'punct':
+            if text in (',', ';'):
+                if text == ';':
+                    end_bodies()
+                else:
+                    _pop_arrows(frames)
+                frame = frames[-1]
+                if frame.kind == 'stmt' and text == ';':
+                    frames.pop()
+                    continue
+                if text == ',':
+                    frame.in_default = False
+                    if frame.declaring is not None:
+                        frame.declaring = True
+                else:
+                    frame.declaring = None
+                    frame.in_default = False
+            elif text == '=':
+                frame.in_default = True
+                if frame.declaring:
+                    frame.declaring = False
+            elif text == '=>':
+                scope = pending_arrow or Scope(frame.scope, 'function')
+                pending_arrow = None
+                if next_text(k) == '{':
+                    pending_body = scope
+                else:
+                    frames.append(Frame('arrow_expr', scope))
+            elif text == '(':
+                if pending_params is not None:
+                    scope = pending_params
+                    pending_params = None
+                    new = Frame('params', scope, scope)
+                    new.on_close = ('body', scope, pending_statement)
+                elif pending_for:
+                    pending_for = False
+                    scope = Scope(frame.scope, 'block')
+                    new = Frame('forhead', scope)
+                    new.on_close = ('for', scope)
+                elif k in matches and matches[k] + 1 < n and tokens[matches[k] + 1].text == '=>':
+                    scope = Scope(frame.scope, 'function')
+                    new = Frame('params', scope, scope)
+                    new.on_close = ('arrow', scope)
+                else:
+                    new = Frame('paren', frame.scope)
+                    new.on_close = ('head',) if pending_head else None
+                pending_head = False
+                new.start = k
+                frames.append(new)
+            elif text == '[':
+                if _binding_position(frame, prev_text(k)):
+                    frames.append(Frame('pattern_arr', frame.scope, _target(frame)))
+                else:
+                    frames.append(Frame('bracket', frame.scope))
+            elif text == '{':
+                if pending_body is not None:
+                    frames.append(Frame('block', pending_body))
+                    frames[-1].statement = pending_statement
+                    pending_body = None
+                    pending_statement = False
+                elif pending_class:
+                    pending_class = False
+                    frames.append(Frame('class', frame.scope))
+                elif _binding_position(frame, prev_text(k)):
+                    frames.append(Frame('pattern_obj', frame.scope, _target(frame)))
+                elif _starts_block(prev_text(k), tokens[k - 1] if k else None):
+                    frames.append(Frame('block', Scope(frame.scope, 'block')))
+                    frames[-1].statement = True
+                else:
+                    frames.append(Frame('object', frame.scope))
+                tok.scope = frames[-1].scope
+            elif text in (')', ']', '}'):
+                end_bodies()
+                closed = frames.pop() if len(frames) > 1 else frames[-1]
+                if closed.kind in ('pattern_obj', 'pattern_arr') and frames[-1].declaring:
+                    frames[-1].declaring = False
+                if closed.statement:
+                    tok.role = 'stmt_end'
+                action = closed.on_close
+                if action and action[0] == 'body':
+                    pending_body = action[1]
+                    pending_statement = action[2]
+                elif action and action[0] == 'arrow':
+                    pending_arrow = action[1]
+                    inner = tokens[closed.start + 1:k]
+                    if len(inner) == 1 and inner[0].kind == 'name':
+                        tokens[closed.start].role = tok.role = 'drop'
+                elif action and action[0] == 'for':
+                    tok.role = 'head_end'
+                    if next_text(k) == '{':
+                        pending_body = action[1]
+                        pending_statement = True
+                    else:
+                        frames.append(Frame('stmt', action[1]))
+                elif action and action[0] == 'head':
+                    tok.role = 'head_end'
+            continue
+
+        if tok.kind != 'name':
+            continue
+        prev = prev_text(k)
+        nxt = next_text(k)
+        if prev in ('.', '?.'):
+            continue
+
+        if frame.kind in ('object', 'class') and text in KEYWORDS and nxt in (':', '(') and \
+                prev in ('{', ',', ';', '}', 'get', 'set', 'async', 'static', '*'):
+            # A keyword used as a property or method name (`{true: 1}`)
+            tok.role = 'key'
+            if nxt == '(':
+                pending_params = Scope(frame.scope, 'function')
+                pending_statement = frame.kind == 'class'
+            continue
+
+        if text == 'function':
+            scope = Scope(frame.scope, 'function')
+            name_at = k + 2 if nxt == '*' else k + 1
+            # `async function f` starts a declaration wherever `async` does
+            start = k - 1 if prev == 'async' and not tok.nl_before else k
+            if name_at < n and tokens[name_at].kind == 'name':
+                name_tok = tokens[name_at]
+                if prev_text(start) in (None, ';', '{', '}', ')') and frame.kind in ('block', 'stmt'):
+                    name_tok.binding = frame.scope.function_scope().declare(name_tok.text)
+                    pending_statement = True
+                else:
+                    name_tok.binding = scope.declare(name_tok.text)
+                name_tok.role = 'decl'
+            pending_params = scope
+            continue
+        if text == 'class':
+            name_tok = tokens[k + 1] if k + 1 < n else None
+            if name_tok is not None and name_tok.kind == 'name' and name_tok.text != 'extends':
+                if prev in (None, ';', '{', '}', ')') and frame.kind in ('block', 'stmt'):
+                    name_tok.binding = frame.scope.declare(name_tok.text)
+                name_tok.role = 'decl' if name_tok.binding else 'key'
+            pending_class = True
+            continue
+        if text in ('let', 'const', 'var') and nxt is not None and \
+                (tokens[k + 1].kind == 'name' or nxt in ('[', '{')):
+            frame.declaring = True
+            frame.target = frame.scope.function_scope() if text == 'var' else frame.scope
+            continue
+        if text == 'catch' and nxt == '(':
+            pending_params = Scope(frame.scope, 'block')
+            pending_statement = True
+            continue
+        if text == 'for':
+            pending_for = True
+            continue
+        if text in ('if', 'while', 'with'):
+            pending_head = True
+            continue
+        if text in ('in', 'of') and frame.declaring is False:
+            frame.declaring = None
+            continue
+        if tok.role is not None:
+            continue
+        if text in KEYWORDS and text not in ('let', 'static'):
+            continue
+
+        if nxt == '=>':
+            scope = Scope(frame.scope, 'function')
+            tok.scope = scope
+            tok.binding = scope.declare(text)
+            tok.role = 'decl'
+            pending_arrow = scope
+            continue
+
+        if frame.kind == 'class':
+            if frame.in_default:
+                tok.role = 'ref'
+            elif nxt == '(':
+                pending_params = Scope(frame.scope, 'function')
+                pending_statement = True
+            elif text not in ('static', 'get', 'set', 'async'):
+                tok.role = 'key'
+            continue
+
+        if frame.kind == 'object':
+            if prev in ('{', ',', 'get', 'set', 'async', '*'):
+                if nxt == ':':
+                    tok.role = 'key'
+                    continue
+                if nxt == '(':
+                    tok.role = 'key'
+                    pending_params = Scope(frame.scope, 'function')
+                    continue
+                if text in ('get', 'set', 'async') and tokens[k + 1].kind == 'name':
+                    continue
+                if nxt in (',', '}'):
+                    tok.role = 'ref'
+                    tok.shorthand = True
+                    continue
+            tok.role = 'ref'
+            continue
+
+        if frame.kind in BINDING_FRAMES and not frame.in_default:
+            if frame.kind == 'pattern_obj' and prev in ('{', ',') and nxt == ':':
+                tok.role = 'key'
+                continue
+            if prev in ('{', '[', '(', ',', ':', '...'):
+                tok.binding = frame.target.declare(text)
+                tok.role = 'decl'
+                tok.shorthand = frame.kind == 'pattern_obj' and prev in ('{', ',')
+                continue
+
+        if frame.declaring:
+            tok.binding = frame.target.declare(text)
+            tok.role = 'decl'
+            frame.declaring = False
+            continue
+
+        if nxt == ':' and prev in (None, ';', '{', '}') and frame.kind == 'block':
+            tok.role = 'key'  # label
+            continue
+        if prev in ('break', 'continue'):
+            tok.role = 'key'
+            continue
+        tok.role = 'ref'
+    return root
+
+
+def _pop_arrows(frames):
+    while frames[-1].kind == 'arrow_expr':
+        frames.pop()
+
+
+def _target(frame):
+    return frame.target if frame.target is not None else frame.scope
+
+
+def _binding_position(frame, prev):
+    """True if a '[' or '{' here opens a destructuring binding pattern."""
+    if frame.declaring:
+        return True
+    return frame.kind in BINDING_FRAMES and not frame.in_default and \
+        prev in ('(', '[', '{', ',', ':', '...')
+
+
+def _starts_block(prev, prev_tok):
+    if prev is None or prev in (')', ';', '{', '}', '=>'):
+        return True
+    return prev_tok.kind == 'name' and prev in ('else', 'try', 'finally', 'do')
+
+
+def dynamic_scopes(root, tokens):
+    """Scopes whose names may be looked up at run time: every scope
+    enclosing a direct eval() or a with statement, plus everything inside
+    a with body. Their bindings keep their names."""
+    matches = _match_brackets(tokens)
+    frozen = {root}
+
+    def freeze(scope):
+        while scope is not None and scope not in frozen:
+            frozen.add(scope)
+            scope = scope.parent
+
+    for k, tok in enumerate(tokens):
+        if tok.kind != 'name' or (k and tokens[k - 1].text in ('.', '?.')):
+            continue
+        nxt = tokens[k + 1].text if k + 1 < len(tokens) else None
+        if tok.text == 'eval' and nxt == '(':
+            freeze(tok.scope)
+        elif tok.text == 'with' and nxt == '(' and k + 1 in matches:
+            end = matches[k + 1] + 1
+            if end < len(tokens) and tokens[end].text == '{':
+                end = matches.get(end, len(tokens) - 1)
+            else:
+                while end < len(tokens) and tokens[end].text != ';':
+                    end += 1
+            for inner in tokens[k:end + 1]:
+                freeze(inner.scope)
+    return frozen
+
+
+def assign_names(root, tokens):
+    """Pick short replacement names for every binding outside dynamic scopes."""
+    for tok in tokens:
+        if tok.kind == 'name' and tok.role == 'ref' and tok.binding is None:
+            tok.binding = tok.scope.resolve(tok.text)
+    frozen = dynamic_scopes(root, tokens)
+    forbidden = set(KEYWORDS) | {'arguments', 'undefined', 'NaN', 'Infinity', 'eval'}
+    for tok in tokens:
+        if tok.kind == 'name' and (tok.binding is None or tok.binding.scope in frozen):
+            forbidden.add(tok.text)
+
+    def walk(scope, start):
+        index = start
+        for binding in scope.bindings.values():
+            if scope in frozen:
+                continue
+            while True:
+                candidate = _short_name(index)
+                index += 1
+                if candidate not in forbidden:
+                    binding.new_name = candidate
+                    break
+        for child in scope.children:
+            walk(child, index)
+
+    walk(root, 0)
+
+
+def _short_name(index):
+    first = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_$'
+    rest = first + '0123456789'
+    name = first[index % len(first)]
+    index //= len(first)
+    while index:
+        index -= 1
+        name += rest[index % len(rest)]
+        index //= len(rest)
+    return name
+
+
+def shorten_number(text):
+    """Shorten a decimal numeric literal (`0.50` -> `.5`, `1000000` -> `1e6`)."""
+    match = DECIMAL_RE.match(text)
+    if not match or '_' in text:
+        return text
+    whole, frac, exp = match.groups()
+    if exp is not None:
+        return text
+    whole = whole.lstrip('0')
+    frac = (frac or '').rstrip('0')
+    if not whole and not frac:
+        return '0'
+    if frac:
+        return f'{whole}.{frac}'
+    zeros = len(whole) - len(whole.rstrip('0'))
+    if zeros >= 3:
+        return f'{whole.rstrip("0")}e{zeros}'
+    return whole
+
+
+def _number_value(text):
+    match = DECIMAL_RE.match(text)
+    if not match or '_' in text:
+        return None
+    return float(text)
+
+
+def _format_number(value):
+    if value == int(value) and abs(value) < 1e15:
+        return shorten_number(str(int(value)))
+    return shorten_number(repr(value))
+
+
+def fold_constants(tokens):
+    """Fold literal arithmetic and string concatenation in place."""
+    changed = True
+    while changed:
+        changed = False
+        k = 1
+        while k + 1 < len(tokens):
+            left, op, right = tokens[k - 1], tokens[k], tokens[k + 1]
+            if op.kind == 'punct' and op.text in ('+', '-', '*', '/', '%') and \
+                    left.kind == right.kind and left.kind in ('num', 'str') and \
+                    _foldable_context(tokens, k):
+                folded = _fold(left, op.text, right)
+                if folded is not None:
+                    left.text = folded
+                    del tokens[k:k + 2]
+                    changed = True
+                    continue
+            k += 1
+    for k, tok in enumerate(tokens):
+        if tok.kind == 'num':
+            tok.text = shorten_number(tok.text)
+        elif tok.kind == 'name' and tok.text in ('true', 'false') and tok.role != 'key':
+            prev = tokens[k - 1].text if k else None
+            nxt = tokens[k + 1].text if k + 1 < len(tokens) else None
+            if prev not in ('.', '?.') and nxt not in ('.', '?.', '[', '**'):
+                tok.kind = 'bool'
+                tok.text = '!0' if tok.text == 'true' else '!1'
+
+
+def _foldable_context(tokens, k):
+    """True if `tokens[k-1] op tokens[k+1]` is a complete operand group."""
+    precedence = BINARY_PRECEDENCE[tokens[k].text]
+    before = tokens[k - 2] if k >= 2 else None
+    after = tokens[k + 2] if k + 2 < len(tokens) else None
+    if before is not None and before.text not in OPERAND_OPENERS:
+        if before.kind != 'punct' or BINARY_PRECEDENCE.get(before.text, 99) >= precedence:
+            return False
+    if after is not None and after.text not in OPERAND_CLOSERS:
+        if after.kind != 'punct' or BINARY_PRECEDENCE.get(after.text, 99) > precedence:
+            return False
+    return True
+
+
+def _fold(left, op, right):
+    if left.kind == 'str':
+        if op != '+' or left.text[0] != right.text[0]:
+            return None
+        text = left.text[:-1] + right.text[1:]
+        # Split on purpose so the script can be inlined in HTML
+        if '</script' in text.lower() or '<!--' in text:
+            return None
+        return text
+    a = _number_value(left.text)
+    b = _number_value(right.text)
+    if a is None or b is None or (op in ('/', '%') and b == 0):
+        return None
+    value = {'+': a + b, '-': a - b, '*': a * b, '/': a / b if b else 0,
+             '%': a % b if b else 0}[op]
+    if op == '%' and (a < 0 or b < 0):
+        return None
+    if value < 0 or value != value or abs(value) >= 1e15:
+        return None
+    text = _format_number(value)
+    if len(text) > len(left.text) + len(op) + len(right.text):
+        return None
+    return text
+
+
+def _can_end(tok):
+    if tok.kind in ('num', 'str', 'regex', 'bool'):
+        return True
+    if tok.kind == 'template':
+        return tok.text.endswith('`') and len(tok.text) > 1
+    if tok.kind == 'name':
+        return tok.text not in KEYWORDS or tok.text in ENDING_KEYWORDS
+    return tok.text in (')', ']', '}', '++', '--')
+
+
+def _can_start(tok):
+    if tok.kind in ('num', 'str', 'regex', 'bool'):
+        return True
+    if tok.kind == 'name':
+        return tok.text not in ('in', 'instanceof', 'else', 'catch', 'finally')
+    return tok.text in ('{', '++', '--', '!', '~')
+
+
+def _needs_space(prev, cur):
+    a = prev[-1]
+    b = cur[0]
+
+    def word(c):
+        return c.isalnum() or c in '_$\\' or ord(c) > 127
+
+    if word(a) and (word(b) or (b == '.' and prev[0].isdigit()
+                                and not any(c in prev for c in '.eExX'))):
+        return True
+    if (a == '+' and b == '+') or (a == '-' and b == '-'):
+        return True
+    if (a == '/' and b == '/') or (a == '<' and b == '!') or (a == '-' and b == '>'):
+        return True
+    return False
+
+
+def emit(tokens):
+    """Serialize tokens with the minimum whitespace the grammar needs."""
+    out = []
+    prev = None
+    for k, tok in enumerate(tokens):
+        if tok.role == 'drop':
+            continue
+        if tok.kind == 'punct' and tok.text == ';' and k + 1 < len(tokens) and \
+                tokens[k + 1].text == '}' and prev is not None and \
+                prev.role != 'head_end' and prev.text not in ('else', 'do', ';', '{'):
+            continue
+        text = tok.text
+        if tok.kind == 'name' and tok.binding is not None and tok.binding.new_name:
+            text = tok.binding.new_name
+            if tok.shorthand:
+                text = f'{tok.text}:{text}'
+        if prev is not None:
+            if tok.nl_before and prev.role != 'stmt_end' and tok.kind == 'name' and \
+                    tok.text in CONTINUATION_KEYWORDS and \
+                    (_can_end(prev) or (prev.kind == 'name' and prev.text in RESTRICTED_KEYWORDS)):
+                out.append(';')
+            elif tok.nl_before and prev.role != 'stmt_end' and (
+                    (prev.kind == 'name' and prev.text in RESTRICTED_KEYWORDS)
+                    or (_can_end(prev) and _can_start(tok))):
+                out.append('\n')
+            elif _needs_space(out[-1], text):
+                out.append(' ')
+        out.append(text)
+        prev = tok
+    return ''.join(out)
+
+
+def minify(source, mangle=True):
+    """Minify a script."""
+    tokens = tokenize(source)
+    root = analyze(tokens)
+    if mangle:
+        assign_names(root, tokens)
+    fold_constants(tokens)
+    return emit(tokens)
@@ -0,0 +1,165 @@
+import posixpath
+import re
+import sys
+from pathlib import Path
+from urllib.parse import unquote
+
+from html_document import load_document
+
+base_dir = Path('/app/sentient_website_redesign_0308')
+
+PAGES = [
+    'index.html',
+    'pages/alternate/about_alt.html',
+    'pages/alternate/services_alt.html',
+    'pages/alternate/team_alt.html',
+    'pages/alternate/history_alt.html',
+    'pages/alternate/contact_alt.html',
+    'pages/alternate/pricing_alt.html'
+]
+
+# (tag, attribute) pairs the browser fetches while loading the page
+SUBRESOURCE_ATTRS = {
+    ('script', 'src'), ('link', 'href'), ('img', 'src'), ('source', 'src'),
+    ('iframe', 'src'), ('video', 'src'), ('video', 'poster'), ('audio', 'src'),
+    ('embed', 'src'), ('object', 'data')
+}
+
+# (tag, attribute) pairs only followed when the user navigates
+NAVIGATION_ATTRS = {('a', 'href'), ('area', 'href'), ('form', 'action')}
+
+# <link rel> values that do not trigger a fetch
+NON_FETCHING_RELS = {'canonical', 'alternate', 'author', 'license', 'help', 'search', 'next', 'prev'}
+
+EXTERNAL_RE = re.compile(r'^(?:[a-z][a-z0-9+.-]*:|//)', re.IGNORECASE)
+
+# main.css, main.min.css and main.<hash>.min.css are the same asset
+ASSET_VARIANT_RE = re.compile(r'(?:\.[0-9a-f]{8,})?\.min(?=\.\w+$)')
+
+
+def page_references(document):
+    """Yield (kind, tag, url) for every reference in a parsed page.
+
+    kind is 'subresource' or 'navigation'. Content of <noscript> is only
+    used when scripts are off, so it is skipped.
+    """
+    def walk(element):
+        for child in element.children:
+            if child.tag == 'noscript':
+                continue
+            for attr, value in child.attrs.items():
+                if (child.tag, attr) in SUBRESOURCE_ATTRS:
+                    rels = set(child.attrs.get('rel', '').lower().split())
+                    if child.tag == 'link' and rels and rels <= NON_FETCHING_RELS:
+                        continue
+                    yield 'subresource', child.tag, value.strip()
+                elif (child.tag, attr) in NAVIGATION_ATTRS:
+                    yield 'navigation', child.tag, value.strip()
+            yield from walk(child)
+
+    yield from walk(document)
+
+
+def resolve_reference(page, url):
+    """Resolve url found on page to (path, fragment) relative to the site root.
+
+    Returns None for external, mailto:, javascript: etc. references; path
+    is None when the reference climbs above the site root.
+    """
+    if not url or EXTERNAL_RE.match(url):
+        return None
+    url, _, fragment = url.partition('#')
+    url = url.split('?', 1)[0]
+    if not url:
+        return page, fragment
+    if url.startswith('/'):
+        path = posixpath.normpath(unquote(url).lstrip('/') or '.')
+    else:
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(page), unquote(url)))
+    if path == '..' or path.startswith('../'):
+        return None, fragment
+    return path, fragment
+
+
+def check_links(root, pages=PAGES):
+    """Resolve every href/src on pages against the tree at root.
+
+    Errors (these fail the build) are subresources that 404 and assets a
+    page fetches under more than one URL: minified/fingerprinted variants
+    or query-string variants of an asset it already loads. Repeating the
+    exact same URL costs no extra fetch; it is only a warning for
+    <script>, which runs again. Broken navigation links and missing
+    #fragment targets are reported as warnings.
+    Returns {'pages': {page: {'references', 'errors', 'warnings'}}, 'errors', 'warnings'}.
+    """
+    root = Path(root)
+    report = {'pages': {}, 'errors': 0, 'warnings': 0}
+    for page in pages:
+        errors = []
+        warnings = []
+        fetched = {}
+        references = 0
+        for kind, tag, url in page_references(load_document(root / page).root):
+            references += 1
+            resolved = resolve_reference(page, url)
+            if resolved is None:
+                continue
+            path, fragment = resolved
+            target = root / path if path is not None else None
+            if target is not None and target.is_dir():
+                path = posixpath.join(path, 'index.html')
+                target = root / path
+            if target is None or not target.is_file():
+                message = f'<{tag}> {url} -> 404 ({path or "outside site root"})'
+                (errors if kind == 'subresource' else warnings).append(message)
+                continue
+
+            if kind == 'subresource':
+                asset = ASSET_VARIANT_RE.sub('', path)
+                request = (path, url.partition('#')[0].partition('?')[2])
+                if asset not in fetched:
+                    fetched[asset] = (request, url)
+                elif fetched[asset][0] != request:
+                    errors.append(f'<{tag}> {url} -> redundant fetch (already loads {fetched[asset][1]})')
+                elif tag == 'script':
+                    warnings.append(f'<{tag}> {url} -> included twice (fetched once, runs again)')
+            elif fragment and path.endswith('.html') and fragment not in load_document(root / path).ids:
+                warnings.append(f'<{tag}> {url} -> no element with id "{fragment}" in {path}')
+
+        report['pages'][page] = {'references': references, 'errors': errors, 'warnings': warnings}
+        report['errors'] += len(errors)
+        report['warnings'] += len(warnings)
+    return report
+
+
+def print_link_report(report):
+    for page, result in report['pages'].items():
+        icon = '❌' if result['errors'] else '⚠️ ' if result['warnings'] else '✅'
+        print(f"   {icon} {page} ({result['references']} references)")
+        for error in result['errors']:
+            print(f"      ❌ {error}")
+        for warning in result['warnings']:
+            print(f"      ⚠️  {warning}")
+    print(f"   {report['errors']} errors, {report['warnings']} warnings")
+
+
+def main():
+    """Check the production package if it exists, otherwise the source tree."""
+    root = base_dir / 'production_package'
+    if not root.exists():
+        root = base_dir
+
+    print("="*80)
+    print("LINK GRAPH VALIDATION")
+    print("="*80)
+    print(f"\n🔗 Resolving references in {root}...")
+    report = check_links(root)
+    print_link_report(report)
+    if report['errors']:
+        print("\n❌ Pages would ship with dead or redundant network requests")
+        sys.exit(1)
+    print("\n✅ Every subresource resolves and is fetched once")
+
+
+if __name__ == '__main__':
+    main()
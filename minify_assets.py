@@ -1,35 +1,30 @@
-import re
+import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import css_minifier
+import js_minifier
+from build_cache import BuildCache, tool_version
+
 def minify_css(content):
     """Minify CSS content."""
-    # Remove comments
-    content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
-    # Remove whitespace around special characters
-    content = re.sub(r'\s*([{}:;,>+~])\s*', r'\1', content)
-    # Remove newlines and extra spaces
-    content = re.sub(r'\s+', ' ', content)
-    # Remove trailing semicolons
-    content = re.sub(r';}', '}', content)
-    return content.strip()
+    return css_minifier.minify(content)
 
 def minify_js(content):
-    """Basic JavaScript minification."""
-    # Remove single-line comments
-    content = re.sub(r'//.*$', '', content, flags=re.MULTILINE)
-    # Remove multi-line comments
-    content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
-    # Remove extra whitespace but preserve string literals
-    lines = content.split('\n')
-    minified_lines = []
-    for line in lines:
-        line = line.strip()
-        if line:
-            minified_lines.append(line)
-    content = '\n'.join(minified_lines)
-    # Reduce multiple spaces to single space
-    content = re.sub(r'\s+', ' ', content)
-    return content.strip()
+    """Minify JavaScript content."""
+    return js_minifier.minify(content)
+
+MINIFIERS = {
+    'css': css_minifier,
+    'js': js_minifier
+}
+
+ASSET_DIRS = {
+    'styles': 'css',
+    'scripts': 'js'
+}
+
+REPORT_PATH = 'docs/MINIFICATION_REPORT.json'
 
 def minify_file(input_path, output_path, file_type):
     """Minify a file and save to output path."""
@@ -53,67 +48,100 @@ def minify_file(input_path, output_path, file_type):
     
     return original_size, minified_size, reduction
 
+def discover_assets(base_dir):
+    """Find every CSS/JS source under styles/ and scripts/ (skipping .min files)."""
+    assets = []
+    for directory, file_type in ASSET_DIRS.items():
+        for path in sorted((base_dir / directory).glob(f'*.{file_type}')):
+            if path.name.endswith(f'.min.{file_type}'):
+                continue
+            assets.append({
+                'input': path,
+                'output': path.with_name(f'{path.stem}.min.{file_type}'),
+                'type': file_type
+            })
+    return assets
+
+def minify_assets(files_to_minify, cache, max_workers=None):
+    """Minify assets in parallel, one process-pool job per stale file.
+
+    Returns a result dict per asset in input order; up-to-date outputs are
+    answered from the build cache without being read.
+    """
+    versions = {file_type: tool_version(module) for file_type, module in MINIFIERS.items()}
+    results = [None] * len(files_to_minify)
+    jobs = {}
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for index, file_info in enumerate(files_to_minify):
+            version = versions[file_info['type']]
+            cached = cache.lookup(file_info['output'], [file_info['input']], version)
+            if cached is not None:
+                results[index] = dict(cached, cached=True)
+                continue
+            future = executor.submit(minify_file, file_info['input'], file_info['output'], file_info['type'])
+            jobs[future] = index
+        
+        for future, index in jobs.items():
+            file_info = files_to_minify[index]
+            orig_size, min_size, reduction = future.result()
+            meta = {'original_size': orig_size, 'minified_size': min_size, 'reduction': reduction}
+            cache.store(file_info['output'], [file_info['input']], versions[file_info['type']], **meta)
+            results[index] = dict(meta, cached=False)
+    
+    return results
+
+def save_report(base_dir, **sections):
+    """Update MINIFICATION_REPORT.json, keeping sections written by other stages."""
+    report_path = base_dir / REPORT_PATH
+    report_path.parent.mkdir(exist_ok=True)
+    report = {}
+    if report_path.exists():
+        with open(report_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    report.update(sections)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
 def main():
     base_dir = Path('/app/sentient_website_redesign_0308')
     
-    files_to_minify = [
-        {
-            'input': base_dir / 'styles' / 'main.css',
-            'output': base_dir / 'styles' / 'main.min.css',
-            'type': 'css'
-        },
-        {
-            'input': base_dir / 'scripts' / 'main.js',
-            'output': base_dir / 'scripts' / 'main.min.js',
-            'type': 'js'
-        },
-        {
-            'input': base_dir / 'scripts' / 'tools.js',
-            'output': base_dir / 'scripts' / 'tools.min.js',
-            'type': 'js'
-        },
-        {
-            'input': base_dir / 'scripts' / 'consumer-tools.js',
-            'output': base_dir / 'scripts' / 'consumer-tools.min.js',
-            'type': 'js'
-        }
-    ]
+    files_to_minify = discover_assets(base_dir)
     
     print("="*80)
     print("ASSET MINIFICATION")
     print("="*80)
     
+    cache = BuildCache(base_dir)
+    results = minify_assets(files_to_minify, cache)
+    cache.save()
+    
     total_original = 0
     total_minified = 0
     
-    for file_info in files_to_minify:
-        if file_info['input'].exists():
-            print(f"\n📦 Minifying: {file_info['input'].name}")
-            
-            orig_size, min_size, reduction = minify_file(
-                file_info['input'],
-                file_info['output'],
-                file_info['type']
-            )
-            
-            total_original += orig_size
-            total_minified += min_size
-            
-            print(f"   Original: {orig_size:,} bytes ({orig_size/1024:.1f} KB)")
-            print(f"   Minified: {min_size:,} bytes ({min_size/1024:.1f} KB)")
-            print(f"   Reduction: {reduction:.1f}%")
-            print(f"   ✅ Saved to: {file_info['output'].name}")
+    for file_info, result in zip(files_to_minify, results):
+        orig_size = result['original_size']
+        min_size = result['minified_size']
+        total_original += orig_size
+        total_minified += min_size
+        
+        print(f"\n📦 Minifying: {file_info['input'].name}")
+        print(f"   Original: {orig_size:,} bytes ({orig_size/1024:.1f} KB)")
+        print(f"   Minified: {min_size:,} bytes ({min_size/1024:.1f} KB)")
+        print(f"   Reduction: {result['reduction']:.1f}%")
+        if result['cached']:
+            print(f"   ⏭️  Up to date: {file_info['output'].name}")
         else:
-            print(f"   ⚠️  File not found: {file_info['input']}")
+            print(f"   ✅ Saved to: {file_info['output'].name}")
     
-    total_reduction = ((total_original - total_minified) / total_original) * 100
+    total_reduction = ((total_original - total_minified) / total_original) * 100 if total_original else 0
     
     print("\n" + "="*80)
     print("SUMMARY")
     print("="*80)
     print(f"Total Original Size: {total_original:,} bytes ({total_original/1024:.1f} KB)")
     print(f"Total Minified Size: {total_minified:,} bytes ({total_minified/1024:.1f} KB)")
-    print(f"Total Reduction: {reduction:.1f}% ({(total_original - total_minified):,} bytes saved)")
+    print(f"Total Reduction: {total_reduction:.1f}% ({(total_original - total_minified):,} bytes saved)")
     print("="*80)
     
     # Create performance report
@@ -126,29 +154,18 @@ def main():
         'files': []
     }
     
-    for file_info in files_to_minify:
-        if file_info['input'].exists():
-            with open(file_info['input'], 'r', encoding='utf-8') as f:
-                orig_size = len(f.read().encode('utf-8'))
-            with open(file_info['output'], 'r', encoding='utf-8') as f:
-                min_size = len(f.read().encode('utf-8'))
-            
-            report['files'].append({
-                'filename': file_info['input'].name,
-                'type': file_info['type'],
-                'original_size': orig_size,
-                'minified_size': min_size,
-                'reduction_percentage': ((orig_size - min_size) / orig_size) * 100
-            })
-    
-    import json
-    docs_dir = base_dir / 'docs'
-    docs_dir.mkdir(exist_ok=True)
+    for file_info, result in zip(files_to_minify, results):
+        report['files'].append({
+            'filename': file_info['input'].name,
+            'type': file_info['type'],
+            'original_size': result['original_size'],
+            'minified_size': result['minified_size'],
+            'reduction_percentage': result['reduction']
+        })
     
-    with open(docs_dir / 'MINIFICATION_REPORT.json', 'w') as f:
-        json.dump(report, f, indent=2)
+    save_report(base_dir, **report)
     
-    print(f"\n✅ Minification report saved: docs/MINIFICATION_REPORT.json")
+    print(f"\n✅ Minification report saved: {REPORT_PATH}")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,476 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import struct
+import tarfile
+import tempfile
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Same level as `tar -z` and shutil.make_archive
+COMPRESSION_LEVEL = 6
+
+# Uncompressed bytes per parallel gzip block (pigz's default)
+BLOCK_SIZE = 128 * 1024
+
+# Window of the previous block used to prime the next one
+DICTIONARY_SIZE = 32 * 1024
+
+ZIP_LIMIT = 0xFFFFFFFF
+
+# Timestamp given to every entry unless SOURCE_DATE_EPOCH is set
+# (1980-01-01 UTC, the earliest date a zip can hold)
+ARCHIVE_EPOCH = 315532800
+
+
+def _deflate(data, level, dictionary=b'', last=True):
+    """Raw deflate of data, optionally primed with the preceding dictionary."""
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    # A sync flush ends the block on a byte boundary so blocks concatenate
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class OrderedResults:
+    """Write futures' results to out in submission order as they finish.
+
+    At most `limit` results are held, so memory stays bounded however much
+    is queued.
+    """
+
+    def __init__(self, out, limit):
+        self.out = out
+        self.limit = limit
+        self.pending = deque()
+
+    def add(self, future, handler):
+        self.pending.append((future, handler))
+        while self.pending and (self.pending[0][0].done() or len(self.pending) > self.limit):
+            self._write_next()
+
+    def drain(self):
+        while self.pending:
+            self._write_next()
+
+    def _write_next(self):
+        future, handler = self.pending.popleft()
+        self.out.write(handler(future.result()))
+
+
+class ParallelGzipWriter:
+    """File object that gzips what is written to it across threads, pigz-style.
+
+    Input is cut into BLOCK_SIZE blocks that are deflated concurrently,
+    each primed with the last 32 KiB of the block before it, and joined
+    into a single gzip member. The result decompresses with any gzip
+    reader and compresses as well as serial gzip.
+    """
+
+    def __init__(self, out, executor, level=COMPRESSION_LEVEL, workers=1):
+        self.out = out
+        self.executor = executor
+        self.level = level
+        self.buffer = bytearray()
+        self.dictionary = b''
+        self.crc = 0
+        self.size = 0
+        self.results = OrderedResults(out, workers * 4)
+        self.closed = False
+        # Magic, deflate, no flags, zero mtime, no extra flags, Unix
+        out.write(b'\x1f\x8b\x08\x00' + struct.pack('<I', 0) + b'\x00\x03')
+
+    def write(self, data):
+        data = bytes(data)
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        self.buffer += data
+        while len(self.buffer) > BLOCK_SIZE:
+            self._submit(bytes(self.buffer[:BLOCK_SIZE]), last=False)
+            del self.buffer[:BLOCK_SIZE]
+        return len(data)
+
+    def tell(self):
+        return self.size
+
+    def _submit(self, block, last):
+        future = self.executor.submit(_deflate, block, self.level, self.dictionary, last)
+        self.dictionary = block[-DICTIONARY_SIZE:]
+        self.results.add(future, lambda compressed: compressed)
+
+    def close(self):
+        if self.closed:
+            return
+        self._submit(bytes(self.buffer), last=True)
+        self.results.drain()
+        self.out.write(struct.pack('<II', self.crc, self.size & 0xFFFFFFFF))
+        self.closed = True
+
+
+class ParallelBlockWriter:
+    """File object that compresses fixed-size blocks as independent frames.
+
+    Blocks are compressed concurrently and written in order. bzip2, xz
+    and zstd decoders all read concatenated streams as one, the way
+    pbzip2 and xz -T output is read.
+    """
+
+    def __init__(self, out, executor, compress, block_size, workers=1):
+        self.out = out
+        self.executor = executor
+        self.compress = compress
+        self.block_size = block_size
+        self.buffer = bytearray()
+        self.size = 0
+        self.blocks = 0
+        self.results = OrderedResults(out, workers * 2)
+        self.closed = False
+
+    def write(self, data):
+        self.size += len(data)
+        self.buffer += data
+        while len(self.buffer) >= self.block_size:
+            self._submit(bytes(self.buffer[:self.block_size]))
+            del self.buffer[:self.block_size]
+        return len(data)
+
+    def tell(self):
+        return self.size
+
+    def _submit(self, block):
+        self.blocks += 1
+        self.results.add(self.executor.submit(self.compress, block), lambda compressed: compressed)
+
+    def close(self):
+        if self.closed:
+            return
+        if self.buffer or not self.blocks:
+            self._submit(bytes(self.buffer))
+        self.results.drain()
+        self.closed = True
+
+
+def _zstd_compress(data, level):
+    if zstd is not None:
+        return zstd.compress(data, level)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def _zstd_decompress(data):
+    if zstd is not None:
+        return zstd.decompress(data)
+    reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data), read_across_frames=True)
+    return reader.readall()
+
+
+# Tarball codecs. gzip uses the dictionary-primed ParallelGzipWriter; the
+# others compress block_size frames independently. zstd needs Python
+# 3.14's compression.zstd or the zstandard package.
+CODECS = {
+    'gzip': {
+        'extension': '.tar.gz', 'levels': range(1, 10), 'default_level': COMPRESSION_LEVEL,
+        'decompress': gzip.decompress, 'available': True
+    },
+    'bzip2': {
+        'extension': '.tar.bz2', 'levels': range(1, 10), 'default_level': 9,
+        'block_size': 900 * 1024,
+        'compress': lambda data, level: bz2.compress(data, level),
+        'decompress': bz2.decompress, 'available': True
+    },
+    'xz': {
+        'extension': '.tar.xz', 'levels': range(0, 10), 'default_level': 6,
+        'block_size': 8 * 1024 * 1024,
+        'compress': lambda data, level: lzma.compress(data, preset=level),
+        'decompress': lzma.decompress, 'available': True
+    },
+    'zstd': {
+        'extension': '.tar.zst', 'levels': range(1, 20), 'default_level': 3,
+        'block_size': 4 * 1024 * 1024,
+        'compress': _zstd_compress,
+        'decompress': _zstd_decompress, 'available': zstd is not None or zstandard is not None
+    }
+}
+
+
+def available_codecs():
+    return [name for name, codec in CODECS.items() if codec['available']]
+
+
+def codec_level(codec, level=None):
+    """Validate codec/level and fill in the codec's default level."""
+    if codec not in CODECS:
+        raise ValueError(f"unknown codec {codec!r} (choose from {', '.join(CODECS)})")
+    spec = CODECS[codec]
+    if not spec['available']:
+        raise ValueError(f'{codec} is not available in this Python (install zstandard or use Python 3.14+)')
+    level = spec['default_level'] if level is None else level
+    if level not in spec['levels']:
+        raise ValueError(f"{codec} level must be {spec['levels'].start}-{spec['levels'].stop - 1}")
+    return level
+
+
+def open_tar_writer(out, executor, codec, level, workers):
+    if codec == 'gzip':
+        return ParallelGzipWriter(out, executor, level, workers)
+    spec = CODECS[codec]
+    return ParallelBlockWriter(
+        out, executor, lambda block: spec['compress'](block, level), spec['block_size'], workers
+    )
+
+
+def _dos_datetime(mtime):
+    t = time.gmtime(mtime)
+    if t.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), \
+        ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+class ParallelZipWriter:
+    """Zip writer whose entries are deflated concurrently.
+
+    Entries keep the order they are added in. Directories are stored;
+    files are deflated at level. ZIP64 is not supported, so archives and
+    entries must stay under 4 GiB.
+    """
+
+    def __init__(self, out, executor, level=COMPRESSION_LEVEL, workers=1):
+        self.out = out
+        self.executor = executor
+        self.level = level
+        self.offset = 0
+        self.central = []
+        self.results = OrderedResults(self, workers * 4)
+
+    def write(self, data):
+        self.out.write(data)
+        self.offset += len(data)
+
+    def add_dir(self, arcname, mtime, mode):
+        self._add(arcname.rstrip('/') + '/', mtime, (mode << 16) | 0x10, b'', stored=True)
+
+    def add_file(self, arcname, data, mtime, mode):
+        if len(data) > ZIP_LIMIT:
+            raise ValueError(f'{arcname} is too large for a zip without ZIP64')
+        self._add(arcname, mtime, mode << 16, data, stored=False)
+
+    def _add(self, arcname, mtime, external_attr, data, stored):
+        crc = zlib.crc32(data)
+        if stored:
+            future = self.executor.submit(bytes, data)
+        else:
+            future = self.executor.submit(_deflate, data, self.level)
+        meta = (arcname.encode('utf-8'), _dos_datetime(mtime), crc, len(data), external_attr, stored)
+        self.results.add(future, lambda compressed: self._local_entry(meta, compressed))
+
+    def _local_entry(self, meta, compressed):
+        name, (dos_time, dos_date), crc, size, external_attr, stored = meta
+        method = 0 if stored else zlib.DEFLATED
+        flags = 0x800 if not name.isascii() else 0
+        if self.offset > ZIP_LIMIT:
+            raise ValueError('archive is too large for a zip without ZIP64')
+        self.central.append(struct.pack(
+            '<IHHHHHHIIIHHHHHII', 0x02014b50, (3 << 8) | 20, 20, flags, method, dos_time, dos_date,
+            crc, len(compressed), size, len(name), 0, 0, 0, 0, external_attr, self.offset
+        ) + name)
+        header = struct.pack(
+            '<IHHHHHIIIHH', 0x04034b50, 20, flags, method, dos_time, dos_date,
+            crc, len(compressed), size, len(name), 0
+        )
+        return header + name + compressed
+
+    def close(self):
+        self.results.drain()
+        start = self.offset
+        for record in self.central:
+            self.write(record)
+        self.write(struct.pack(
+            '<IHHHHIIH', 0x06054b50, 0, 0, len(self.central), len(self.central),
+            self.offset - start, start, 0
+        ))
+
+
+# Already-compressed sidecars are archived after everything else so the
+# text files they sit next to share a compression window
+SIDECAR_SUFFIXES = ('.gz', '.br')
+
+
+def walk_package(root):
+    """Return [(path, arcname)] for root and everything under it.
+
+    Directories come first, then files sorted by path with .gz/.br
+    sidecars last.
+    """
+    root = Path(root)
+    dirs = [(root, root.name)]
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in dirnames:
+            path = Path(dirpath) / name
+            dirs.append((path, path.relative_to(root.parent).as_posix()))
+        for name in filenames:
+            path = Path(dirpath) / name
+            files.append((path, path.relative_to(root.parent).as_posix()))
+    files.sort(key=lambda entry: (entry[1].endswith(SIDECAR_SUFFIXES), entry[1]))
+    return dirs + files
+
+
+def archive_epoch():
+    return int(os.environ.get('SOURCE_DATE_EPOCH', ARCHIVE_EPOCH))
+
+
+def entry_info(path, arcname, is_dir, size, mtime):
+    """TarInfo with everything but name, type, size and the executable bit fixed.
+
+    Ownership is root/root with no user or group names, so archives do
+    not depend on who built them.
+    """
+    info = tarfile.TarInfo(arcname)
+    info.mtime = mtime
+    info.uid = info.gid = 0
+    info.uname = info.gname = ''
+    if is_dir:
+        info.type = tarfile.DIRTYPE
+        info.mode = 0o755
+    else:
+        info.size = size
+        info.mode = 0o755 if path is not None and os.stat(path).st_mode & 0o111 else 0o644
+    return info
+
+
+def build_tarball(members, tar_path, level=None, workers=None, mtime=None, codec='gzip'):
+    """Write a reproducible tarball of members, [(arcname, path or bytes)], in order.
+
+    Same normalization and parallel compression as build_archives; the
+    file is moved into place only once complete. Returns bytes written.
+    """
+    level = codec_level(codec, level)
+    workers = workers or os.cpu_count() or 1
+    mtime = archive_epoch() if mtime is None else mtime
+    tar_tmp = Path(f'{tar_path}.tmp')
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor, open(tar_tmp, 'wb') as tar_out:
+            gz = open_tar_writer(tar_out, executor, codec, level, workers)
+            with tarfile.open(fileobj=gz, mode='w', format=tarfile.GNU_FORMAT) as tar:
+                for arcname, source in members:
+                    path = None if isinstance(source, bytes) else Path(source)
+                    data = source if path is None else path.read_bytes()
+                    tar.addfile(entry_info(path, arcname, False, len(data), mtime), io.BytesIO(data))
+            gz.close()
+        os.replace(tar_tmp, tar_path)
+    finally:
+        if tar_tmp.exists():
+            tar_tmp.unlink()
+    return Path(tar_path).stat().st_size
+
+
+def build_archives(root, tar_path, zip_path, level=None, workers=None, mtime=None, codec='gzip'):
+    """Write a tarball and a .zip of root from a single read of each file.
+
+    The tarball is compressed with codec at level (default: the codec's
+    default); the zip is always deflated at COMPRESSION_LEVEL, and is
+    skipped when zip_path is None. Compression runs on a thread pool
+    (zlib, bz2, lzma and zstd release the GIL). Output is reproducible:
+    entries are sorted, every timestamp is mtime (default
+    archive_epoch()), ownership and modes are normalized, and block
+    boundaries do not depend on the number of workers, so unchanged
+    input gives byte-identical archives. Archives are written to
+    temporary files and moved into place only once complete.
+    Returns {'files', 'bytes', 'workers', 'seconds'}.
+    """
+    level = codec_level(codec, level)
+    workers = workers or os.cpu_count() or 1
+    mtime = archive_epoch() if mtime is None else mtime
+    start = time.perf_counter()
+    stats = {'files': 0, 'bytes': 0, 'workers': workers}
+    tar_tmp = Path(f'{tar_path}.tmp')
+    zip_tmp = Path(f'{zip_path}.tmp') if zip_path else None
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor, open(tar_tmp, 'wb') as tar_out, \
+                (open(zip_tmp, 'wb') if zip_tmp else io.BytesIO()) as zip_out:
+            compressed = open_tar_writer(tar_out, executor, codec, level, workers)
+            zipper = ParallelZipWriter(zip_out, executor, COMPRESSION_LEVEL, workers) if zip_tmp else None
+            with tarfile.open(fileobj=compressed, mode='w', format=tarfile.GNU_FORMAT) as tar:
+                for path, arcname in walk_package(root):
+                    if path.is_dir():
+                        info = entry_info(path, arcname, True, 0, mtime)
+                        tar.addfile(info)
+                        if zipper and arcname != Path(root).name:
+                            zipper.add_dir(arcname, mtime, info.mode | 0o40000)
+                        continue
+                    data = path.read_bytes()
+                    info = entry_info(path, arcname, False, len(data), mtime)
+                    tar.addfile(info, io.BytesIO(data))
+                    if zipper:
+                        zipper.add_file(arcname, data, mtime, info.mode | 0o100000)
+                    stats['files'] += 1
+                    stats['bytes'] += len(data)
+            compressed.close()
+            if zipper:
+                zipper.close()
+        os.replace(tar_tmp, tar_path)
+        if zip_tmp:
+            os.replace(zip_tmp, zip_path)
+    finally:
+        for tmp in (tar_tmp, zip_tmp):
+            if tmp and tmp.exists():
+                tmp.unlink()
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+# Codec/level pairs tried by benchmark_codecs
+BENCHMARK_MATRIX = {
+    'gzip': [1, 6, 9],
+    'bzip2': [1, 9],
+    'xz': [0, 6, 9],
+    'zstd': [3, 10, 19]
+}
+
+
+def benchmark_codecs(root, matrix=BENCHMARK_MATRIX, workers=None):
+    """Build root's tarball with each available codec/level.
+
+    Returns [{'codec', 'level', 'size', 'ratio', 'compress_seconds',
+    'decompress_seconds'}]; ratio is compressed / uncompressed tar size.
+    Codecs this Python lacks are skipped.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for codec, levels in matrix.items():
+            if not CODECS[codec]['available']:
+                continue
+            for level in levels:
+                tar_path = Path(tmp) / f'package-{level}{CODECS[codec]["extension"]}'
+                stats = build_archives(root, tar_path, None, level, workers, codec=codec)
+                data = tar_path.read_bytes()
+                start = time.perf_counter()
+                raw = CODECS[codec]['decompress'](data)
+                decompress_seconds = time.perf_counter() - start
+                results.append({
+                    'codec': codec,
+                    'level': level,
+                    'size': len(data),
+                    'ratio': round(len(data) / len(raw), 4),
+                    'compress_seconds': round(stats['seconds'], 4),
+                    'decompress_seconds': round(decompress_seconds, 4)
+                })
+                tar_path.unlink()
+    return results
@@ -0,0 +1,90 @@
+import gzip
+import io
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from build_cache import tool_version
+from file_sync import write_atomic
+
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.json'}
+
+PRECOMPRESS_VERSION = tool_version(__file__)
+
+def sidecar_paths(path):
+    """The .gz and .br files served in place of path."""
+    path = Path(path)
+    return path.with_name(path.name + '.gz'), path.with_name(path.name + '.br')
+
+def written_sidecars(path, info):
+    """The sidecars precompress_files left current for path, given its result."""
+    gz_path, br_path = sidecar_paths(path)
+    return (gz_path, br_path) if info['brotli'] is not None else (gz_path,)
+
+def gzip_bytes(data):
+    """Gzip at level 9 with a zeroed mtime and no embedded filename."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(filename='', mode='wb', compresslevel=9, fileobj=buffer, mtime=0) as f:
+        f.write(data)
+    return buffer.getvalue()
+
+def compress_file(path):
+    """Write the .gz (and, if brotli is installed, .br) sidecar for path.
+
+    Without brotli a .br left from an earlier build is deleted, since it
+    no longer matches path. Returns (gzip_size, brotli_size); brotli_size
+    is None without brotli.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    gz_path, br_path = sidecar_paths(path)
+
+    gz_data = gzip_bytes(data)
+    write_atomic(gz_path, gz_data)
+
+    br_size = None
+    if brotli is not None:
+        br_data = brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+        write_atomic(br_path, br_data)
+        br_size = len(br_data)
+    elif br_path.exists():
+        br_path.unlink()
+
+    return len(gz_data), br_size
+
+def precompress_files(paths, cache, max_workers=None):
+    """Create sidecars for paths in parallel, skipping ones the cache says are current.
+
+    Without brotli, a .br from an earlier build is kept only if the cache
+    shows it was made from the current content. Returns
+    {path: {'size', 'gzip', 'brotli'}}; 'brotli' is None when no current
+    .br exists.
+    """
+    results = {}
+    jobs = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for path in paths:
+            gz_path, br_path = sidecar_paths(path)
+            cached = cache.lookup(gz_path, [path], PRECOMPRESS_VERSION)
+            if cached is not None and brotli is None:
+                if cached['brotli'] is not None and not br_path.exists():
+                    cached = dict(cached, brotli=None)
+                if cached['brotli'] is None and br_path.exists():
+                    br_path.unlink()
+                results[path] = cached
+                continue
+            if cached is not None and cached['brotli'] is not None and br_path.exists():
+                results[path] = cached
+                continue
+            jobs[executor.submit(compress_file, path)] = path
+
+        for future, path in jobs.items():
+            gz_size, br_size = future.result()
+            meta = {'size': Path(path).stat().st_size, 'gzip': gz_size, 'brotli': br_size}
+            cache.store(sidecar_paths(path)[0], [path], PRECOMPRESS_VERSION, **meta)
+            results[path] = meta
+    return results
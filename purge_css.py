@@ -0,0 +1,169 @@
+import re
+
+import css_minifier
+import js_minifier
+from critical_css import animation_names, drop_unused_keyframes, parse_selector, split_selector_list
+from css_minifier import AtRule, Rule
+from html_minifier import JS_TYPES
+
+WORD_RE = re.compile(r'[A-Za-z_][\w-]*')
+
+# Section headings are top-level comments such as /* Hero Section */
+UNGROUPED = '(top of file)'
+
+
+class SelectorIndex:
+    """Tags, classes, ids and attribute names the site can actually produce."""
+
+    def __init__(self):
+        self.tags = set()
+        self.classes = set()
+        self.ids = set()
+        self.attrs = set()
+
+    def add_document(self, document):
+        """Index a parsed html_document.Document, inline scripts included."""
+        for element in document.elements:
+            self.tags.add(element.tag)
+            self.classes.update(element.classes)
+            if 'id' in element.attrs:
+                self.ids.add(element.attrs['id'])
+            self.attrs.update(element.attrs)
+            if element.tag == 'script' and element.attrs.get('type', '').strip().lower() in JS_TYPES:
+                self.add_script(''.join(element.text_parts))
+
+    def add_script(self, source):
+        """Treat every word inside a JS string or template as possibly live.
+
+        This covers classList calls, className assignments and markup built
+        in template literals. Words are also added lowercased for classes
+        derived with toLowerCase().
+        """
+        for token in js_minifier.tokenize(source):
+            if token.kind not in ('str', 'template'):
+                continue
+            for word in WORD_RE.findall(token.text):
+                for name in (word, word.lower()):
+                    self.tags.add(name)
+                    self.classes.add(name)
+                    self.ids.add(name)
+                    self.attrs.add(name)
+
+
+def _compound_alive(compound, index):
+    for kind, text in compound:
+        if kind == 'tag' and text.lower() not in index.tags:
+            return False
+        if kind == 'cls' and text[1:] not in index.classes:
+            return False
+        if kind == 'id' and text[1:] not in index.ids:
+            return False
+        if kind == 'attr' and re.match(r'\[\s*([\w-]+)', text).group(1) not in index.attrs:
+            return False
+        if kind == 'pseudo' and re.match(r':(?:is|where|matches)\(', text, re.IGNORECASE):
+            argument = text[text.index('(') + 1:-1]
+            if not any(selector_alive(part, index) for part in split_selector_list(argument)):
+                return False
+    return True
+
+
+def selector_alive(selector, index):
+    """True unless a complex selector names something the site never produces."""
+    steps = parse_selector(selector)
+    if steps is None:
+        return True
+    return all(_compound_alive(compound, index) for _, compound in steps)
+
+
+def purge_nodes(nodes, index):
+    """Drop dead selectors and rules. Returns (kept_nodes, rules_removed)."""
+    kept = []
+    removed = 0
+    for node in nodes:
+        if isinstance(node, Rule):
+            parts = split_selector_list(css_minifier.selector_text(node.selector))
+            alive = [part for part in parts if selector_alive(part, index)]
+            if not alive:
+                removed += 1
+            elif len(alive) < len(parts):
+                kept.append(Rule([('word', ','.join(alive))], node.declarations))
+            else:
+                kept.append(node)
+        elif node.rules is not None and node.name not in css_minifier.KEYFRAMES_AT_RULES:
+            children, child_removed = purge_nodes(node.rules, index)
+            removed += child_removed
+            if children:
+                kept.append(AtRule(node.name, node.prelude, rules=children))
+        else:
+            kept.append(node)
+    return kept, removed
+
+
+def split_sections(css):
+    """Split a stylesheet at its top-level comments.
+
+    Returns [(heading, css)], the heading being the first line of the
+    comment with decoration stripped.
+    """
+    sections = []
+    heading = UNGROUPED
+    depth = 0
+    start = 0
+    i = 0
+    n = len(css)
+    while i < n:
+        c = css[i]
+        if c in '"\'':
+            j = i + 1
+            while j < n and css[j] != c:
+                j += 2 if css[j] == '\\' else 1
+            i = j + 1
+            continue
+        if css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            if depth == 0:
+                lines = [line.strip(' =*-\t') for line in css[i + 2:end - 2].splitlines()]
+                title = next((line for line in lines if line), '')
+                if title:
+                    sections.append((heading, css[start:i]))
+                    heading = title
+                    start = end
+            i = end
+            continue
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+        i += 1
+    sections.append((heading, css[start:]))
+    return [(heading, text) for heading, text in sections if text.strip()]
+
+
+def purge_css(css, index):
+    """Remove rules the site never uses from a stylesheet.
+
+    Returns (minified_css, groups) where groups maps each section heading
+    (repeated headings are combined) to rules/bytes before and after,
+    measured on the minified rules of that section.
+    """
+    parsed = []
+    for heading, text in split_sections(css):
+        nodes = css_minifier.parse(css_minifier.tokenize(text))
+        kept, removed = purge_nodes(nodes, index)
+        parsed.append((heading, nodes, kept, removed))
+
+    animations = animation_names([node for _, _, kept, _ in parsed for node in kept])
+    groups = {}
+    purged = []
+    for heading, nodes, kept, removed in parsed:
+        kept = drop_unused_keyframes(kept, animations)
+        purged.extend(kept)
+        group = groups.setdefault(heading, {'rules_removed': 0, 'bytes_before': 0, 'bytes_after': 0})
+        group['rules_removed'] += removed
+        group['bytes_before'] += len(css_minifier.serialize(nodes).encode('utf-8'))
+        group['bytes_after'] += len(css_minifier.serialize(kept).encode('utf-8'))
+    for group in groups.values():
+        group['bytes_removed'] = group['bytes_before'] - group['bytes_after']
+
+    return css_minifier.serialize(css_minifier.merge_rules(purged)), groups
@@ -0,0 +1,47 @@
+import runpy
+import sys
+import time
+from pathlib import Path
+
+import html_document
+
+# Run in one process so every validator shares html_document's parsed pages
+VALIDATORS = [
+    'validate_pages.py',
+    'validate_framework.py',
+    'comprehensive_qa_validator.py',
+    'create_seo_validation.py',
+    'code_quality_review.py',
+    'link_graph.py'
+]
+
+def run_qa():
+    """Run all HTML validators, parsing each page once for the whole pass."""
+    script_dir = Path(__file__).parent
+    failed = []
+    timings = []
+
+    for script in VALIDATORS:
+        start = time.perf_counter()
+        try:
+            runpy.run_path(str(script_dir / script), run_name='__main__')
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                failed.append(script)
+        timings.append((script, time.perf_counter() - start))
+
+    print("\n" + "="*80)
+    print("QA PASS SUMMARY")
+    print("="*80)
+    for script, elapsed in timings:
+        status = '❌' if script in failed else '✅'
+        print(f"{status} {script:35} {elapsed*1000:8.1f} ms")
+    print(f"\n📄 Pages parsed: {len(html_document.document_cache)}")
+
+    if failed:
+        print(f"\n❌ {len(failed)} validator(s) failed")
+        sys.exit(1)
+    print("\n✅ All validators passed")
+
+if __name__ == '__main__':
+    run_qa()
@@ -0,0 +1,28 @@
+from build_cache import BuildCache
+
+
+def test_remembered_results_follow_input_content(tmp_path):
+    source = tmp_path / 'page.html'
+    source.write_text('<p>one</p>')
+    cache = BuildCache(tmp_path)
+    assert cache.recall('stage', [source], 'v1') is None
+    cache.remember('stage', [source], 'v1', {'bytes': 10})
+    cache.save()
+
+    cache = BuildCache(tmp_path)
+    assert cache.recall('stage', [source], 'v1') == {'bytes': 10}
+    assert cache.recall('stage', [source], 'v2') is None
+    source.write_text('<p>two</p>')
+    assert cache.recall('stage', [source], 'v1') is None
+
+
+def test_lookup_misses_when_the_output_changed(tmp_path):
+    source = tmp_path / 'page.html'
+    output = tmp_path / 'out.html'
+    source.write_text('<p>one</p>')
+    output.write_text('<p>one</p>')
+    cache = BuildCache(tmp_path)
+    cache.store(output, [source], 'v1', minified_size=10)
+    assert cache.lookup(output, [source], 'v1') == {'minified_size': 10}
+    output.write_text('<p>edited by hand</p>')
+    assert cache.lookup(output, [source], 'v1') is None
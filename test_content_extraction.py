@@ -0,0 +1,264 @@
+import asyncio
+import functools
+import gzip
+import json
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+
+from content_extraction import (CHECKPOINT_FILE, METRICS_FILE, CrawlFrontier, PageExtractor, TokenBucket, WebsiteScraper,
+                                canonicalize_url, changed_pages, compare_fingerprints, histogram, page_fingerprint,
+                                percentiles)
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path):
+    """Serve tmp_path/site on localhost; yields (root dir, base URL)."""
+    root = tmp_path / 'site'
+    root.mkdir()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=str(root)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield root, f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+    server.server_close()
+
+
+def crawl(base_url, output_dir, max_pages=20, use_http_cache=False):
+    scraper = WebsiteScraper(base_url, str(output_dir), use_robots=False, use_sitemaps=False,
+                             use_http_cache=use_http_cache)
+    scraper.crawl_concurrent(base_url, max_pages=max_pages)
+    return scraper
+
+
+def test_only_same_host_http_urls_are_valid(tmp_path):
+    scraper = WebsiteScraper('http://Example.com:80/', str(tmp_path), use_http_cache=False)
+    assert scraper.is_valid_url('/about')
+    assert scraper.is_valid_url('http://example.com/x')
+    for url in ('mailto:info@example.com', 'tel:+15551234', 'javascript:void(0)',
+                'https://other.example/', 'ftp://example.com/file'):
+        assert not scraper.is_valid_url(url), url
+
+
+def test_non_http_links_are_never_queued(site, tmp_path):
+    root, base_url = site
+    (root / 'index.html').write_text(
+        '<a href="mailto:info@example.com">mail</a><a href="tel:123">call</a>'
+        '<a href="javascript:void(0)">js</a><a href="about.html">about</a>'
+    )
+    (root / 'about.html').write_text('<p>About</p>')
+    scraper = crawl(base_url, tmp_path / 'out')
+    assert scraper.visited_urls == {base_url, base_url + 'about.html'}
+
+
+def test_frontier_dedupes_canonical_urls():
+    frontier = CrawlFrontier('http://example.com/')
+    assert frontier.push('/a?b=2&a=1#top')
+    assert not frontier.push('http://EXAMPLE.com:80/a?a=1&b=2')
+    assert frontier.pop() == ('http://example.com/a?a=1&b=2', 0)
+
+
+def test_canonical_urls_keep_the_trailing_slash():
+    assert canonicalize_url('http://example.com/docs/') == 'http://example.com/docs/'
+    assert canonicalize_url('intro', 'http://example.com/docs/') == 'http://example.com/docs/intro'
+
+
+def test_relative_links_resolve_against_the_served_url(site, tmp_path):
+    root, base_url = site
+    for name, link in (('docs', 'intro.html'), ('guide', 'start.html')):
+        (root / name).mkdir()
+        (root / name / 'index.html').write_text(f'<a href="{link}">next</a>')
+        (root / name / link).write_text('<p>page</p>')
+    # guide without its slash is redirected to guide/ by the server
+    (root / 'index.html').write_text('<a href="docs/">docs</a><a href="guide">guide</a>')
+    scraper = crawl(base_url, tmp_path / 'out')
+    assert base_url + 'docs/intro.html' in scraper.visited_urls
+    assert base_url + 'guide/start.html' in scraper.visited_urls
+
+
+@pytest.mark.parametrize('entry', ['not json', json.dumps({'last_modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})])
+def test_304_with_unusable_cache_entry_refetches(site, tmp_path, entry):
+    root, base_url = site
+    (root / 'index.html').write_text('<a href="about.html">about</a>')
+    (root / 'about.html').write_text('<p>About</p>')
+    output_dir = tmp_path / 'out'
+    crawl(base_url, output_dir, use_http_cache=True)
+    cache_files = list((output_dir / '.http_cache').glob('*.json'))
+    assert cache_files
+    for path in cache_files:
+        path.write_text(entry)
+
+    scraper = crawl(base_url, output_dir, use_http_cache=True)
+    assert sorted(scraper.saved_pages) == ['about.html', 'homepage']
+    assert all(scraper.http_cache.cached_page(url) for url in scraper.visited_urls)
+
+
+PAGE = (
+    b'<html><head><meta charset="iso-8859-1"><title>Caf\xe9</title>'
+    b'<meta name="description" content="Desc"></head><body>'
+    b'<header><div class="nav">Nav</div></header>'
+    b'<main><section id="hero"><h1>Hi</h1><p>One<p>Two</section><div class="a  b">Body</div></main>'
+    b'<script>var x = "<p>no</p>"</script><img src="i.png" alt="A"><a href="../x">x</a></body></html>'
+)
+
+
+def test_page_extraction_in_one_pass():
+    page = PageExtractor('http://example.com/docs/page').extract(PAGE)
+    assert page['title'] == 'Café'
+    assert page['meta_description'] == 'Desc'
+    assert page['headings'] == {'h1': ['Hi']}
+    assert page['paragraphs'] == ['One', 'Two']
+    assert page['images'] == [{'src': 'http://example.com/docs/i.png', 'alt': 'A'}]
+    assert page['links'] == [{'href': 'http://example.com/x', 'text': 'x'}]
+    assert 'no' not in page['raw_text'].split('\n')
+    assert [(s['tag'], s['class'], s['id']) for s in page['html_structure']] == [('section', '', 'hero'), ('div', 'a b', '')]
+
+
+def test_fields_limit_what_is_collected():
+    assert PageExtractor('http://example.com/', fields=['title']).extract(PAGE) == {
+        'url': 'http://example.com/', 'title': 'Café'
+    }
+
+
+def linked_site(root, count):
+    """index.html linking to page0..page{count-1}, each linking home and to the next."""
+    (root / 'index.html').write_text(''.join(f'<a href="page{i}.html">{i}</a>' for i in range(count)))
+    for i in range(count):
+        (root / f'page{i}.html').write_text(f'<h1>Page {i}</h1><a href="/">home</a><a href="page{(i + 1) % count}.html">next</a>')
+
+
+def test_concurrent_crawl_visits_each_page_once(site, tmp_path):
+    root, base_url = site
+    linked_site(root, 12)
+    scraper = crawl(base_url, tmp_path / 'out', max_pages=50)
+    assert len(scraper.visited_urls) == 13
+    assert sorted(scraper.saved_pages) == sorted(['homepage'] + [f'page{i}.html' for i in range(12)])
+    assert scraper.metrics.report()['requests'] == 13
+
+
+def test_concurrent_crawl_stops_at_max_pages(site, tmp_path):
+    root, base_url = site
+    linked_site(root, 12)
+    scraper = crawl(base_url, tmp_path / 'out', max_pages=5)
+    assert len(scraper.visited_urls) == 5
+    assert not scraper.crawl_complete
+
+
+def test_token_bucket_paces_after_the_burst():
+    async def take(bucket, n):
+        start = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(take(TokenBucket(20, capacity=3), 3)) < 0.05
+    assert asyncio.run(take(TokenBucket(20, capacity=3), 5)) >= 0.09
+
+
+def test_resumed_crawl_fetches_only_the_remaining_pages(site, tmp_path):
+    root, base_url = site
+    linked_site(root, 12)
+    output_dir = tmp_path / 'out'
+    first = crawl(base_url, output_dir, max_pages=5)
+    assert (output_dir / CHECKPOINT_FILE).exists()
+    assert len(list(output_dir.glob('page*.json'))) == len(first.saved_pages) - 1
+
+    scraper = WebsiteScraper(base_url, str(output_dir), use_robots=False, use_sitemaps=False, use_http_cache=False)
+    scraper.crawl_concurrent(base_url, max_pages=13, resume=True)
+    assert len(scraper.visited_urls) == 13
+    assert scraper.metrics.report()['requests'] == 8
+    assert scraper.crawl_complete
+    assert len(scraper.saved_pages) == 13
+
+
+def test_sitemap_seeding_obeys_robots_and_skips_unchanged_pages(site, tmp_path):
+    root, base_url = site
+    (root / 'private').mkdir()
+    (root / 'private' / 'secret.html').write_text('<p>secret</p>')
+    (root / 'index.html').write_text('<a href="private/secret.html">secret</a>')
+    (root / 'orphan.html').write_text('<p>only in the sitemap</p><a href="linked.html">linked</a>')
+    (root / 'linked.html').write_text('<p>linked from the orphan</p>')
+    (root / 'robots.txt').write_text(f'User-agent: *\nDisallow: /private/\nSitemap: {base_url}sitemap-index.xml\n')
+    ns = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+    (root / 'sitemap-index.xml').write_text(
+        f'<sitemapindex {ns}><sitemap><loc>pages.xml.gz</loc></sitemap></sitemapindex>')
+    (root / 'pages.xml.gz').write_bytes(gzip.compress(
+        f'<urlset {ns}><url><loc>{base_url}orphan.html</loc><lastmod>2025-01-01</lastmod></url>'
+        f'<url><loc>{base_url}private/secret.html</loc></url></urlset>'.encode()))
+
+    def run():
+        scraper = WebsiteScraper(base_url, str(tmp_path / 'out'), use_http_cache=False)
+        scraper.crawl_concurrent(base_url)
+        return scraper
+
+    first = run()
+    assert sorted(first.saved_pages) == ['homepage', 'linked.html', 'orphan.html']
+    second = run()
+    assert sorted(second.saved_pages) == ['homepage', 'linked.html', 'orphan.html']
+    assert base_url + 'orphan.html' not in second.visited_urls
+    assert base_url + 'linked.html' in second.visited_urls
+
+
+def test_reflowed_markup_is_not_a_change():
+    def fingerprint(html):
+        return page_fingerprint(PageExtractor('http://example.com/').extract(html))
+
+    before = fingerprint('<main><section id="a"><p>Some copy here</p></section></main>')
+    reflowed = fingerprint('<main>\n  <section id="a">\n    <p>Some copy\n      here</p>\n  </section>\n</main>')
+    edited = fingerprint('<main><section id="a"><p>Other copy</p></section></main>')
+    assert compare_fingerprints({'p': before}, {'p': reflowed})['unchanged'] == 1
+    assert compare_fingerprints({'p': before}, {'p': edited})['modified'] == {'p': {
+        'text_changed': True, 'structure_changed': False,
+        'sections_added': [], 'sections_removed': [], 'sections_modified': ['#a']
+    }}
+
+
+def test_change_report_between_crawls(site, tmp_path):
+    root, base_url = site
+    (root / 'index.html').write_text('<a href="a.html">a</a><a href="b.html">b</a>')
+    (root / 'a.html').write_text('<p>A</p>')
+    (root / 'b.html').write_text('<p>B</p>')
+    output_dir = tmp_path / 'out'
+    crawl(base_url, output_dir).save_content()
+    assert changed_pages(output_dir) == {'homepage', 'a.html', 'b.html'}
+
+    (root / 'index.html').write_text('<a href="a.html">a</a><a href="c.html">c</a>')
+    (root / 'a.html').write_text('<p>A, edited</p>')
+    (root / 'c.html').write_text('<p>C</p>')
+    report = crawl(base_url, output_dir).save_content()
+    assert report['added'] == ['c.html']
+    assert report['removed'] == ['b.html']
+    assert sorted(report['modified']) == ['a.html', 'homepage']
+    assert changed_pages(output_dir) == {'a.html', 'c.html', 'homepage'}
+
+
+def test_histogram_and_percentiles():
+    assert histogram([5, 10, 11, 5000, 9000], [10, 100]) == {'10': 2, '100': 1, '+Inf': 2}
+    assert percentiles([]) == {}
+    assert percentiles(list(range(1, 101))) == {'p50': 51, 'p90': 91, 'p99': 100, 'max': 100}
+
+
+def test_crawl_metrics_record_every_request(site, tmp_path):
+    root, base_url = site
+    (root / 'index.html').write_text('<a href="a.html">a</a><a href="missing.html">gone</a>')
+    (root / 'a.html').write_text('<p>' + 'x' * 2000 + '</p>')
+    scraper = crawl(base_url, tmp_path / 'out')
+    scraper.save_content()
+    with open(tmp_path / 'out' / METRICS_FILE) as f:
+        metrics = json.load(f)
+    assert metrics['requests'] == 3
+    assert metrics['status_codes'] == {'200': 2, '404': 1}
+    assert metrics['bytes_total'] == sum(record['bytes'] for record in metrics['pages'])
+    assert sum(metrics['histograms']['bytes'].values()) == 3
+    assert all(record['ttfb_ms'] >= 0 for record in metrics['pages'])
+    assert [r['total_ms'] for r in metrics['slowest']] == sorted((r['total_ms'] for r in metrics['slowest']), reverse=True)
+    assert metrics['settings']['max_concurrency'] == scraper.max_concurrency
@@ -0,0 +1,45 @@
+import pytest
+
+from critical_css import critical_css, inline_critical_css, parse_stylesheet
+from html_document import parse_document
+
+PAGE = (
+    '<html><head><link rel="stylesheet" href="../styles/main.css"></head><body>'
+    '<header class="top"><a href="/" class="logo">x</a></header>'
+    '<main><section class="hero"><h1>Hi</h1></section><section class="below"><p>x</p></section></main>'
+    '</body></html>'
+)
+
+
+def critical(css, html=PAGE):
+    return critical_css(parse_stylesheet(css), parse_document(html).root)
+
+
+def test_only_rules_above_the_fold_are_kept():
+    assert critical('.hero h1{color:red}.below p{color:blue}.top{margin:0}') == '.hero h1{color:red}.top{margin:0}'
+
+
+@pytest.mark.parametrize('selector', ['a:not(:hover)', 'a:not(:visited)', 'a:not(.x:focus)', 'h1:not(::before)'])
+def test_not_with_an_argument_that_is_not_evaluated_is_kept(selector):
+    assert critical(selector + '{color:red}') == selector + '{color:red}'
+
+
+def test_not_with_an_exact_argument_is_evaluated():
+    assert critical('a:not(.logo){color:red}h1:not(.logo){color:blue}') == 'h1:not(.logo){color:blue}'
+
+
+def test_print_media_and_unused_keyframes_are_dropped():
+    css = '@media print{h1{color:red}}@keyframes spin{to{opacity:0}}@keyframes fade{to{opacity:0}}h1{animation:fade 1s}'
+    assert critical(css) == '@keyframes fade{to{opacity:0}}h1{animation:fade 1s}'
+
+
+def test_stylesheet_link_is_replaced_by_inline_css_and_preload():
+    html, size = inline_critical_css(PAGE, 'pages/index.html', 'styles/main.css', parse_stylesheet('h1{color:red}'))
+    assert size == len('h1{color:red}')
+    assert '<style>h1{color:red}</style>' in html
+    assert '<link rel="preload" href="../styles/main.css" as="style"' in html
+    assert '<noscript><link rel="stylesheet" href="../styles/main.css"></noscript>' in html
+
+
+def test_pages_without_the_stylesheet_are_unchanged():
+    assert inline_critical_css(PAGE, 'index.html', 'styles/main.css', parse_stylesheet('h1{color:red}')) == (PAGE, 0)
@@ -0,0 +1,33 @@
+import pytest
+
+import css_minifier
+
+
+@pytest.mark.parametrize('prop', ['flex', '-webkit-flex', '-ms-flex'])
+def test_flex_basis_keeps_its_unit(prop):
+    assert css_minifier.minify(f'a{{{prop}:1 1 0px}}') == f'a{{{prop}:1 1 0px}}'
+    assert css_minifier.minify(f'a{{{prop}:1 1 0%}}') == f'a{{{prop}:1 1 0%}}'
+
+
+def test_other_zero_lengths_lose_their_unit():
+    assert css_minifier.minify('a{margin:0px;-webkit-margin-start:0px}') == 'a{margin:0;-webkit-margin-start:0}'
+
+
+def test_named_colors_only_shorten_in_color_properties():
+    assert css_minifier.minify('a{color:white;-webkit-text-fill-color:white}') == 'a{color:#fff;-webkit-text-fill-color:#fff}'
+    css = '.x{grid-area:red;animation-name:white;font-family:silver}'
+    assert css_minifier.minify(css) == css
+
+
+@pytest.mark.parametrize('css', [
+    'a{margin:0}b{font:12px serif}a{line-height:1}',
+    'a{margin:0}b{inset:0}a{top:1px}',
+    'a{margin:0}b{all:unset}a{color:red}',
+    'a{margin:0}b{border-color:red}a{border-top-color:blue}',
+])
+def test_rules_are_not_merged_across_an_overriding_shorthand(css):
+    assert css_minifier.minify(css) == css
+
+
+def test_rules_merge_when_nothing_in_between_conflicts():
+    assert css_minifier.minify('a{top:1px}b{margin:0}a{color:red}') == 'a{top:1px;color:red}b{margin:0}'
@@ -0,0 +1,69 @@
+import json
+import shutil
+
+import pytest
+
+import delta_package
+from delta_package import apply_delta, build_delta, diff_manifests, record_release
+from integrity_manifest import INTEGRITY_MANIFEST, build_manifest, scan_tree
+
+
+def write_manifest(root):
+    manifest = build_manifest(root, scan_tree(root, exclude={INTEGRITY_MANIFEST})[1])
+    (root / INTEGRITY_MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+@pytest.fixture
+def releases(tmp_path):
+    """(package dir at v2, deployed copy of v1, v1 manifest, v2 manifest)"""
+    prod = tmp_path / 'production_package'
+    (prod / 'styles').mkdir(parents=True)
+    (prod / 'index.html').write_text('<p>v1</p>')
+    (prod / 'styles' / 'main.css').write_text('a{color:red}')
+    (prod / 'old.txt').write_text('gone in v2')
+    old = write_manifest(prod)
+    deployed = tmp_path / 'deployed'
+    shutil.copytree(prod, deployed)
+
+    (prod / 'index.html').write_text('<p>v2</p>')
+    (prod / 'old.txt').unlink()
+    (prod / 'styles' / 'new.css').write_text('b{color:blue}')
+    new = write_manifest(prod)
+    return prod, deployed, old, new
+
+
+def test_diff_manifests(releases):
+    _, _, old, new = releases
+    assert diff_manifests(old, new) == {
+        'added': ['styles/new.css'], 'changed': ['index.html'], 'deleted': ['old.txt']
+    }
+
+
+def test_applying_the_delta_reproduces_the_new_release(releases, tmp_path):
+    prod, deployed, old, new = releases
+    delta_path = tmp_path / 'delta.tar.gz'
+    build_delta(prod, old, new, delta_path)
+    result = apply_delta(delta_path, deployed)
+    assert result['ok'] == 3
+    assert not any(result[key] for key in ('missing', 'extra', 'size_mismatch', 'hash_mismatch'))
+    assert (deployed / 'index.html').read_text() == '<p>v2</p>'
+    assert not (deployed / 'old.txt').exists()
+
+
+def test_delta_refuses_a_target_on_another_release(releases, tmp_path):
+    prod, _, old, new = releases
+    delta_path = tmp_path / 'delta.tar.gz'
+    build_delta(prod, old, new, delta_path)
+    with pytest.raises(ValueError, match='not the release'):
+        apply_delta(delta_path, prod)
+
+
+def test_record_release_builds_a_delta_only_when_the_release_changed(releases, tmp_path, monkeypatch):
+    prod, deployed, _, _ = releases
+    monkeypatch.setattr(delta_package, 'releases_dir', tmp_path / 'releases')
+    assert record_release(deployed) == (None, None)
+    assert record_release(deployed) == (None, None)
+    delta_path, info = record_release(prod)
+    assert delta_path.exists()
+    assert info['changed'] == ['index.html']
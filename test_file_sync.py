@@ -0,0 +1,48 @@
+import os
+
+from build_cache import BuildCache
+from file_sync import place_file, prune_empty_dirs, up_to_date, write_atomic
+
+
+def test_write_atomic_does_not_write_through_a_hardlink(tmp_path):
+    src = tmp_path / 'main.css'
+    dst = tmp_path / 'package.css'
+    src.write_text('source')
+    assert place_file(src, dst, 'hardlink') == 'hardlink'
+    write_atomic(dst, b'generated')
+    assert src.read_text() == 'source'
+    assert dst.read_bytes() == b'generated'
+    assert [path.name for path in tmp_path.iterdir() if 'sync-tmp' in path.name] == []
+
+
+def test_place_file_copy_keeps_mtime(tmp_path):
+    src = tmp_path / 'a.js'
+    dst = tmp_path / 'b.js'
+    src.write_text('x')
+    assert place_file(src, dst, 'copy') == 'copy'
+    assert os.stat(dst).st_mtime_ns == os.stat(src).st_mtime_ns
+
+
+def test_up_to_date_compares_content_when_mtimes_differ(tmp_path):
+    cache = BuildCache(tmp_path)
+    src = tmp_path / 'a.txt'
+    dst = tmp_path / 'b.txt'
+    assert not up_to_date(src, dst, cache)
+    src.write_text('same')
+    dst.write_text('same')
+    os.utime(dst, ns=(0, 0))
+    assert up_to_date(src, dst, cache)
+    assert os.stat(dst).st_mtime_ns == os.stat(src).st_mtime_ns
+
+    dst.write_text('diff')
+    os.utime(dst, ns=(1, 1))
+    assert not up_to_date(src, dst, cache)
+
+
+def test_prune_empty_dirs_keeps_listed_dirs(tmp_path):
+    (tmp_path / 'a' / 'b').mkdir(parents=True)
+    (tmp_path / 'keep').mkdir()
+    (tmp_path / 'full').mkdir()
+    (tmp_path / 'full' / 'f').write_text('')
+    assert prune_empty_dirs(tmp_path, [tmp_path / 'keep']) == 2
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['full', 'keep']
@@ -0,0 +1,38 @@
+from build_cache import BuildCache
+from fingerprint_assets import build_asset_manifest, fingerprint_content, fingerprinted_name, rewrite_asset_refs
+
+MANIFEST = {
+    'styles/main.css': {'file': 'styles/main.0123456789.min.css'},
+    'scripts/main.js': {'file': 'scripts/main.abcdef0123.min.js'},
+}
+
+
+def test_fingerprinted_name():
+    assert fingerprinted_name('styles/main.min.css', 'ab' * 32) == 'styles/main.ababababab.min.css'
+    assert fingerprint_content('a.min.js', 'x') != fingerprint_content('a.min.js', 'y')
+
+
+def test_manifest_hashes_the_shipped_minified_file(tmp_path):
+    (tmp_path / 'styles').mkdir()
+    (tmp_path / 'styles' / 'main.min.css').write_text('a{color:red}')
+    manifest = build_asset_manifest(tmp_path, ['styles/main.css', 'styles/missing.css'], BuildCache(tmp_path))
+    assert list(manifest) == ['styles/main.css']
+    assert manifest['styles/main.css']['source'] == 'styles/main.min.css'
+    assert manifest['styles/main.css']['file'] == fingerprint_content('styles/main.min.css', 'a{color:red}')
+
+
+def test_references_are_rewritten_relative_to_the_page():
+    html = (
+        '<link rel="stylesheet" href="../../styles/main.css">'
+        "<script src='/scripts/main.js?v=2'></script>"
+        '<script src="https://cdn.example/scripts/main.js"></script>'
+        '<link rel="icon" href="../../favicon.ico">'
+    )
+    rewritten, count = rewrite_asset_refs(html, 'pages/alternate/about.html', MANIFEST)
+    assert count == 2
+    assert rewritten == (
+        '<link rel="stylesheet" href="../../styles/main.0123456789.min.css">'
+        "<script src='/scripts/main.abcdef0123.min.js?v=2'></script>"
+        '<script src="https://cdn.example/scripts/main.js"></script>'
+        '<link rel="icon" href="../../favicon.ico">'
+    )
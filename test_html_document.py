@@ -0,0 +1,47 @@
+import os
+
+from html_document import load_document, parse_document
+
+PAGE = '''<!DOCTYPE html>
+<html lang="en"><head><title> About
+  us </title><meta name="description" content="About the team"></head>
+<body>
+<h1 id="top" class="hero title">About</h1>
+<img src="a.png" alt="">
+<p>Text <a href="/team" aria-label="Team">team</a><br>more</p>
+<ul><li>one<li>two</ul>
+</body></html>'''
+
+
+def test_one_parse_collects_what_the_validators_ask_for():
+    document = parse_document(PAGE)
+    assert document.doctype == 'html'
+    assert document.lang == 'en'
+    assert document.title == 'About us'
+    assert document.meta == {'description': 'About the team'}
+    assert [h.tag for h in document.headings] == ['h1']
+    assert document.ids == {'top'}
+    assert [a.attrs['href'] for a in document.links] == ['/team']
+    assert document.aria == document.links
+    assert len(document.images) == 1
+    assert document.with_class('title')[0].text == 'About'
+    assert document.start_tags['li'] == 2
+    assert document.has_tag('br') and not document.has_tag('table')
+
+
+def test_void_elements_and_unclosed_tags_nest_correctly():
+    document = parse_document(PAGE)
+    p = document.first('p')
+    assert [child.tag for child in p.children] == ['a', 'br']
+    assert p.text == 'Text team more'
+    assert document.first('ul').text == 'one two'
+
+
+def test_load_document_reparses_only_when_the_file_changes(tmp_path):
+    path = tmp_path / 'page.html'
+    path.write_text('<p>one</p>')
+    first = load_document(path)
+    assert load_document(path) is first
+    path.write_text('<p>two!</p>')
+    os.utime(path, ns=(1, 1))
+    assert load_document(path).first('p').text == 'two!'
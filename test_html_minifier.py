@@ -0,0 +1,45 @@
+import pytest
+
+import html_minifier
+
+
+def test_script_close_inside_a_string_is_escaped():
+    assert html_minifier.minify_raw('script', '', 'var s = "</script>";') == 'var s="<\\/script>";'
+
+
+def test_script_that_would_gain_a_comment_opener_is_kept():
+    assert html_minifier.minify_raw('script', '', 'var s = "<!--";') == 'var s = "<!--";'
+
+
+def test_json_data_blocks_are_compacted():
+    assert html_minifier.minify_raw('script', ' type="application/ld+json"', '{ "a": "</b>" }') == '{"a":"<\\/b>"}'
+
+
+def test_non_script_types_are_left_alone():
+    body = '  <p> {{ name }} </p>  '
+    assert html_minifier.minify_raw('script', ' type="text/template"', body) == body
+
+
+@pytest.mark.parametrize('tag, expected', [
+    ('<a href=x/ >x</a>', '<a href="x/">x</a>'),
+    ('<a href=x/>x</a>', '<a href="x/">x</a>'),
+    ('<img src="a.png" alt=""/>', '<img src=a.png alt="">'),
+    ('<span title="a/"/>', '<span title="a/"/>'),
+])
+def test_unquoted_values_keep_a_trailing_slash(tag, expected):
+    assert html_minifier.minify(tag) == expected
+
+
+def test_boolean_attributes_lose_their_value():
+    html = '<input disabled="disabled" type="checkbox" checked="">'
+    assert html_minifier.minify(html) == '<input disabled type=checkbox checked>'
+
+
+def test_preformatted_text_is_kept():
+    html = '<pre>  a\n  b </pre><textarea>  t  </textarea>'
+    assert html_minifier.minify(html) == html
+
+
+def test_whitespace_and_comments():
+    html = '<!-- c --><!--[if IE]>x<![endif]--><p>  a   <b>b</b>  </p>\n<div> x </div>'
+    assert html_minifier.minify(html) == '<!--[if IE]>x<![endif]--><p>a <b>b</b></p><div>x</div>'
@@ -0,0 +1,45 @@
+import os
+
+from integrity_manifest import INTEGRITY_MANIFEST, build_manifest, scan_tree, verify_tree
+
+
+def tree(tmp_path):
+    root = tmp_path / 'site'
+    (root / 'styles').mkdir(parents=True)
+    (root / 'index.html').write_text('<p>home</p>')
+    (root / 'styles' / 'main.css').write_text('a{color:red}')
+    (root / INTEGRITY_MANIFEST).write_text('{}')
+    return root
+
+
+def test_scan_tree_lists_dirs_and_files_in_order(tmp_path):
+    root = tree(tmp_path)
+    dirs, files = scan_tree(root, exclude={INTEGRITY_MANIFEST})
+    assert dirs == ['styles']
+    assert list(files) == ['index.html', 'styles/main.css']
+    assert files['index.html'][0] == len('<p>home</p>')
+
+
+def test_manifest_does_not_depend_on_timestamps(tmp_path):
+    root = tree(tmp_path)
+    first = build_manifest(root, scan_tree(root, exclude={INTEGRITY_MANIFEST})[1])
+    os.utime(root / 'index.html', ns=(1, 1))
+    assert build_manifest(root, scan_tree(root, exclude={INTEGRITY_MANIFEST})[1]) == first
+    assert first['total_files'] == 2
+
+
+def test_verify_reports_problems_and_rehashes_only_touched_files(tmp_path):
+    root = tree(tmp_path)
+    manifest = build_manifest(root, scan_tree(root, exclude={INTEGRITY_MANIFEST})[1])
+    result = verify_tree(root, manifest)
+    assert (result['ok'], result['hashed']) == (2, 2)
+    assert verify_tree(root, manifest)['hashed'] == 0
+
+    (root / 'index.html').write_text('<p>HOME</p>')
+    (root / 'styles' / 'main.css').unlink()
+    (root / 'extra.js').write_text('')
+    result = verify_tree(root, manifest)
+    assert result['hash_mismatch'] == ['index.html']
+    assert result['missing'] == ['styles/main.css']
+    assert result['extra'] == ['extra.js']
+    assert result['hashed'] == 1
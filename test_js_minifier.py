@@ -0,0 +1,80 @@
+import shutil
+import subprocess
+
+import pytest
+
+import js_minifier
+
+node = pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+
+
+def run_node(source):
+    """Run source under node and return its stdout."""
+    result = subprocess.run(['node', '-e', source], capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def assert_same_output(source):
+    """The minified script prints exactly what the original prints."""
+    minified = js_minifier.minify(source)
+    assert run_node(minified) == run_node(source), minified
+
+
+@node
+def test_top_level_async_function_keeps_its_name():
+    assert_same_output("async function load() { return 2 }\nload().then(v => console.log(v))")
+
+
+@node
+def test_nested_async_function_is_renamed_with_its_calls():
+    source = (
+        "async function outer() {\n"
+        "  async function helper(value) { return value + 1 }\n"
+        "  return await helper(1)\n"
+        "}\n"
+        "outer().then(v => console.log(v))"
+    )
+    minified = js_minifier.minify(source)
+    assert 'helper' not in minified
+    assert_same_output(source)
+
+
+def test_boolean_keys_and_members_are_not_folded():
+    minified = js_minifier.minify("var o = {true: 1, false: 2, x: a ? true : false}; o.true; o?.false")
+    assert minified == "var o={true:1,false:2,x:a?!0:!1};o.true;o?.false"
+
+
+@node
+def test_keyword_method_names_keep_working():
+    assert_same_output(
+        "class A { true(value) { return !value } }\n"
+        "var o = {false(value) { return value }, true: 1}\n"
+        "console.log(new A().true(0), o.false(3), o.true)"
+    )
+
+
+def test_template_literals_keep_their_value():
+    source = "el.textContent = `<b>\n    bold\n  </b>`;"
+    assert js_minifier.minify(source) == "el.textContent=`<b>\n    bold\n  </b>`;"
+
+
+@node
+def test_else_after_asi_ended_statement():
+    assert_same_output("var a = 0\nif (a) console.log(1)\nelse console.log(2)\ndo a++\nwhile (a < 3)\nconsole.log(a)")
+
+
+def test_strings_are_not_folded_into_html_markers():
+    source = 'var s = "</" + "script>"; var t = "<!" + "--";'
+    assert js_minifier.minify(source) == 'var s="</"+"script>";var t="<!"+"--";'
+
+
+def test_scopes_reaching_eval_or_with_keep_their_names():
+    minified = js_minifier.minify(
+        'function f(){ var longName = 1; eval("longName") }\n'
+        'function g(o){ var value = 1; with (o) { return value } }\n'
+        'function h(){ var other = 2; return other }'
+    )
+    assert 'longName=1' in minified
+    assert 'value=1' in minified
+    assert 'other' not in minified
@@ -0,0 +1,53 @@
+from link_graph import check_links, resolve_reference
+
+
+def site(tmp_path, body):
+    (tmp_path / 'pages').mkdir()
+    (tmp_path / 'scripts').mkdir()
+    (tmp_path / 'scripts' / 'main.js').write_text('')
+    (tmp_path / 'scripts' / 'main.min.js').write_text('')
+    (tmp_path / 'about.html').write_text('<h2 id="team">Team</h2>')
+    (tmp_path / 'pages' / 'index.html').write_text(f'<html><body>{body}</body></html>')
+    return check_links(tmp_path, ['pages/index.html'])['pages']['pages/index.html']
+
+
+def test_resolve_reference():
+    assert resolve_reference('pages/a.html', '../scripts/x.js?v=1#top') == ('scripts/x.js', 'top')
+    assert resolve_reference('pages/a.html', '/img/%20a.png') == ('img/ a.png', '')
+    assert resolve_reference('pages/a.html', '#team') == ('pages/a.html', 'team')
+    assert resolve_reference('a.html', '../../x.js') == (None, '')
+    for url in ('mailto:a@b.c', 'https://cdn.example/x.js', '//cdn.example/x.js', 'javascript:void(0)'):
+        assert resolve_reference('a.html', url) is None
+
+
+def test_missing_subresource_is_an_error_and_missing_page_a_warning(tmp_path):
+    result = site(tmp_path, '<script src="scripts/main.js"></script><a href="nowhere.html">x</a>')
+    assert result['errors'] == ['<script> scripts/main.js -> 404 (pages/scripts/main.js)']
+    assert result['warnings'] == ['<a> nowhere.html -> 404 (pages/nowhere.html)']
+
+
+def test_same_asset_under_two_urls_is_an_error(tmp_path):
+    result = site(tmp_path, '<script src="../scripts/main.js"></script><script src="../scripts/main.min.js"></script>')
+    assert len(result['errors']) == 1
+    assert 'redundant fetch' in result['errors'][0]
+
+
+def test_query_string_variant_is_an_error(tmp_path):
+    result = site(tmp_path, '<script src="../scripts/main.js"></script><script src="../scripts/main.js?v=2"></script>')
+    assert len(result['errors']) == 1
+
+
+def test_exact_repeat_is_only_a_warning_for_scripts(tmp_path):
+    result = site(tmp_path, '<script src="../scripts/main.js"></script><script src="../scripts/main.js"></script>')
+    assert result['errors'] == []
+    assert result['warnings'] == ['<script> ../scripts/main.js -> included twice (fetched once, runs again)']
+
+
+def test_missing_fragment_target_is_a_warning(tmp_path):
+    result = site(tmp_path, '<a href="../about.html#team">t</a><a href="../about.html#jobs">j</a>')
+    assert result['warnings'] == ['<a> ../about.html#jobs -> no element with id "jobs" in about.html']
+
+
+def test_noscript_and_non_fetching_links_are_skipped(tmp_path):
+    result = site(tmp_path, '<link rel="canonical" href="gone.html"><noscript><img src="gone.png"></noscript>')
+    assert result == {'references': 0, 'errors': [], 'warnings': []}
@@ -0,0 +1,41 @@
+import json
+
+from build_cache import BuildCache
+from minify_assets import REPORT_PATH, discover_assets, minify_assets, save_report
+
+
+def assets(tmp_path):
+    (tmp_path / 'styles').mkdir()
+    (tmp_path / 'scripts').mkdir()
+    (tmp_path / 'styles' / 'main.css').write_text('a { color : red ; }')
+    (tmp_path / 'styles' / 'main.min.css').write_text('stale')
+    (tmp_path / 'scripts' / 'b.js').write_text('var answer = 40 + 2;\nconsole.log(answer);')
+    (tmp_path / 'scripts' / 'a.js').write_text('function f ( x ) { return x }')
+    return discover_assets(tmp_path)
+
+
+def test_discover_assets_skips_minified_files(tmp_path):
+    found = assets(tmp_path)
+    assert [(a['input'].name, a['output'].name, a['type']) for a in found] == [
+        ('main.css', 'main.min.css', 'css'), ('a.js', 'a.min.js', 'js'), ('b.js', 'b.min.js', 'js')
+    ]
+
+
+def test_results_keep_input_order_and_unchanged_files_come_from_the_cache(tmp_path):
+    found = assets(tmp_path)
+    cache = BuildCache(tmp_path)
+    first = minify_assets(found, cache, max_workers=2)
+    assert [r['cached'] for r in first] == [False, False, False]
+    assert (tmp_path / 'styles' / 'main.min.css').read_text() == 'a{color:red}'
+    assert [r['minified_size'] for r in first] == [a['output'].stat().st_size for a in found]
+
+    (tmp_path / 'scripts' / 'a.js').write_text('function g ( y ) { return y }')
+    second = minify_assets(found, cache, max_workers=2)
+    assert [r['cached'] for r in second] == [True, False, True]
+
+
+def test_save_report_keeps_other_sections(tmp_path):
+    save_report(tmp_path, assets={'css': 1})
+    save_report(tmp_path, html_pages={'pages': {}})
+    with open(tmp_path / REPORT_PATH) as f:
+        assert json.load(f) == {'assets': {'css': 1}, 'html_pages': {'pages': {}}}
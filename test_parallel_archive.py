@@ -0,0 +1,109 @@
+import io
+import os
+import random
+import tarfile
+import zipfile
+
+import pytest
+
+from parallel_archive import (ARCHIVE_EPOCH, BLOCK_SIZE, CODECS, available_codecs, benchmark_codecs, build_archives,
+                              build_tarball, codec_level, walk_package)
+
+
+@pytest.fixture
+def package(tmp_path):
+    """A small package tree; main.js spans several compression blocks."""
+    root = tmp_path / 'production_package'
+    (root / 'scripts').mkdir(parents=True)
+    (root / 'styles').mkdir()
+    rng = random.Random(0)
+    words = [''.join(rng.choice('abcdefgh') for _ in range(6)) for _ in range(200)]
+    (root / 'scripts' / 'main.js').write_text(' '.join(rng.choice(words) for _ in range(BLOCK_SIZE // 2)))
+    (root / 'styles' / 'main.css').write_text('a{color:red}')
+    (root / 'styles' / 'main.css.gz').write_bytes(b'\x1f\x8b fake sidecar')
+    (root / 'index.html').write_text('<p>home</p>')
+    os.chmod(root / 'scripts' / 'main.js', 0o755)
+    return root
+
+
+def contents(root):
+    return {path.relative_to(root.parent).as_posix(): path.read_bytes()
+            for path in root.rglob('*') if path.is_file()}
+
+
+def test_walk_package_puts_sidecars_last(package):
+    names = [arcname for _, arcname in walk_package(package)]
+    assert names == [
+        'production_package', 'production_package/scripts', 'production_package/styles',
+        'production_package/index.html', 'production_package/scripts/main.js',
+        'production_package/styles/main.css', 'production_package/styles/main.css.gz'
+    ]
+
+
+def test_tarball_and_zip_hold_every_file(package, tmp_path):
+    tar_path = tmp_path / 'package.tar.gz'
+    zip_path = tmp_path / 'package.zip'
+    stats = build_archives(package, tar_path, zip_path, workers=4)
+    expected = contents(package)
+    assert stats['files'] == len(expected)
+
+    with tarfile.open(tar_path) as tar:
+        assert {m.name: tar.extractfile(m).read() for m in tar.getmembers() if m.isfile()} == expected
+        assert tar.getmember('production_package/scripts/main.js').mode == 0o755
+    with zipfile.ZipFile(zip_path) as zf:
+        assert zf.testzip() is None
+        assert {name: zf.read(name) for name in zf.namelist() if not name.endswith('/')} == expected
+
+
+def test_build_tarball_from_bytes(tmp_path):
+    tar_path = tmp_path / 'delta.tar.gz'
+    build_tarball([('DELTA.json', b'{}'), ('files/a.txt', b'a' * 10)], tar_path, workers=2)
+    with tarfile.open(tar_path) as tar:
+        assert tar.getnames() == ['DELTA.json', 'files/a.txt']
+        assert tar.extractfile('files/a.txt').read() == b'a' * 10
+
+
+def test_archives_are_byte_identical_across_builds(package, tmp_path, monkeypatch):
+    monkeypatch.delenv('SOURCE_DATE_EPOCH', raising=False)
+    build_archives(package, tmp_path / 'a.tar.gz', tmp_path / 'a.zip', workers=1)
+    os.utime(package / 'index.html', ns=(10 ** 18, 10 ** 18))
+    build_archives(package, tmp_path / 'b.tar.gz', tmp_path / 'b.zip', workers=8)
+    assert (tmp_path / 'a.tar.gz').read_bytes() == (tmp_path / 'b.tar.gz').read_bytes()
+    assert (tmp_path / 'a.zip').read_bytes() == (tmp_path / 'b.zip').read_bytes()
+
+    with tarfile.open(tmp_path / 'a.tar.gz') as tar:
+        for member in tar.getmembers():
+            assert (member.mtime, member.uid, member.gid, member.uname, member.gname) == (ARCHIVE_EPOCH, 0, 0, '', '')
+
+
+def test_source_date_epoch_sets_the_timestamps(package, tmp_path, monkeypatch):
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+    build_archives(package, tmp_path / 'a.tar.gz', None)
+    with tarfile.open(tmp_path / 'a.tar.gz') as tar:
+        assert {member.mtime for member in tar.getmembers()} == {1700000000}
+
+
+@pytest.mark.parametrize('codec', available_codecs())
+def test_every_available_codec_round_trips(package, tmp_path, codec):
+    tar_path = tmp_path / f"package{CODECS[codec]['extension']}"
+    build_archives(package, tar_path, None, workers=4, codec=codec)
+    raw = CODECS[codec]['decompress'](tar_path.read_bytes())
+    with tarfile.open(fileobj=io.BytesIO(raw)) as tar:
+        assert {m.name: tar.extractfile(m).read() for m in tar.getmembers() if m.isfile()} == contents(package)
+
+
+def test_codec_level_validation():
+    assert codec_level('gzip') == 6
+    assert codec_level('xz', 0) == 0
+    with pytest.raises(ValueError, match='unknown codec'):
+        codec_level('rar')
+    with pytest.raises(ValueError, match='level must be 1-9'):
+        codec_level('bzip2', 0)
+
+
+def test_benchmark_covers_each_available_codec_level(package):
+    matrix = {'gzip': [1, 9], 'xz': [0], 'zstd': [3]}
+    results = benchmark_codecs(package, matrix, workers=2)
+    expected = [(codec, level) for codec, levels in matrix.items() if CODECS[codec]['available'] for level in levels]
+    assert [(r['codec'], r['level']) for r in results] == expected
+    assert all(0 < r['ratio'] < 1 for r in results)
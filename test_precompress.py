@@ -0,0 +1,41 @@
+import gzip
+
+import precompress
+from build_cache import BuildCache
+from precompress import compress_file, gzip_bytes, precompress_files, sidecar_paths, written_sidecars
+
+
+def test_gzip_output_is_reproducible():
+    data = b'body{color:red}' * 50
+    assert gzip_bytes(data) == gzip_bytes(data)
+    assert gzip.decompress(gzip_bytes(data)) == data
+
+
+def test_stale_brotli_sidecar_is_removed_without_brotli(tmp_path, monkeypatch):
+    monkeypatch.setattr(precompress, 'brotli', None)
+    path = tmp_path / 'main.css'
+    path.write_text('body{color:red}')
+    gz_path, br_path = sidecar_paths(path)
+    br_path.write_bytes(b'left over from an older build')
+
+    gz_size, br_size = compress_file(path)
+    assert br_size is None
+    assert not br_path.exists()
+    assert gz_path.stat().st_size == gz_size
+    assert written_sidecars(path, {'brotli': None}) == (gz_path,)
+
+
+def test_cached_sidecars_are_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr(precompress, 'brotli', None)
+    path = tmp_path / 'index.html'
+    path.write_text('<p>hello</p>' * 20)
+    cache = BuildCache(tmp_path)
+    first = precompress_files([path], cache, max_workers=1)[path]
+    gz_path = sidecar_paths(path)[0]
+    mtime = gz_path.stat().st_mtime_ns
+
+    assert precompress_files([path], cache, max_workers=1)[path] == first
+    assert gz_path.stat().st_mtime_ns == mtime
+
+    path.write_text('<p>changed</p>')
+    assert precompress_files([path], cache, max_workers=1)[path]['size'] == len('<p>changed</p>')
@@ -0,0 +1,46 @@
+from html_document import parse_document
+from purge_css import SelectorIndex, purge_css, split_sections
+
+CSS = '.card{color:red}.is-open{display:block}.unused{color:blue}'
+
+
+def purged(html):
+    index = SelectorIndex()
+    index.add_document(parse_document(html))
+    return purge_css(CSS, index)[0]
+
+
+def test_classes_added_by_inline_scripts_are_kept():
+    css = purged(
+        '<div class="card"></div>'
+        "<script>document.querySelector('.card').classList.add('is-open')</script>"
+    )
+    assert '.is-open' in css
+    assert '.card' in css
+    assert '.unused' not in css
+
+
+def test_non_script_data_blocks_are_not_scanned():
+    css = purged('<div class="card"></div><script type="text/template">"is-open"</script>')
+    assert '.is-open' not in css
+
+
+def test_dead_selectors_rules_and_keyframes_are_removed_per_section():
+    index = SelectorIndex()
+    index.add_document(parse_document('<div class="card" data-x="1" id="main"><p>x</p></div>'))
+    css, groups = purge_css(
+        '/* Cards */.card{color:red}.gone{color:red}'
+        '/* Misc */:is(.gone,.card) p{margin:0}[data-y]{margin:0}[data-x]{margin:0}'
+        '@keyframes spin{to{opacity:0}}.gone{animation:spin 1s}'
+        '@media (min-width:1px){#main{margin:0}#nope{margin:0}}',
+        index
+    )
+    assert css == '.card{color:red}:is(.gone,.card) p,[data-x]{margin:0}@media (min-width:1px){#main{margin:0}}'
+    assert {heading: group['rules_removed'] for heading, group in groups.items()} == {'Cards': 1, 'Misc': 3}
+    assert all(g['bytes_removed'] == g['bytes_before'] - g['bytes_after'] for g in groups.values())
+
+
+def test_split_sections_ignores_comment_markers_in_strings():
+    assert split_sections('a{color:red}/* ==== Hero ==== */b{content:"/*"}') == [
+        ('(top of file)', 'a{color:red}'), ('Hero', 'b{content:"/*"}')
+    ]
@@ -2,6 +2,8 @@ import os
 import json
 from pathlib import Path
 
+from html_document import load_document
+
 print("=" * 60)
 print("sentAIent Website Framework Validation Report")
 print("=" * 60)
@@ -53,35 +55,35 @@ print("\n\n2. HTML STRUCTURE VALIDATION")
 print("-" * 60)
 
 html_path = base_dir / 'index.html'
-with open(html_path, 'r', encoding='utf-8') as f:
-    html_content = f.read()
-
-html_checks = {
-    '<!DOCTYPE html>': 'HTML5 doctype',
-    '<html lang="en">': 'Language attribute',
-    '<meta name="viewport"': 'Viewport meta tag',
-    '<meta name="description"': 'Meta description',
-    'role="banner"': 'Header landmark',
-    'role="navigation"': 'Navigation landmark',
-    'role="main"': 'Main content landmark',
-    'role="contentinfo"': 'Footer landmark',
-    'class="hero-section"': 'Hero section',
-    'class="services-section"': 'Services section',
-    'class="industries-section"': 'Industries section',
-    'class="team-section"': 'Team section',
-    'class="calculator-section"': 'Calculator section',
-    'aria-label': 'ARIA labels for accessibility',
-    'Brian Leonard': 'Team member: Brian',
-    'Greg Francis': 'Team member: Greg'
-}
+document = load_document(html_path)
+html_content = document.source
+page_text = document.root.text
+
+html_checks = [
+    ('<!DOCTYPE html>', 'HTML5 doctype', document.doctype.lower() == 'html'),
+    ('<html lang="en">', 'Language attribute', document.lang == 'en'),
+    ('<meta name="viewport"', 'Viewport meta tag', 'viewport' in document.meta),
+    ('<meta name="description"', 'Meta description', 'description' in document.meta),
+    ('role="banner"', 'Header landmark', bool(document.with_attr('role', 'banner'))),
+    ('role="navigation"', 'Navigation landmark', bool(document.with_attr('role', 'navigation'))),
+    ('role="main"', 'Main content landmark', bool(document.with_attr('role', 'main'))),
+    ('role="contentinfo"', 'Footer landmark', bool(document.with_attr('role', 'contentinfo'))),
+    ('class="hero-section"', 'Hero section', bool(document.with_class('hero-section'))),
+    ('class="services-section"', 'Services section', bool(document.with_class('services-section'))),
+    ('class="industries-section"', 'Industries section', bool(document.with_class('industries-section'))),
+    ('class="team-section"', 'Team section', bool(document.with_class('team-section'))),
+    ('class="calculator-section"', 'Calculator section', bool(document.with_class('calculator-section'))),
+    ('aria-label', 'ARIA labels for accessibility', bool(document.with_attr('aria-label'))),
+    ('Brian Leonard', 'Team member: Brian', 'Brian Leonard' in page_text),
+    ('Greg Francis', 'Team member: Greg', 'Greg Francis' in page_text)
+]
 
-for check, description in html_checks.items():
-    present = check in html_content
+for check, description, present in html_checks:
     status = "✓" if present else "✗"
     print(f"{status} {description:45} {check[:30]}")
 
 # Count sections
-section_count = html_content.count('<section')
+section_count = len(document.find_all('section'))
 print(f"\nTotal sections: {section_count}")
 
 # 3. Validate CSS Framework
@@ -213,11 +215,11 @@ print("\n\n8. ACCESSIBILITY FEATURES VALIDATION")
 print("-" * 60)
 
 a11y_checks = {
-    'role=': html_content.count('role='),
-    'aria-label': html_content.count('aria-label'),
-    'aria-controls': html_content.count('aria-controls'),
-    'aria-expanded': html_content.count('aria-expanded'),
-    'alt=': html_content.count('alt='),
+    'role=': len(document.with_attr('role')),
+    'aria-label': len(document.with_attr('aria-label')),
+    'aria-controls': len(document.with_attr('aria-controls')),
+    'aria-expanded': len(document.with_attr('aria-expanded')),
+    'alt=': len(document.with_attr('alt')),
     ':focus': css_content.count(':focus'),
     'prefers-reduced-motion': css_content.count('prefers-reduced-motion')
 }
@@ -2,6 +2,8 @@ import os
 import json
 from pathlib import Path
 
+from html_document import load_document
+
 project_root = Path("/app/sentient_website_redesign_0308")
 
 validation_results = {
@@ -33,18 +35,17 @@ for page in pages:
     if page_path.exists():
         file_size = page_path.stat().st_size
         
-        with open(page_path, 'r') as f:
-            content = f.read()
+        document = load_document(page_path)
         
-        has_doctype = "<!DOCTYPE html>" in content
+        has_doctype = document.doctype.lower() == "html"
         has_semantic = all([
-            "<header" in content,
-            "<main" in content,
-            "<footer" in content
+            document.has_tag("header"),
+            document.has_tag("main"),
+            document.has_tag("footer")
         ])
-        has_nav = "<nav" in content
-        has_aria = "aria-" in content
-        has_h1 = "<h1" in content
+        has_nav = document.has_tag("nav")
+        has_aria = bool(document.aria)
+        has_h1 = document.has_tag("h1")
         
         validation_results["pages_validated"].append({
             "file": page,